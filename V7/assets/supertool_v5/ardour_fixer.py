@@ -1,10 +1,419 @@
+"""
+ardour_fixer.py — Ardour Mastering Assistant
+
+Copyright (c) 2025 FreeEd4Med
+
+This script (code) is licensed under the MIT License - see /LICENSE in the repo root.
+"""
+
 import os
-def analyze_and_report(file_path, ref_spec=None, ref_name="", options=None, out_dir=None):
+import subprocess
+import re
+import argparse
+import json
+import math
+import sys
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from mastering_plots import FORMATS as PLOT_FORMATS, render_plots
+
+# --- Dependency Check (Colorama) ---
+try:
+    import colorama
+    from colorama import Fore, Style
+    colorama.init(autoreset=True)
+    CYAN = Fore.CYAN
+    GREEN = Fore.GREEN
+    YELLOW = Fore.YELLOW
+    RED = Fore.RED
+    MAGENTA = Fore.MAGENTA
+    RESET = Style.RESET_ALL
+except ImportError:
+    # Plain ANSI codes; status_tag() needs the colors to differ
+    CYAN, GREEN, YELLOW, RED, MAGENTA = "\033[36m", "\033[32m", "\033[33m", "\033[31m", "\033[35m"
+    RESET = "\033[0m"
+
+# --- Optional NumPy (single-pass Mid/Side X-Ray) ---
+try:
+    import numpy as np
+    NUMPY_AVAIL = True
+except ImportError:
+    NUMPY_AVAIL = False
+
+# --- Smart Path Configuration ---
+MICHAEL_PATH = Path("/media/Multimedia/Music4Pub/PRE-Mastered/Digital Renegade")
+MICHAEL_OUT = Path("/media/Multimedia/Music4Pub/scripts/outputs")
+HOME = Path.home()
+STUDENT_PATH = HOME / "Music" / "PRE-Mastered"
+STUDENT_OUT = HOME / "Music" / "Mastering_Reports"
+
+if MICHAEL_PATH.exists():
+    DEFAULT_DIR = MICHAEL_PATH
+    OUTPUT_DIR_BASE = MICHAEL_OUT
+else:
+    DEFAULT_DIR = STUDENT_PATH
+    OUTPUT_DIR_BASE = STUDENT_OUT
+
+# --- Mastering Targets ---
+TEMPLATE_TARGET_LUFS = -14.0
+TEMPLATE_TARGET_TP = -1.0
+MIN_DYNAMIC_RANGE = 9.0
+LOUDNORM_I_RANGE = (-70.0, -5.0)  # integrated targets loudnorm accepts
+
+# Platform presets (integrated LUFS / true peak dBTP)
+PLATFORMS = {
+    "spotify": {"lufs": -14.0, "tp": -1.0},
+    "youtube": {"lufs": -14.0, "tp": -1.0},
+    "apple": {"lufs": -16.0, "tp": -1.0},
+    "cd": {"lufs": -9.0, "tp": -0.3},
+    "vinyl": {"lufs": -12.0, "tp": -1.0},
+    "custom": {},
+}
+
+# --- Ardour Template Defaults ---
+KNOB_CALF_THRESH = -13.0
+KNOB_LSP_INPUT = 1.4
+KNOB_LOUDMAX_THRESH = -1.0
+
+# Global list for report
+report_lines = []
+# Plots queued by analyze_and_report, rendered in parallel at the end of the run
+plot_jobs = []
+
+def log(text, color_code=None):
+    if color_code:
+        print(f"{color_code}{text}{RESET}")
+    else:
+        print(text)
+    clean_text = re.sub(r'\x1b\[[0-9;]*m', '', str(text)) 
+    report_lines.append(clean_text)
+
+def status_tag(color_code):
+    """Plain-text marker so the saved report keeps the color meaning."""
+    if color_code == GREEN:
+        return "[OK]"
+    if color_code == YELLOW:
+        return "[WARN]"
+    if color_code == RED:
+        return "[ISSUE]"
+    return "[INFO]"
+
+# 8-band split used for the spectrum check
+BANDS = {
+    "Sub":       "lowpass=f=60",
+    "Bass":      "highpass=f=60,lowpass=f=125",
+    "LowMid":    "highpass=f=125,lowpass=f=250",
+    "Mid":       "highpass=f=250,lowpass=f=500",
+    "UpMid":     "highpass=f=500,lowpass=f=2000",
+    "Pres":      "highpass=f=2000,lowpass=f=4000",
+    "Treble":    "highpass=f=4000,lowpass=f=8000",
+    "Air":       "highpass=f=8000"
+}
+
+# X-Ray band edges (Hz), same splits as BANDS
+XRAY_EDGES = [("Sub", 0, 60), ("Bass", 60, 125), ("LowMid", 125, 250), ("Mid", 250, 500),
+              ("UpMid", 500, 2000), ("Pres", 2000, 4000), ("Treble", 4000, 8000), ("Air", 8000, None)]
+MONO_BASS_HZ = 120
+CORR_WINDOW = 0.1  # seconds per point on the correlation curve
+# Reference fingerprints: 1/6-octave bands from 20 Hz, compared up to FP_MATCH_MAX_HZ
+FP_CENTERS = [20.0 * 2 ** (k / 6) for k in range(60)]
+FP_MATCH_MAX_HZ = 16000
+FP_MATCH_BANDS = sum(1 for c in FP_CENTERS if c <= FP_MATCH_MAX_HZ)
+LIBRARY_FILE = "fingerprints.json"
+
+def read_wav_stream_header(stream):
+    """Skip a WAV header on a pipe (the data size is unknown) -> (sample rate, channels)."""
+    if stream.read(12)[8:12] != b"WAVE":
+        raise ValueError("not a WAV stream")
+    rate = channels = None
+    while True:
+        head = stream.read(8)
+        if len(head) < 8:
+            raise ValueError("no data chunk in WAV stream")
+        chunk_id, size = head[:4], int.from_bytes(head[4:], "little")
+        if chunk_id == b"data":
+            return rate, channels
+        body = stream.read(size + (size & 1))
+        if chunk_id == b"fmt ":
+            channels = int.from_bytes(body[2:4], "little")
+            rate = int.from_bytes(body[4:8], "little")
+
+def band_matrix(n, rate, edges):
+    """0/1 matrix (len(edges) x rfft bins) that sums FFT power into [lo, hi) Hz bands."""
+    freqs = np.fft.rfftfreq(n, 1.0 / rate)
+    return np.array([(freqs >= lo) & (freqs < (hi or rate)) for lo, hi in edges], dtype=np.float64)
+
+class MidSideXRay:
+    """Mid/Side X-Ray, fed 1 s stereo chunks by tap_stream().
+
+    Writes <stem>_MID.wav / <stem>_SIDE.wav and <stem>_CORRELATION.csv as the
+    audio arrives, and sums per-band mid/side energy, so memory stays flat no
+    matter how long the track is.
+    """
+    key = "XRay"
+
+    def __init__(self, file_path, out_dir):
+        self.mid_file = out_dir / f"{file_path.stem}_MID.wav"
+        self.side_file = out_dir / f"{file_path.stem}_SIDE.wav"
+        self.corr_file = out_dir / f"{file_path.stem}_CORRELATION.csv"
+        self._band_masks = {}
+
+    def _masks(self, n):
+        if n not in self._band_masks:
+            edges = [(lo, hi) for _, lo, hi in XRAY_EDGES] + [(0, MONO_BASS_HZ)]
+            self._band_masks[n] = band_matrix(n, self.rate, edges)
+        return self._band_masks[n]
+
+    @staticmethod
+    def _pcm16(x):
+        return (np.clip(x, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+    def start(self, rate):
+        self.rate = rate
+        self.win = max(1, int(rate * CORR_WINDOW))
+        self.mid_energy = np.zeros(len(XRAY_EDGES) + 1)
+        self.side_energy = np.zeros(len(XRAY_EDGES) + 1)
+        self.correlations = []
+        self.mid_wav = wave.open(str(self.mid_file), "wb")
+        self.side_wav = wave.open(str(self.side_file), "wb")
+        for w in (self.mid_wav, self.side_wav):
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+        self.corr_csv = open(self.corr_file, "w", encoding="utf-8")
+        self.corr_csv.write("time_s,correlation\n")
+
+    def feed(self, left, right, offset):
+        n = len(left)
+        mid = 0.5 * (left + right)
+        side = 0.5 * (left - right)
+        self.mid_wav.writeframes(self._pcm16(mid))
+        self.side_wav.writeframes(self._pcm16(side))
+
+        masks = self._masks(n)
+        self.mid_energy += masks @ (np.abs(np.fft.rfft(mid)) ** 2)
+        self.side_energy += masks @ (np.abs(np.fft.rfft(side)) ** 2)
+
+        # Correlation per window: +1 = mono, 0 = unrelated, -1 = out of phase
+        starts = np.arange(0, n, self.win)
+        lr_sum = np.add.reduceat(left * right, starts)
+        ll_sum = np.add.reduceat(left * left, starts)
+        rr_sum = np.add.reduceat(right * right, starts)
+        denom = np.sqrt(ll_sum * rr_sum)
+        for start, num, den in zip(starts, lr_sum, denom):
+            if den > 1e-9:  # skip silence
+                corr = float(num / den)
+                self.correlations.append(corr)
+                self.corr_csv.write(f"{(offset + start) / self.rate:.2f},{corr:.4f}\n")
+
+    def close(self):
+        for f in (self.mid_wav, self.side_wav, self.corr_csv):
+            f.close()
+
+    def finish(self, frames):
+        def ratio_db(side_e, mid_e):
+            # Floor at -60 dB so dual-mono tracks read as "no side" instead of float noise
+            return 10 * math.log10(max(side_e, mid_e * 1e-6, 1e-12) / max(mid_e, 1e-12))
+
+        corr = np.array(self.correlations) if self.correlations else np.ones(1)
+        return {
+            "BandSide": {name: ratio_db(self.side_energy[i], self.mid_energy[i])
+                         for i, (name, _, _) in enumerate(XRAY_EDGES)},
+            "LowSide": ratio_db(self.side_energy[-1], self.mid_energy[-1]),
+            "CorrMean": float(corr.mean()),
+            "CorrMin": float(corr.min()),
+            "CorrNegPct": float((corr < 0).mean() * 100),
+            "Seconds": frames / self.rate,
+        }
+
+class SpectrumFingerprint:
+    """1/6-octave long-term average spectrum (dB) of the mid signal, fed by tap_stream()."""
+    key = "LTAS"
+
+    def __init__(self):
+        self._band_masks = {}
+
+    def start(self, rate):
+        self.rate = rate
+        self.power = np.zeros(len(FP_CENTERS))
+        self.frames = 0
+
+    def feed(self, left, right, offset):
+        n = len(left)
+        if n not in self._band_masks:
+            edges = [(c * 2 ** (-1 / 12), c * 2 ** (1 / 12)) for c in FP_CENTERS]
+            masks = band_matrix(n, self.rate, edges)
+            # Mean power per bin, so narrow and wide bands are comparable
+            self._band_masks[n] = masks / np.maximum(masks.sum(axis=1, keepdims=True), 1)
+        spectrum = np.abs(np.fft.rfft(0.5 * (left + right))) ** 2 / n
+        self.power += self._band_masks[n] @ spectrum * n
+        self.frames += n
+
+    def close(self):
+        pass
+
+    def finish(self, frames):
+        level = 10 * np.log10(np.maximum(self.power / max(self.frames, 1), 1e-12))
+        return [round(float(v), 1) for v in level]
+
+def tap_stream(stream, processors):
+    """Feed a stereo float32 WAV stream to each processor in 1 s chunks -> {processor.key: result}."""
+    rate, channels = read_wav_stream_header(stream)
+    if channels != 2:
+        raise ValueError(f"expected a stereo stream, got {channels} channel(s)")
+    for p in processors:
+        p.start(rate)
+    frames = 0
+    try:
+        while True:
+            data = stream.read(rate * 8)
+            n = len(data) // 8
+            if n == 0:
+                break
+            lr = np.frombuffer(data[:n * 8], dtype="<f4").reshape(-1, 2).astype(np.float64)
+            for p in processors:
+                p.feed(lr[:, 0], lr[:, 1], frames)
+            frames += n
+    finally:
+        for p in processors:
+            p.close()
+    return {p.key: p.finish(frames) for p in processors}
+
+def parse_ebur128_summaries(output):
+    """Summary of every named ebur128@<name> instance -> {name: {"I", "Thresh", "LRA", "TP"}}."""
+    results = {}
+    pattern = r"\[ebur128@(\w+) @ [^\]]*\] Summary:(.*?)Peak:\s+([-\d\.]+|-inf)"
+    for name, block, peak in re.findall(pattern, output, re.S):
+        i_match = re.search(r"I:\s+([-\d\.]+)", block)
+        thresh = re.search(r"Threshold:\s+([-\d\.]+)", block)
+        lra = re.search(r"LRA:\s+([-\d\.]+)", block)
+        results[name] = {
+            "I": float(i_match.group(1)) if i_match else -99.0,
+            "Thresh": float(thresh.group(1)) if thresh else -70.0,
+            "LRA": float(lra.group(1)) if lra else 0.0,
+            "TP": float(peak) if peak != "-inf" else -99.0,
+        }
+    return results
+
+def measure_track(file_path, spectrum_only=False, xray_dir=None, fingerprint=False):
+    """All report measurements from a single decode.
+
+    One filter graph splits the audio into the main ebur128 meter (integrated
+    loudness, gating threshold, LRA, true peak), one meter per band and the
+    phase meter, instead of running ffmpeg ten times per track. With xray_dir
+    and/or fingerprint the same decode also feeds MidSideXRay /
+    SpectrumFingerprint (NumPy) through an extra pipe.
+    """
+    names = list(BANDS)
+    labels = [f"[b{i}]" for i in range(len(names))]
+    chains = [f"[b{i}]{BANDS[name]},ebur128@{name}=peak=true,anullsink" for i, name in enumerate(names)]
+    if not spectrum_only:
+        labels += ["[m]", "[p]"]
+        chains.append("[m]ebur128@main=peak=true,anullsink")
+        chains.append("[p]aphasemeter=video=0,ametadata=mode=print:key=lavfi.aphasemeter.phase:file=-,anullsink")
+    processors = []
+    if not spectrum_only and NUMPY_AVAIL:
+        if xray_dir is not None:
+            processors.append(MidSideXRay(file_path, xray_dir))
+        if fingerprint:
+            processors.append(SpectrumFingerprint())
+    if processors:
+        labels.append("[x]")
+        chains.append("[x]aformat=sample_fmts=flt:channel_layouts=stereo[tap]")
+    graph = f"[0:a]asplit={len(labels) + 1}{''.join(labels)}[out];" + ";".join(chains)
+    cmd = [
+        "ffmpeg", "-nostats", "-hide_banner", "-i", str(file_path),
+        "-filter_complex", graph, "-map", "[out]", "-f", "null", "-"
+    ]
+    tapped = {}
+    if processors:
+        read_fd, write_fd = os.pipe()
+        cmd += ["-map", "[tap]", "-c:a", "pcm_f32le", "-f", "wav", f"pipe:{write_fd}"]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=(write_fd,),
+                                text=True, encoding='utf-8', errors='replace')
+        os.close(write_fd)
+        # Drain ffmpeg's logs in the background while the processors consume the audio pipe
+        outputs = {}
+        drain = threading.Thread(target=lambda: outputs.update(zip(("stdout", "stderr"), proc.communicate())))
+        drain.start()
+        with os.fdopen(read_fd, "rb") as stream:
+            try:
+                tapped = tap_stream(stream, processors)
+            except (ValueError, OSError) as e:
+                tapped = {p.key: {"Error": str(e)} for p in processors}
+                stream.read()  # let ffmpeg finish the meters
+        drain.join()
+        result = subprocess.CompletedProcess(cmd, proc.returncode, outputs.get("stdout", ""), outputs.get("stderr", ""))
+    else:
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    summaries = parse_ebur128_summaries(result.stderr)
+    stats = {"Spectrum": {name: summaries.get(name, {}).get("I", -99.0) for name in names}}
+    if spectrum_only:
+        return stats
+
+    main = summaries.get("main")
+    if not main:
+        raise ValueError("Analysis Failed")
+    phases = [float(v) for v in re.findall(r"lavfi\.aphasemeter\.phase=([-\d\.]+)", result.stdout)]
+    # Per-100 ms meter lines: M = 400 ms gating block loudness, S = 3 s short-term (kept for the album summary)
+    blocks = re.findall(r"\[ebur128@main @ [^\]]*\] t:[^\n]*?M:\s*([-\d\.]+) S:\s*([-\d\.]+)", result.stderr)
+    stats.update({
+        "LUFS": main["I"],
+        "TP": main["TP"],
+        "LRA": main["LRA"],
+        "Thresh": main["Thresh"],
+        # Range: +1 (Mono) to 0 (Wide) to -1 (Out of Phase); default to perfect if unmeasured
+        "Phase": sum(phases) / len(phases) if phases else 1.0,
+        "Blocks": [float(m) for m, _ in blocks],
+        "ShortTerm": [float(st) for _, st in blocks],
+    })
+    stats.update(tapped)
+    return stats
+
+def power_mean_lufs(values):
+    return 10 * math.log10(sum(10 ** (v / 10) for v in values) / len(values))
+
+def gated_loudness(blocks):
+    """BS.1770 integrated loudness from 400 ms block loudnesses (-70 LUFS absolute, -10 LU relative gate)."""
+    above = [b for b in blocks if b > -70.0]
+    if not above:
+        return -70.0
+    relative_gate = power_mean_lufs(above) - 10.0
+    gated = [b for b in above if b > relative_gate]
+    return power_mean_lufs(gated) if gated else -70.0
+
+def loudness_range(short_term):
+    """EBU Tech 3342 LRA from 3 s short-term loudnesses (-20 LU relative gate, 10th-95th percentile)."""
+    above = [v for v in short_term if v > -70.0]
+    if not above:
+        return 0.0
+    relative_gate = power_mean_lufs(above) - 20.0
+    gated = sorted(v for v in above if v > relative_gate)
+    if len(gated) < 2:
+        return 0.0
+    pick = lambda q: gated[min(len(gated) - 1, int(round(q * (len(gated) - 1))))]
+    return pick(0.95) - pick(0.10)
+
+def get_main_stats(file_path):
+    return measure_track(file_path)
+
+def get_spectrum(file_path):
+    return measure_track(file_path, spectrum_only=True)["Spectrum"]
+
+def analyze_and_report(file_path, ref_spec=None, ref_name="", options=None, out_dir=None, stats=None):
     filename = file_path.name
     is_mp3 = file_path.suffix.lower() == ".mp3"
 
-    stats = get_main_stats(file_path)
-    spec = get_spectrum(file_path)
+    if stats is None:
+        try:
+            stats = get_main_stats(file_path)
+        except ValueError:
+            log(f"[ERR] {filename}: Analysis Failed", RED)
+            return
+    spec = stats["Spectrum"]
 
     cur_lufs = stats["LUFS"]
     cur_tp = stats["TP"]
@@ -161,43 +570,48 @@ def analyze_and_report(file_path, ref_spec=None, ref_name="", options=None, out_
 
     if options:
         if getattr(options, "plot", False):
-            generate_plot(spec, ref_spec, file_path.stem, out_dir or OUTPUT_DIR_BASE)
+            plot_jobs.append(plot_job(file_path, stats, ref_spec))
         if getattr(options, "xray", False):
-            run_mid_side_extraction(file_path, out_dir or OUTPUT_DIR_BASE)
-        if getattr(options, "master", False):
-            run_auto_master(file_path, out_dir or OUTPUT_DIR_BASE)
+            if "XRay" in stats:
+                report_xray(file_path, stats["XRay"])
+            else:
+                run_mid_side_extraction(file_path, out_dir or OUTPUT_DIR_BASE)
+
+def plot_job(file_path, stats, ref_spec):
+    """Everything mastering_plots needs for one track (plain data, so it can go to a worker process)."""
+    return {
+        "name": file_path.stem,
+        "spectrum": stats["Spectrum"],
+        "ref_spec": ref_spec,
+        "momentary": stats.get("Blocks", []),
+        "short_term": stats.get("ShortTerm", []),
+        "target_lufs": TEMPLATE_TARGET_LUFS,
+    }
 
-def generate_plot(target_spec, ref_spec, filename, out_dir):
-    if not MATPLOTLIB_AVAIL:
+def report_xray(file_path, xray):
+    """Log the Mid/Side X-Ray measured during analysis (see MidSideXRay)."""
+    log("   [X-RAY] Mid/Side layers (from the analysis decode):", MAGENTA)
+    if "Error" in xray:
+        log(f"     └─ [ERR] X-Ray failed: {xray['Error']}", RED)
         return
+    notes = [f"{name} {db:+.0f}" for name, db in xray["BandSide"].items()]
+    log(f"     Side vs Mid (dB): {' | '.join(notes[:4])}", RESET)
+    log(f"                       {' | '.join(notes[4:])}", RESET)
+
+    low = xray["LowSide"]
+    if low <= -20:
+        low_color, low_msg = GREEN, "mono-safe"
+    elif low <= -10:
+        low_color, low_msg = YELLOW, "some stereo bass; check on mono/club systems"
+    else:
+        low_color, low_msg = RED, f"wide bass, mono the low end below {MONO_BASS_HZ} Hz"
+    log(f"     {status_tag(low_color)} Side below {MONO_BASS_HZ} Hz: {low:+.1f} dB vs mid ({low_msg})", low_color)
 
-    bands = ["Sub", "Bass", "LowMid", "Mid", "UpMid", "Pres", "Treble", "Air"]
-    t_vals = [target_spec.get(b, 0.0) for b in bands]
-
-    plt.style.use('dark_background')
-    fig, ax = plt.subplots(figsize=(10, 6))
-    fig.patch.set_facecolor('black')
-    ax.set_facecolor('black')
-
-    ax.plot(bands, t_vals, label='Track', color='white', linewidth=2.4, marker='o', markersize=4)
-    if ref_spec:
-        r_vals = [ref_spec.get(b, 0.0) for b in bands]
-        ax.plot(bands, r_vals, label='Reference', color='#9b59b6', linestyle='--', linewidth=2)
-        ax.fill_between(bands, t_vals, r_vals, alpha=0.15, color='#8e44ad')
-
-    ax.set_title(f"Spectrum: {filename}", color='white', fontsize=12, fontweight='bold')
-    ax.set_ylabel("RMS Energy (dBFS)", color='gray')
-    ax.grid(True, color='#8e44ad', alpha=0.2)
-
-    legend = ax.legend(frameon=True, facecolor='black', edgecolor='#8e44ad')
-    for text in legend.get_texts():
-        text.set_color("white")
-
-    out_path = out_dir / f"{filename}_spectrum.png"
-    plt.savefig(out_path, dpi=100, bbox_inches='tight')
-    plt.close()
-    log(f"   [GRAPH] Saved visual report: {out_path.name}", MAGENTA)
-
+    corr_color = GREEN if xray["CorrMin"] >= 0 else YELLOW if xray["CorrNegPct"] < 5 else RED
+    log(f"     {status_tag(corr_color)} Correlation: mean {xray['CorrMean']:+.2f}, min {xray['CorrMin']:+.2f}, "
+        f"{xray['CorrNegPct']:.0f}% of time below 0", corr_color)
+    log(f"     └─ [OK] Created {file_path.stem}_MID.wav, {file_path.stem}_SIDE.wav & {file_path.stem}_CORRELATION.csv",
+        GREEN)
 
 def run_mid_side_extraction(file_path, out_dir):
     mid_file = out_dir / f"{file_path.stem}_MID.wav"
@@ -217,240 +631,299 @@ def run_mid_side_extraction(file_path, out_dir):
         log(f"     └─ [ERR] X-Ray failed: {e}", RED)
 
 
-def run_auto_master(file_path, out_dir):
-    out_file = out_dir / f"{file_path.stem}_MASTERED.wav"
-    log(f"   [MASTER] Processing to {TEMPLATE_TARGET_LUFS} LUFS...", MAGENTA)
+def loudnorm_filter(stats, target_lufs, target_tp):
+    """Second-pass loudnorm fed with the measurements the report already made.
+
+    With measured_* values loudnorm skips its own analysis and, when the gain
+    fits under the true-peak target, applies one linear gain to the whole
+    track instead of riding the level dynamically.
+    """
+    # Linear mode needs the target LRA to be at least the measured one, and
+    # treats measured_LRA=0 as "not measured", hence the 0.1 floor below
+    target_lra = min(50.0, max(11.0, math.ceil(stats["LRA"])))
+    clamp = lambda v, lo, hi: min(hi, max(lo, v))
+    return (
+        f"loudnorm=I={target_lufs}:TP={target_tp}:LRA={target_lra}"
+        f":measured_I={clamp(stats['LUFS'], -99.0, 0.0)}:measured_TP={clamp(stats['TP'], -99.0, 99.0)}"
+        f":measured_LRA={clamp(stats['LRA'], 0.1, 99.0)}:measured_thresh={clamp(stats['Thresh'], -99.0, 0.0)}"
+        f":offset=0:linear=true:print_format=summary"
+    )
 
+def run_auto_master(file_path, out_dir, stats, target_lufs=None, target_tp=None):
+    """Render <name>_MASTERED.wav; returns (out_file, normalization type, error or None).
+
+    Doesn't log, so several tracks can be mastered at once.
+    """
+    target_lufs = TEMPLATE_TARGET_LUFS if target_lufs is None else target_lufs
+    target_tp = TEMPLATE_TARGET_TP if target_tp is None else target_tp
+    out_file = out_dir / f"{file_path.stem}_MASTERED.wav"
     cmd = [
-        "ffmpeg", "-y", "-i", str(file_path),
-        "-af", f"loudnorm=I={TEMPLATE_TARGET_LUFS}:TP={TEMPLATE_TARGET_TP}:LRA=11:print_format=summary",
+        "ffmpeg", "-y", "-nostats", "-hide_banner", "-i", str(file_path),
+        "-af", loudnorm_filter(stats, target_lufs, target_tp),
         "-ar", "48000", "-c:a", "pcm_s24le",
         "-metadata", "comment=Mastered via ardour_fixer",
         str(out_file)
     ]
-    try:
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        log(f"     └─ [OK] Exported: {out_file.name}", GREEN)
-    except Exception as e:
-        log(f"     └─ [ERR] Mastering failed: {e}", RED)
-
-def get_ffmpeg_value(cmd):
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
-        output = result.stderr
-        i_matches = re.findall(r"I:\s+([-\d\.]+)", output)
-        if i_matches:
-            return float(i_matches[-1])
-        return -99.0 
-    except Exception:
-        return -99.0
-
-def get_phase_correlation(file_path):
-    """Checks for phase issues using aphasemeter."""
-    # We parse the mean phase correlation from the output
-    cmd = [
-        "ffmpeg", "-nostats", "-i", str(file_path),
-        "-filter_complex", "aphasemeter=video=0", "-f", "null", "-"
-    ]
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
-        output = result.stderr
-        # Look for "mean_phase" in the output line (often near end)
-        # Output format example: "mean_phase: 0.854321"
-        match = re.search(r"mean_phase:\s+([-\d\.]+)", output)
-        if match:
-            return float(match.group(1))
-        return 1.0 # Default to perfect if failed
-    except Exception:
-        return 1.0
-
-def analyze_8_bands(file_path):
-    bands = {
-        "Sub":       "lowpass=f=60",
-        "Bass":      "highpass=f=60,lowpass=f=125",
-        "LowMid":    "highpass=f=125,lowpass=f=250",
-        "Mid":       "highpass=f=250,lowpass=f=500",
-        "UpMid":     "highpass=f=500,lowpass=f=2000",
-        "Pres":      "highpass=f=2000,lowpass=f=4000",
-        "Treble":    "highpass=f=4000,lowpass=f=8000",
-        "Air":       "highpass=f=8000"
-    }
-    results = {}
-    for name, filter_str in bands.items():
-        cmd = [
-            "ffmpeg", "-nostats", "-i", str(file_path),
-            "-filter_complex", f"{filter_str},ebur128=peak=true", "-f", "null", "-"
-        ]
-        results[name] = get_ffmpeg_value(cmd)
-    return results
-
-def analyze_and_report(file_path):
-    filename = file_path.name
-    is_mp3 = file_path.suffix.lower() == ".mp3"
-    
-    # 1. Main Analysis
-    cmd_main = [
-        "ffmpeg", "-nostats", "-i", str(file_path),
-        "-filter_complex", "ebur128=peak=true", "-f", "null", "-"
-    ]
-    try:
-        result = subprocess.run(cmd_main, capture_output=True, text=True, encoding='utf-8', errors='replace')
-        output = result.stderr
-        i_matches = re.findall(r"I:\s+([-\d\.]+)", output)
-        tp_matches = re.findall(r"(?:TP|Peak):\s+([-\d\.]+)", output)
-        
-        if not i_matches: raise ValueError("Analysis Failed")
-        cur_lufs = float(i_matches[-1])
-        cur_tp = float(tp_matches[-1])
-    except Exception:
-        log(f"[ERR] {filename}: Analysis Failed", RED)
-        return
-
-    # 2. 8-Band Spectrum
-    spec = analyze_8_bands(file_path)
-    
-    # 3. Phase Analysis
-    phase = get_phase_correlation(file_path)
-
-    # --- CALCULATIONS ---
-    lufs_diff = TEMPLATE_TARGET_LUFS - cur_lufs
-    rec_lsp_input = KNOB_LSP_INPUT + lufs_diff
-    rec_calf_thresh = KNOB_CALF_THRESH - lufs_diff
-    
-    projected_peak = cur_tp + lufs_diff
-    limiter_load = 0.0
-    if projected_peak > KNOB_LOUDMAX_THRESH:
-        limiter_load = projected_peak - KNOB_LOUDMAX_THRESH
-
-    # --- COLOR LOGIC ---
-    
-    # LUFS (Strict -14 to -15)
-    if -15.0 <= cur_lufs <= -14.0:
-        lufs_color = GREEN
-    elif abs(cur_lufs - TEMPLATE_TARGET_LUFS) < 2.5:
-        lufs_color = YELLOW
-    else:
-        lufs_color = RED
-
-    # Dynamics
-    crest_factor = cur_tp - cur_lufs
-    dr_msg = f"{crest_factor:.1f}"
-    if crest_factor < MIN_DYNAMIC_RANGE:
-        dr_color = RED
-    elif crest_factor < 11.0:
-        dr_color = YELLOW
-    else:
-        dr_color = GREEN
-
-    # Phase Color & Msg
-    # Range: +1 (Mono) to 0 (Wide) to -1 (Out of Phase)
-    phase_msg = f"{phase:.2f}"
-    phase_action = ""
-    if phase < 0:
-        phase_color = RED
-        phase_action = " [PHASE ISSUES: Narrow Width!]"
-    elif phase < 0.3:
-        phase_color = YELLOW
-        phase_action = " [Very Wide: Check Mono]"
-    else:
-        phase_color = GREEN
-        phase_action = ""
+    except OSError as e:
+        return out_file, None, str(e)
+    if result.returncode != 0:
+        return out_file, None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "ffmpeg failed"
+    match = re.search(r"Normalization Type:\s+(\w+)", result.stderr)
+    return out_file, match.group(1) if match else None, None
+
+def album_report(tracks):
+    """Album loudness and consistency from the block data already measured; returns the album gain (dB)."""
+    all_blocks = [b for _, stats in tracks for b in stats["Blocks"]]
+    all_short = [v for _, stats in tracks for v in stats["ShortTerm"]]
+    album_lufs = gated_loudness(all_blocks)
+    album_lra = loudness_range(all_short)
+    album_gain = TEMPLATE_TARGET_LUFS - album_lufs
+    levels = [stats["LUFS"] for _, stats in tracks]
+    mean_level = sum(levels) / len(levels)
+    spread = max(levels) - min(levels)
+    std_dev = math.sqrt(sum((v - mean_level) ** 2 for v in levels) / len(levels))
 
-    # --- EQ LOGIC ---
-    eq_notes = []
-    
-    if spec["LowMid"] > spec["Bass"]:
-        diff = spec["LowMid"] - spec["Bass"]
-        eq_notes.append(f"Cut 200Hz -{diff:.1f}dB (Mud)")
-    if spec["Mid"] > spec["UpMid"] + 3.0:
-        diff = spec["Mid"] - (spec["UpMid"] + 3.0)
-        eq_notes.append(f"Cut 400Hz -{diff:.1f}dB (Boxy)")
-    if spec["Sub"] > spec["Bass"] + 6.0:
-        diff = spec["Sub"] - (spec["Bass"] + 6.0)
-        eq_notes.append(f"Cut 40Hz -{diff:.1f}dB (Boomy)")
-    if spec["Pres"] > spec["UpMid"] + 2.0:
-        diff = spec["Pres"] - (spec["UpMid"] + 2.0)
-        eq_notes.append(f"Cut 3kHz -{diff:.1f}dB (Bite)")
-    if spec["Air"] < spec["Treble"] - 12.0:
-        diff = (spec["Treble"] - 12.0) - spec["Air"]
-        eq_notes.append(f"Boost 10kHz+ +{diff:.1f}dB (Dull)")
-    elif spec["Air"] > spec["Treble"]:
-        diff = spec["Air"] - spec["Treble"]
-        eq_notes.append(f"Cut 12kHz -{diff:.1f}dB (Hiss)")
-
-    if eq_notes:
-        eq_action = " | ".join(eq_notes)
-        eq_color = YELLOW
-    else:
-        eq_action = "Balanced (Leave EQ Flat)"
-        eq_color = GREEN
-
-    # --- PLUGIN LOGIC ---
-    saturator_msg = "OFF"
-    sat_color = CYAN
-    if limiter_load > 2.0:
-        saturator_msg = "ON (Drive ~2.0)"
-        sat_color = RED
-    elif limiter_load > 1.0:
-        saturator_msg = "Optional"
-        sat_color = YELLOW
-
-    limit_msg = "Clean"
-    limit_color = GREEN
-    if limiter_load > 0:
-        limit_color = RED if limiter_load > 2.0 else YELLOW
-        limit_msg = f"-{limiter_load:<4.1f} dB"
-
-    # --- REPORT ---
+    log("=" * 60)
+    log(f"ALBUM SUMMARY ({len(tracks)} tracks)", CYAN)
+    spread_color = GREEN if spread <= 3.0 else YELLOW if spread <= 6.0 else RED
+    log(f"   Album loudness: {album_lufs:.1f} LUFS (gated over all tracks) | Album LRA: {album_lra:.1f} LU")
+    log(f"   {status_tag(spread_color)} Track spread: {spread:.1f} LU (std dev {std_dev:.1f} LU)", spread_color)
+    log(f"   Album gain to {TEMPLATE_TARGET_LUFS} LUFS: {album_gain:+.1f} dB on every track "
+        f"(keeps the loudness differences between songs)", CYAN)
+
+    log(f"   {'TRACK':<28} {'LUFS':>6} {'vs ALBUM':>9} {'GAIN':>6} {'PEAK AFTER':>11}", CYAN)
+    for file_path, stats in tracks:
+        rel = stats["LUFS"] - album_lufs
+        peak_after = stats["TP"] + album_gain
+        color = GREEN
+        note = ""
+        if peak_after > TEMPLATE_TARGET_TP:
+            color = YELLOW
+            note = f"  limiter ~{peak_after - TEMPLATE_TARGET_TP:.1f} dB"
+        if abs(rel) > 4.0:
+            color = RED
+            note += f"  outlier: consider {-(abs(rel) - 4.0) * (1 if rel > 0 else -1):+.1f} dB trim"
+        log(f"   {status_tag(color)} {file_path.name[:24]:<24} {stats['LUFS']:>6.1f} {rel:>+8.1f} "
+            f"{album_gain:>+6.1f} {peak_after:>+9.1f} dB{note}", color)
+
+    # Tonal consistency: each band relative to its track's loudness, compared with the album average
+    bands = list(BANDS)
+    shapes = [{b: stats["Spectrum"][b] - stats["LUFS"] for b in bands} for _, stats in tracks]
+    album_shape = {b: sum(shape[b] for shape in shapes) / len(shapes) for b in bands}
+    log("   TONAL CONSISTENCY (band level vs album average):", CYAN)
+    consistent = True
+    for (file_path, _), shape in zip(tracks, shapes):
+        devs = [(b, shape[b] - album_shape[b]) for b in bands if abs(shape[b] - album_shape[b]) > 3.0]
+        if devs:
+            consistent = False
+            notes = " | ".join(f"{b} {d:+.1f}dB" for b, d in devs)
+            log(f"   {status_tag(YELLOW)} {file_path.name[:24]:<24} {notes}", YELLOW)
+    if consistent:
+        log(f"   {status_tag(GREEN)} All tracks within 3 dB of the album's tonal balance", GREEN)
+    return album_gain
+
+def master_tracks(tracks, out_dir, jobs, album_gain=None):
+    """Master (file, stats) pairs in parallel and log the results in order.
+
+    With album_gain every track gets that same gain (album mode) instead of
+    being normalized to the target on its own, except where that would leave
+    loudnorm's target range (see LOUDNORM_I_RANGE).
+    """
     log("-" * 60)
-    log(f"SONG: {filename:<30}", CYAN)
+    mode_msg = f"album gain {album_gain:+.1f} dB" if album_gain is not None else f"{TEMPLATE_TARGET_LUFS} LUFS"
+    log(f"[MASTER] Two-pass loudnorm to {mode_msg} / {TEMPLATE_TARGET_TP} dBTP "
+        f"({len(tracks)} track(s), {jobs} at a time)", MAGENTA)
+
+    targets = []
+    for file_path, stats in tracks:
+        target = None
+        if album_gain is not None:
+            wanted = stats["LUFS"] + album_gain
+            low, high = LOUDNORM_I_RANGE
+            target = min(high, max(low, wanted))
+            if target != wanted:
+                log(f"   ├─ [WARN] {file_path.name}: album gain would put it at {wanted:.1f} LUFS, "
+                    f"outside loudnorm's {low:.0f}..{high:.0f} range; mastering to {target:.1f} LUFS "
+                    f"({target - stats['LUFS']:+.1f} dB) instead", YELLOW)
+        targets.append(target)
+
+    def master(job):
+        (file_path, stats), target = job
+        return run_auto_master(file_path, out_dir, stats, target_lufs=target)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(master, zip(tracks, targets)))
+    for (file_path, stats), target, (out_file, mode, error) in zip(tracks, targets, results):
+        if error:
+            log(f"   └─ [ERR] {file_path.name}: Mastering failed: {error}", RED)
+        elif mode == "Dynamic":
+            log(f"   ├─ [WARN] {out_file.name}: peaks too hot for a clean gain change, "
+                f"loudnorm limited dynamically", YELLOW)
+        else:
+            gain = (target if target is not None else TEMPLATE_TARGET_LUFS) - stats["LUFS"]
+            log(f"   ├─ [OK] {out_file.name}: {gain:+.1f} dB linear gain", GREEN)
+
+def freq_label(hz):
+    return f"{hz:.0f}Hz" if hz < 1000 else f"{hz / 1000:.1f}kHz"
+
+class ReferenceLibrary:
+    """Reference fingerprints kept in <library>/fingerprints.json and matched with an in-memory NumPy index."""
+
+    def __init__(self, path):
+        path = Path(path).expanduser()
+        self.file = path if path.suffix == ".json" else path / LIBRARY_FILE
+        self.refs = {}
+        if self.file.exists():
+            with open(self.file, "r", encoding="utf-8") as f:
+                self.refs = json.load(f).get("refs", {})
+        self._index = None
+
+    def add(self, name, stats):
+        self.refs[name] = {
+            "LUFS": stats["LUFS"],
+            "TP": stats["TP"],
+            "LRA": stats["LRA"],
+            "Crest": round(stats["TP"] - stats["LUFS"], 1),
+            "Spectrum": stats["Spectrum"],
+            "LTAS": stats["LTAS"],
+        }
+        self._index = None
+
+    def remove(self, name):
+        self._index = None
+        return self.refs.pop(name, None) is not None
+
+    def save(self):
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": 1, "centers_hz": [round(c, 1) for c in FP_CENTERS], "refs": self.refs}
+        with open(self.file, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    def _build(self):
+        # Tonal shape only: each fingerprint minus its own mean level
+        names = sorted(self.refs)
+        matrix = np.array([self.refs[n]["LTAS"][:FP_MATCH_BANDS] for n in names], dtype=np.float64)
+        self._index = (names, matrix - matrix.mean(axis=1, keepdims=True))
+
+    def nearest(self, ltas, count=3):
+        """Closest references by RMS dB difference of tonal shape -> [(name, distance_db, ref, shape_diff)]."""
+        if not self.refs:
+            return []
+        if self._index is None:
+            self._build()
+        names, shapes = self._index
+        shape = np.array(ltas[:FP_MATCH_BANDS], dtype=np.float64)
+        shape -= shape.mean()
+        diffs = shape - shapes
+        distances = np.sqrt((diffs ** 2).mean(axis=1))
+        return [(names[i], float(distances[i]), self.refs[names[i]], diffs[i])
+                for i in np.argsort(distances)[:count]]
+
+def report_library_matches(matches):
+    log("   REFERENCE LIBRARY (nearest tonal matches):", MAGENTA)
+    for name, distance, ref, _ in matches:
+        log(f"     {name[:28]:<28} {distance:4.1f} dB off | {ref['LUFS']:>5.1f} LUFS | Crest {ref['Crest']:>4.1f} dB "
+            f"| LRA {ref['LRA']:>4.1f} LU", RESET)
+    # Where the mix departs from the close matches on average, largest first
+    close = [d for _, distance, _, d in matches if distance <= matches[0][1] + 2.0]
+    diff = np.mean(close, axis=0)
+    notes = [f"{freq_label(FP_CENTERS[i])} {diff[i]:+.1f}dB" for i in np.argsort(-np.abs(diff))[:4] if abs(diff[i]) > 2.0]
+    if notes:
+        log(f"     {status_tag(YELLOW)} Mix vs matches: {' | '.join(notes)}", YELLOW)
+    else:
+        log(f"     {status_tag(GREEN)} Tonal shape within 2 dB of the matches (1/6 octave)", GREEN)
 
-    if is_mp3:
-        log("   [WARN] MP3 input detected; metering is slightly less precise than WAV.", YELLOW)
+def collect_audio_files(paths):
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files += sorted(list(p.glob("*.wav")) + list(p.glob("*.mp3")))
+        elif p.suffix.lower() in (".wav", ".mp3") and p.exists():
+            files.append(p)
+        else:
+            log(f"[WARN] Skipping {p} (not a WAV/MP3 file or folder)", YELLOW)
+    return files
+
+def ref_main(argv):
+    """ardour_fixer.py ref add|list|remove ... --library DIR"""
+    parser = argparse.ArgumentParser(prog="ardour_fixer.py ref", description="Manage a reference fingerprint library")
+    sub = parser.add_subparsers(dest="action", required=True)
+    add = sub.add_parser("add", help="Fingerprint reference tracks (files or folders) into the library")
+    add.add_argument("paths", nargs="+")
+    add.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Tracks to analyze at once")
+    sub.add_parser("list", help="List the references in the library")
+    remove = sub.add_parser("remove", help="Remove references by name")
+    remove.add_argument("names", nargs="+")
+    for p in sub.choices.values():
+        p.add_argument("--library", required=True, help="Library folder (or .json file), e.g. refs/rock")
+    args = parser.parse_args(argv)
+
+    library = ReferenceLibrary(args.library)
+    if args.action == "list":
+        if not library.refs:
+            log(f"No references in {library.file}", YELLOW)
+        for name, ref in sorted(library.refs.items()):
+            log(f"  {name[:40]:<40} {ref['LUFS']:>5.1f} LUFS | Crest {ref['Crest']:>4.1f} dB | LRA {ref['LRA']:>4.1f} LU")
+        return
+    if args.action == "remove":
+        for name in args.names:
+            if library.remove(name):
+                log(f"[OK] Removed {name}", GREEN)
+            else:
+                log(f"[WARN] Not in library: {name}", YELLOW)
+        library.save()
+        return
 
-    # Stats Line (Added Phase)
-    lufs_tag = status_tag(lufs_color)
-    dr_tag = status_tag(dr_color)
-    phase_tag = status_tag(phase_color)
-    lufs_str = f"{lufs_color}{lufs_tag} {cur_lufs:>5.1f} LUFS{RESET}"
-    dr_str = f"{dr_color}{dr_tag} {dr_msg:>4} dB{RESET}"
-    phase_str = f"{phase_color}{phase_tag} {phase_msg} {phase_action}{RESET}"
-    print(f"   STATS: {lufs_str} | Crest: {dr_str} | Phase: {phase_str}")
-    report_lines.append(f"   STATS: {lufs_tag} {cur_lufs:>5.1f} LUFS | Crest: {dr_tag} {dr_msg:>4} dB | Phase: {phase_tag} {phase_msg} {phase_action}")
+    if not NUMPY_AVAIL:
+        log("Error: reference fingerprints need NumPy (pip install numpy).", RED)
+        sys.exit(1)
+    files = collect_audio_files(args.paths)
+    if not files:
+        log("No .wav or .mp3 files found.", YELLOW)
+        return
 
-    # Spectrum Line
-    log(f"   SPECTRUM CHECK:", CYAN)
-    log(f"     Sub:{spec['Sub']:.0f} | Bass:{spec['Bass']:.0f} | LoMid:{spec['LowMid']:.0f} | Mid:{spec['Mid']:.0f}", RESET)
-    log(f"     UpMid:{spec['UpMid']:.0f} | Pres:{spec['Pres']:.0f} | Treb:{spec['Treble']:.0f} | Air:{spec['Air']:.0f}", RESET)
-    
-    # Recommendations with tags for color coding in saved report
-    log(f"   RECOMMENDATIONS:", CYAN)
-    lsp_tag = status_tag(lufs_color)
-    eq_tag = status_tag(eq_color)
-    sat_tag = status_tag(sat_color)
-    comp_tag = status_tag(YELLOW)
-    limit_tag = status_tag(limit_color)
-    log(f"   ├─ {lsp_tag} LSP Input Gain:    {rec_lsp_input:>5.1f} dB   (Set this knob)", GREEN)
-    log(f"   ├─ {eq_tag} Calf EQ Actions:   {eq_action}", eq_color)
-    log(f"   ├─ {sat_tag} Calf Saturator:    {saturator_msg}", sat_color)
-    log(f"   ├─ {comp_tag} Calf Comp Thresh:  {rec_calf_thresh:>5.1f} dB   (Targeting Peaks)", YELLOW)
-    log(f"   └─ {limit_tag} LoudMax GR:        {limit_msg}", limit_color)
+    def measure(file):
+        try:
+            return measure_track(file, fingerprint=True)
+        except ValueError:
+            return None
+    with ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(files)))) as pool:
+        measured = list(pool.map(measure, files))
+    for file, stats in zip(files, measured):
+        if stats is None or not isinstance(stats.get("LTAS"), list):
+            log(f"[ERR] {file.name}: Analysis Failed", RED)
+            continue
+        library.add(file.stem, stats)
+        log(f"[OK] {file.stem}: {stats['LUFS']:.1f} LUFS | Crest {stats['TP'] - stats['LUFS']:.1f} dB", GREEN)
+    library.save()
+    log(f"Library: {library.file} ({len(library.refs)} references)", CYAN)
 
 def main():
     global TEMPLATE_TARGET_LUFS, TEMPLATE_TARGET_TP, MIN_DYNAMIC_RANGE, OUTPUT_DIR_BASE, DEFAULT_DIR
 
+    if len(sys.argv) > 1 and sys.argv[1] == "ref":
+        return ref_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(description="Ardour Mastering Assistant 8-Band + Phase + LRA")
     parser.add_argument("directory", nargs="?", default=str(DEFAULT_DIR), help="WAV/MP3 folder (ignored if --file is used)")
     parser.add_argument("--file", dest="single_file", default=None, help="Analyze a single WAV or MP3 file (WAV recommended)")
     parser.add_argument("--ref", dest="ref_file", default=None, help="Reference WAV/MP3 to compare spectrum")
+    parser.add_argument("--ref-library", default=None,
+                        help="Reference library folder (see 'ref add'); compares each track with its nearest matches")
     parser.add_argument("--out", dest="out_dir", default=None, help="Report/output folder")
     parser.add_argument("--target-lufs", type=float, default=TEMPLATE_TARGET_LUFS, help="Target integrated LUFS (default -14.0)")
     parser.add_argument("--target-tp", type=float, default=TEMPLATE_TARGET_TP, help="Target true peak dBFS (default -1.0)")
     parser.add_argument("--platform", choices=PLATFORMS.keys(), default="custom", help="Use a platform preset for targets")
     parser.add_argument("--min-dr", type=float, default=MIN_DYNAMIC_RANGE, help="Minimum crest factor/dynamic range (default 9.0)")
-    parser.add_argument("--plot", action="store_true", help="Save PNG spectrum plot (requires matplotlib)")
+    parser.add_argument("--plot", action="store_true", help="Save a spectrum + loudness timeline plot per track")
+    parser.add_argument("--plot-format", choices=PLOT_FORMATS, default="svg",
+                        help="svg = built-in writer (default), png = matplotlib")
     parser.add_argument("--xray", action="store_true", help="Export Mid/Side diagnostic WAVs")
     parser.add_argument("--master", action="store_true", help="Auto-master to target (experimental)")
+    parser.add_argument("--album", action="store_true", help="With --master: one album gain for all tracks")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Tracks to analyze/master at once")
     args = parser.parse_args()
 
     if args.platform != "custom":
@@ -512,10 +985,67 @@ def main():
         else:
             log(f"[WARN] Reference not found: {ref_path}", YELLOW)
 
-    for file in files:
-        analyze_and_report(file, ref_spec=ref_spec, ref_name=ref_name, options=args, out_dir=OUTPUT_DIR_BASE)
+    library = None
+    if args.ref_library:
+        if not NUMPY_AVAIL:
+            log("[WARN] --ref-library needs NumPy (pip install numpy); skipping library matching.", YELLOW)
+        else:
+            library = ReferenceLibrary(args.ref_library)
+            if library.refs:
+                log(f"[REF] Library: {library.file} ({len(library.refs)} references)", MAGENTA)
+            else:
+                log(f"[WARN] No references in {library.file} (add some with 'ref add')", YELLOW)
+                library = None
 
     OUTPUT_DIR_BASE.mkdir(parents=True, exist_ok=True)
+
+    # Measure every track in parallel (one decode each), then report in folder order
+    jobs = max(1, min(args.jobs, len(files)))
+    xray_dir = OUTPUT_DIR_BASE if args.xray else None
+    def measure(file):
+        try:
+            return measure_track(file, xray_dir=xray_dir, fingerprint=library is not None)
+        except ValueError:
+            return None
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        measured = list(pool.map(measure, files))
+
+    to_master = []
+    for file, stats in zip(files, measured):
+        if stats is None:
+            log(f"[ERR] {file.name}: Analysis Failed", RED)
+            continue
+        matches = []
+        if library and isinstance(stats.get("LTAS"), list):
+            matches = library.nearest(stats["LTAS"])
+        track_ref_spec, track_ref_name = ref_spec, ref_name
+        if matches and not ref_spec:
+            # Without an explicit --ref, compare the 8 bands against the closest library match,
+            # level-matched to this mix: the match was picked on tonal shape, not loudness
+            match_name, _, match, _ = matches[0]
+            offset = stats["LUFS"] - match["LUFS"]
+            track_ref_spec = {b: level + offset for b, level in match["Spectrum"].items()}
+            track_ref_name = f"{match_name}, library"
+        analyze_and_report(file, ref_spec=track_ref_spec, ref_name=track_ref_name, options=args,
+                           out_dir=OUTPUT_DIR_BASE, stats=stats)
+        if matches:
+            report_library_matches(matches)
+        to_master.append((file, stats))
+
+    if plot_jobs:
+        for out_path, error in render_plots(plot_jobs, str(OUTPUT_DIR_BASE), args.plot_format, jobs):
+            if error:
+                log(f"[ERR] Plot {Path(out_path).name}: {error}", RED)
+            else:
+                log(f"[GRAPH] Saved visual report: {Path(out_path).name}", MAGENTA)
+
+    album_gain = None
+    if len(to_master) > 1:
+        album_gain = album_report(to_master)
+
+    if args.master and to_master:
+        master_tracks(to_master, OUTPUT_DIR_BASE, jobs, album_gain=album_gain if args.album else None)
+
     report_filename = f"mastering_report_{report_tag}.txt"
     final_report_path = OUTPUT_DIR_BASE / report_filename
 
@@ -131,6 +131,16 @@ get_python_viz_cmd(){
     return 1
 }
 
+# x264 arguments for a viz_master.py mode at $vid_width x $vid_height, from this
+# machine's calibrated encode profile (encode_tuner.py). Sets enc_args.
+viz_encode_args(){
+    local mode="$1"
+    local args
+    args=$(python3 "$SCRIPT_DIR/encode_tuner.py" args --mode "$mode" --width "$vid_width" --height "$vid_height" 2>/dev/null)
+    [[ -z "$args" ]] && args="-c:v libx264 -preset fast -crf 18"
+    read -ra enc_args <<< "$args"
+}
+
 # Upload a video (and optional captions) to YouTube using OAuth refresh token
 menu_youtube_upload(){
     clear
@@ -444,6 +454,7 @@ init_config(){
   },
   "advanced": {
     "ffmpeg_threads": 0,
+    "batch_jobs": 2,
     "temp_folder": "/tmp",
     "keep_temp_files": false,
     "verbose_logging": false
@@ -927,10 +938,12 @@ settings_advanced(){
     
     local threads=$(get_setting "advanced.ffmpeg_threads")
     local temp=$(get_setting "advanced.temp_folder")
+    local batch_jobs=$(get_setting "advanced.batch_jobs")
     local keep_temp=$(get_setting "advanced.keep_temp_files")
     local verbose=$(get_setting "advanced.verbose_logging")
     
     echo "FFmpeg threads: ${threads:-0 (auto)}"
+    echo "Social batch parallel encodes: ${batch_jobs:-2}"
     echo "Temp folder: ${temp:-/tmp}"
     echo "Keep temp files: ${keep_temp:-false}"
     echo "Verbose logging: ${verbose:-false}"
@@ -938,6 +951,9 @@ settings_advanced(){
     
     read -p "FFmpeg threads (0=auto): " new_threads
     [[ -n "$new_threads" ]] && set_setting "advanced.ffmpeg_threads" "$new_threads"
+
+    read -p "Parallel encodes for Social Media Batch [${batch_jobs:-2}]: " new_jobs
+    [[ "$new_jobs" =~ ^[0-9]+$ ]] && set_setting "advanced.batch_jobs" "$new_jobs"
     
     read -p "Temp folder path: " new_temp
     new_temp=$(clean_path_input "$new_temp")
@@ -1036,7 +1052,6 @@ menu_social_batch(){
         return
     fi
     # Ask for an input path and auto-detect whether it's a video, image or audio
-    tmp_input_video=""
     echo -e "${CYAN}Drag & drop the INPUT file (video OR image OR audio):${NC}"
     read -r raw_input
     inpath=$(clean_path_input "$raw_input")
@@ -1075,17 +1090,8 @@ menu_social_batch(){
             pause
             return
         fi
-
-        # create a temporary video from the image+audio
-        tmp_input_video=$(mktemp /tmp/supertool_input_XXXX.mp4)
-        echo -e "${PURPLE}Rendering temporary source video from image + audio...${NC}"
-        if ! ffmpeg -y -loop 1 -i "$img" -i "$audio" -c:v libx264 -tune stillimage -pix_fmt yuv420p -c:a aac -b:a 192k -shortest "$tmp_input_video" >/dev/null 2>&1; then
-            echo -e "${RED}Failed to build temporary source video.${NC}"
-            rm -f "$tmp_input_video" 2>/dev/null || true
-            pause
-            return
-        fi
-        input_file="$tmp_input_video"
+        # audio is decoded once and the image used as a looped frame by social_batch.py
+        source_args=(--audio "$audio" --image "$img")
         base_name="$(basename "${audio%.*}")"
 
     elif [[ "$input_kind" == "audio" ]]; then
@@ -1099,15 +1105,7 @@ menu_social_batch(){
             pause
             return
         fi
-        tmp_input_video=$(mktemp /tmp/supertool_input_XXXX.mp4)
-        echo -e "${PURPLE}Rendering temporary source video from image + audio...${NC}"
-        if ! ffmpeg -y -loop 1 -i "$img" -i "$audio" -c:v libx264 -tune stillimage -pix_fmt yuv420p -c:a aac -b:a 192k -shortest "$tmp_input_video" >/dev/null 2>&1; then
-            echo -e "${RED}Failed to build temporary source video.${NC}"
-            rm -f "$tmp_input_video" >/dev/null 2>&1 || true
-            pause
-            return
-        fi
-        input_file="$tmp_input_video"
+        source_args=(--audio "$audio" --image "$img")
         base_name="$(basename "${audio%.*}")"
 
     else
@@ -1118,6 +1116,7 @@ menu_social_batch(){
             pause
             return
         fi
+        source_args=(--video "$input_file")
         base_name="$(basename "${input_file%.*}")"
     fi
 
@@ -1142,16 +1141,18 @@ menu_social_batch(){
     read -p "Preset [2]: " preset_choice
     [[ -z "$preset_choice" ]] && preset_choice=2
 
-    # default values per preset (media-specific tunes)
+    # default values per preset (media-specific tunes, same as social_batch.py PRESETS)
     case $preset_choice in
         1)
+            preset_name="low"
             TOK_VBIT=2000k; TOK_A='copy'; TOK_EXTRA='-preset fast -crf 23'
             YT_CR=24; YT_A='-b:a 192k'; YT_PRESET='-preset fast -crf 24'
-            # note: no ffmpeg run here — just default preset values for META
+            X_VBIT=2000k; X_A='-b:a 160k'
             IG_VBIT=2000k; IG_A='-b:a 160k'; IG_PRESET='-preset medium -crf 22'
             META_VBIT=2000k; META_A='-b:a 192k'
             ;;
         3)
+            preset_name="high"
             TOK_VBIT=6000k; TOK_A='-b:a 320k'; TOK_EXTRA='-preset slow -crf 16'
             YT_CR=16; YT_A='-b:a 320k'; YT_PRESET='-preset slow -crf 16'
             X_VBIT=5500k; X_A='-b:a 160k'
@@ -1160,6 +1161,7 @@ menu_social_batch(){
             ;;
         2|*)
             # Medium defaults
+            preset_name="medium"
             TOK_VBIT=3500k; TOK_A='-b:a 192k'; TOK_EXTRA='-preset medium -crf 20'
             YT_CR=18; YT_A='-b:a 320k'; YT_PRESET='-preset medium -crf 18'
             X_VBIT=3500k; X_A='-b:a 160k'
@@ -1168,65 +1170,64 @@ menu_social_batch(){
             ;;
     esac
 
+    overrides=()
     if [[ "$preset_choice" == "4" ]]; then
         echo -e "${YELLOW}Custom mode: you can specify per-platform bitrate or CRF (press Enter to keep default).${NC}"
         read -p "TikTok video bitrate (e.g. 3500k) [${TOK_VBIT}]: " v
-        [[ -n "$v" ]] && TOK_VBIT="$v"
+        [[ -n "$v" ]] && overrides+=(--set "tok.vbit=$v")
         read -p "TikTok audio flags (e.g. -b:a 192k or copy) [${TOK_A}]: " a
-        [[ -n "$a" ]] && TOK_A="$a"
+        [[ -n "$a" ]] && overrides+=(--set "tok.audio=$a")
 
         read -p "YouTube CRF (lower is better quality) [${YT_CR}]: " ytcr
-        [[ -n "$ytcr" ]] && YT_CR="$ytcr"
+        [[ -n "$ytcr" ]] && overrides+=(--set "yt.crf=$ytcr")
         read -p "YouTube audio flags [${YT_A}]: " yta
-        [[ -n "$yta" ]] && YT_A="$yta"
+        [[ -n "$yta" ]] && overrides+=(--set "yt.audio=$yta")
 
         read -p "X video bitrate [${X_VBIT}]: " xvb
-        [[ -n "$xvb" ]] && X_VBIT="$xvb"
+        [[ -n "$xvb" ]] && overrides+=(--set "x.vbit=$xvb")
         read -p "X audio flags [${X_A}]: " xa
-        [[ -n "$xa" ]] && X_A="$xa"
+        [[ -n "$xa" ]] && overrides+=(--set "x.audio=$xa")
 
         read -p "Instagram video bitrate [${IG_VBIT}]: " ivb
-        [[ -n "$ivb" ]] && IG_VBIT="$ivb"
+        [[ -n "$ivb" ]] && overrides+=(--set "ig.vbit=$ivb")
         read -p "Instagram audio flags [${IG_A}]: " ia
-        [[ -n "$ia" ]] && IG_A="$ia"
+        [[ -n "$ia" ]] && overrides+=(--set "ig.audio=$ia")
 
         read -p "Facebook/META video bitrate [${META_VBIT}]: " mvb
-        [[ -n "$mvb" ]] && META_VBIT="$mvb"
+        [[ -n "$mvb" ]] && overrides+=(--set "meta.vbit=$mvb")
         read -p "Facebook/META audio flags [${META_A}]: " ma
-        [[ -n "$ma" ]] && META_A="$ma"
+        [[ -n "$ma" ]] && overrides+=(--set "meta.audio=$ma")
     fi
 
-    # execute selected
+    # keep only valid selections
+    valid_choices=()
     for sel in "${choices[@]}"; do
         case "$sel" in
-            1) make_tok ;;
-            2) make_yt ;;
-            3) make_x ;;
-            4) make_ig ;;
-            5) make_meta ;;
+            1|2|3|4|5) valid_choices+=("$sel") ;;
             *) echo -e "${YELLOW}Skipping invalid selection: $sel${NC}" ;;
         esac
     done
+    choices=("${valid_choices[@]}")
+    if [[ ${#choices[@]} -eq 0 ]]; then
+        echo -e "${YELLOW}No valid formats selected.${NC}"
+        pause
+        return
+    fi
 
-    # wait for jobs and show summary
-    echo -e "${CYAN}Waiting for ${#pids[@]} export job(s) to finish...${NC}"
-    idx=0
-    failures=0
-    for pid in "${pids[@]}"; do
-        wait "$pid" || { failures=$((failures+1)); }
-        outfile=${outfiles[$idx]}
-        logfile=${logs[$idx]}
-        if [[ -f "$outfile" ]]; then
-            echo -e "${GREEN}Saved: $outfile (log: $logfile)${NC}"
-        else
-            echo -e "${RED}Failed: $outfile (see log: $logfile)${NC}"
-        fi
-        idx=$((idx+1))
-    done
-    if [[ "$failures" -eq 0 ]]; then
+    # render all selected formats from shared inputs in a parallel job queue
+    local batch_jobs=$(get_setting "advanced.batch_jobs")
+    local batch_threads=$(get_setting "advanced.ffmpeg_threads")
+    local batch_temp=$(get_setting "advanced.temp_folder")
+    local cache_args=()
+    [[ "$(get_setting "advanced.keep_temp_files")" == "True" ]] && cache_args+=(--keep-cache)
+    echo -e "${PURPLE}Rendering ${#choices[@]} format(s)...${NC}"
+    if python3 "$SCRIPT_DIR/social_batch.py" "${source_args[@]}" \
+        --formats "$(IFS=, ; echo "${choices[*]}")" --preset "$preset_name" "${overrides[@]}" \
+        --name "$base_name" --outdir . --jobs "${batch_jobs:-2}" --threads "${batch_threads:-0}" \
+        --cache-dir "${batch_temp:-/tmp}" --log-dir "${batch_temp:-/tmp}" "${cache_args[@]}"; then
         echo -e "${GREEN}All exports completed successfully.${NC}"
     else
-        echo -e "${RED}$failures export(s) failed. Check the logs in /tmp/ for details.${NC}"
+        echo -e "${RED}Some exports failed. Check the logs in ${batch_temp:-/tmp}/ for details.${NC}"
     fi
     # Offer to generate platform-specific captions using the helper script
     if command -v python3 >/dev/null 2>&1 && [[ -f "$SCRIPT_DIR/generate_captions.py" ]]; then
@@ -1328,10 +1329,6 @@ PY
         menu_tiktok_upload
     fi
 
-    # cleanup temporary input video if we created one
-    if [[ -n "$tmp_input_video" && -f "$tmp_input_video" ]]; then
-        rm -f "$tmp_input_video" || true
-    fi
     pause
 }
 
@@ -2178,6 +2175,7 @@ menu_visualizers(){
         echo "39. 🔥 Realistic Fire (Doom Style)"
         echo "40. 🖼️  Static Waveform Image"
         echo
+        echo " c. ⚙️  Calibrate Encoder (speed/quality profile for 32-39)"
         echo " r. Return to Main Menu"
         echo
         read -p "Select visualizer [1-40]: " viz_choice
@@ -2230,6 +2228,7 @@ menu_visualizers(){
             38) viz_reactive_text ;;
             39) viz_fire_realistic ;;
             40) viz_static_thumbnails ;;
+            c|C) viz_calibrate_encoder ;;
             r|R) return ;;
             *) echo -e "${RED}Invalid selection.${NC}"; sleep 1 ;;
         esac
@@ -3320,10 +3319,11 @@ viz_reactive_text(){
     get_output_name
     echo -e "${PURPLE}Rendering reactive text/logo...${NC}"
     
+    viz_encode_args text
     ffmpeg -i "$input_file" -f s16le -ac 1 -ar 44100 -vn - | \
     "$py_cmd" "$(dirname "$0")/viz_master.py" "${viz_args[@]}" --width "$vid_width" --height "$vid_height" | \
     ffmpeg -y -f rawvideo -pixel_format rgb24 -video_size "${vid_width}x${vid_height}" -framerate 30 -thread_queue_size 1024 -i - \
-    -i "$input_file" -map 0:v -map 1:a -c:v libx264 -preset fast -crf 18 -c:a copy -shortest "$output_name"
+    -i "$input_file" -map 0:v -map 1:a "${enc_args[@]}" -c:a copy -shortest "$output_name"
     echo -e "${GREEN}✓ Reactive Text/Logo Complete!${NC}"
     pause
 }
@@ -3343,10 +3343,11 @@ viz_fire_realistic(){
     get_output_name
     echo -e "${PURPLE}Rendering realistic fire...${NC}"
     
+    viz_encode_args fire
     ffmpeg -i "$input_file" -f s16le -ac 1 -ar 44100 -vn - | \
     "$py_cmd" "$(dirname "$0")/viz_master.py" --mode fire --width "$vid_width" --height "$vid_height" | \
     ffmpeg -y -f rawvideo -pixel_format rgb24 -video_size "${vid_width}x${vid_height}" -framerate 30 -thread_queue_size 1024 -i - \
-    -i "$input_file" -map 0:v -map 1:a -c:v libx264 -preset fast -crf 18 -c:a copy -shortest "$output_name"
+    -i "$input_file" -map 0:v -map 1:a "${enc_args[@]}" -c:a copy -shortest "$output_name"
     echo -e "${GREEN}✓ Realistic Fire Complete!${NC}"
     pause
 }
@@ -3463,15 +3464,42 @@ viz_lava_lamp(){
     # 2. python script reads PCM, generates frames -> Pipe
     # 3. ffmpeg reads raw video frames, muxes with original audio -> Output file
     
+    viz_encode_args lava
     ffmpeg -i "$input_file" -f s16le -ac 1 -ar 44100 -vn - | \
     "$py_cmd" "$(dirname "$0")/viz_master.py" --mode lava --width "$vid_width" --height "$vid_height" | \
     ffmpeg -y -f rawvideo -pixel_format rgb24 -video_size "${vid_width}x${vid_height}" -framerate 30 -thread_queue_size 1024 -i - \
-    -i "$input_file" -map 0:v -map 1:a -c:v libx264 -preset fast -crf 18 -c:a copy -shortest "$output_name"
+    -i "$input_file" -map 0:v -map 1:a "${enc_args[@]}" -c:a copy -shortest "$output_name"
 
     echo -e "${GREEN}✓ Lava Lamp Complete!${NC}"
     pause
 }
 
+viz_calibrate_encoder(){
+    echo -e "${CYAN}--- ⚙️ Encoder Calibration (Python Visualizers) ---${NC}"
+    echo -e "${YELLOW}Renders a short test clip of every Python visualizer and times x264 presets on this machine.${NC}"
+    echo -e "${YELLOW}Visualizers 32-39 then use the best settings automatically.${NC}"
+    echo "1. Target speed (encode at least N x real time) [default]"
+    echo "2. Target quality (SSIM, as fast as possible)"
+    read -p "Select [1]: " tune_choice
+    local tune_args=()
+    if [[ "$tune_choice" == "2" ]]; then
+        read -p "Minimum SSIM [0.98]: " min_ssim
+        tune_args+=(--min-ssim "${min_ssim:-0.98}")
+    else
+        read -p "Target speed (x real time) [2]: " target_speed
+        tune_args+=(--target-speed "${target_speed:-2}")
+    fi
+    local threads=$(get_setting "advanced.ffmpeg_threads")
+    echo -e "${PURPLE}Calibrating... (a few minutes)${NC}"
+    if python3 "$SCRIPT_DIR/encode_tuner.py" calibrate --threads "${threads:-0}" "${tune_args[@]}"; then
+        echo
+        python3 "$SCRIPT_DIR/encode_tuner.py" show
+    else
+        echo -e "${RED}Calibration failed.${NC}"
+    fi
+    pause
+}
+
 viz_bars_smooth(){
     echo -e "${CYAN}--- 📊 Smooth Bars (Python/PyGame) ---${NC}"
     local py_cmd
@@ -3487,10 +3515,11 @@ viz_bars_smooth(){
     get_output_name
     echo -e "${PURPLE}Rendering smooth bars...${NC}"
     
+    viz_encode_args bars
     ffmpeg -i "$input_file" -f s16le -ac 1 -ar 44100 -vn - | \
     "$py_cmd" "$(dirname "$0")/viz_master.py" --mode bars --width "$vid_width" --height "$vid_height" | \
     ffmpeg -y -f rawvideo -pixel_format rgb24 -video_size "${vid_width}x${vid_height}" -framerate 30 -thread_queue_size 1024 -i - \
-    -i "$input_file" -map 0:v -map 1:a -c:v libx264 -preset fast -crf 18 -c:a copy -shortest "$output_name"
+    -i "$input_file" -map 0:v -map 1:a "${enc_args[@]}" -c:a copy -shortest "$output_name"
     echo -e "${GREEN}✓ Smooth Bars Complete!${NC}"
     pause
 }
@@ -3510,10 +3539,11 @@ viz_wave_stabilized(){
     get_output_name
     echo -e "${PURPLE}Rendering stabilized waveform...${NC}"
     
+    viz_encode_args wave
     ffmpeg -i "$input_file" -f s16le -ac 1 -ar 44100 -vn - | \
     "$py_cmd" "$(dirname "$0")/viz_master.py" --mode wave --width "$vid_width" --height "$vid_height" | \
     ffmpeg -y -f rawvideo -pixel_format rgb24 -video_size "${vid_width}x${vid_height}" -framerate 30 -thread_queue_size 1024 -i - \
-    -i "$input_file" -map 0:v -map 1:a -c:v libx264 -preset fast -crf 18 -c:a copy -shortest "$output_name"
+    -i "$input_file" -map 0:v -map 1:a "${enc_args[@]}" -c:a copy -shortest "$output_name"
     echo -e "${GREEN}✓ Stabilized Waveform Complete!${NC}"
     pause
 }
@@ -3550,10 +3580,11 @@ viz_particles_reactive(){
     get_output_name
     echo -e "${PURPLE}Rendering particles ($color_arg)...${NC}"
     
+    viz_encode_args particles
     ffmpeg -i "$input_file" -f s16le -ac 1 -ar 44100 -vn - | \
     "$py_cmd" "$(dirname "$0")/viz_master.py" --mode particles --width "$vid_width" --height "$vid_height" --color "$color_arg" | \
     ffmpeg -y -f rawvideo -pixel_format rgb24 -video_size "${vid_width}x${vid_height}" -framerate 30 -thread_queue_size 1024 -i - \
-    -i "$input_file" -map 0:v -map 1:a -c:v libx264 -preset fast -crf 18 -c:a copy -shortest "$output_name"
+    -i "$input_file" -map 0:v -map 1:a "${enc_args[@]}" -c:a copy -shortest "$output_name"
     echo -e "${GREEN}✓ Reactive Particles Complete!${NC}"
     pause
 }
@@ -3635,10 +3666,11 @@ viz_spectrum_radial(){
         cmd_str="$cmd_str $logo_arg"
     fi
 
+    viz_encode_args radial
     ffmpeg -i "$input_file" -f s16le -ac 1 -ar 44100 -vn - | \
     eval "$cmd_str" | \
     ffmpeg -y -f rawvideo -pixel_format rgb24 -video_size "${vid_width}x${vid_height}" -framerate 30 -thread_queue_size 1024 -i - \
-    -i "$input_file" -map 0:v -map 1:a -c:v libx264 -preset fast -crf 18 -c:a copy -shortest "$output_name"
+    -i "$input_file" -map 0:v -map 1:a "${enc_args[@]}" -c:a copy -shortest "$output_name"
     echo -e "${GREEN}✓ Radial Spectrum Complete!${NC}"
     pause
 }
@@ -3675,10 +3707,11 @@ viz_terrain_3d(){
     get_output_name
     echo -e "${PURPLE}Rendering 3D terrain ($color_arg)...${NC}"
     
+    viz_encode_args terrain
     ffmpeg -i "$input_file" -f s16le -ac 1 -ar 44100 -vn - | \
     "$py_cmd" "$(dirname "$0")/viz_master.py" --mode terrain --width "$vid_width" --height "$vid_height" --color "$color_arg" | \
     ffmpeg -y -f rawvideo -pixel_format rgb24 -video_size "${vid_width}x${vid_height}" -framerate 30 -thread_queue_size 1024 -i - \
-    -i "$input_file" -map 0:v -map 1:a -c:v libx264 -preset fast -crf 18 -c:a copy -shortest "$output_name"
+    -i "$input_file" -map 0:v -map 1:a "${enc_args[@]}" -c:a copy -shortest "$output_name"
     echo -e "${GREEN}✓ 3D Terrain Complete!${NC}"
     pause
 }
@@ -3923,7 +3956,20 @@ menu_audio_tools(){
                 echo "Choose source:"
                 echo "  1) Single WAV/MP3 file"
                 echo "  2) Folder of WAV/MP3 files"
-                read -p "Select [1-2]: " mr_choice
+                echo "  3) Add reference tracks to a library"
+                read -p "Select [1-3]: " mr_choice
+
+                if [[ "$mr_choice" == "3" ]]; then
+                    read -p "Reference library folder (e.g. ~/refs/rock): " ref_lib
+                    read -p "Reference WAV/MP3 file or folder to add: " ref_src
+                    if [[ -n "$ref_lib" && -e "$ref_src" ]]; then
+                        python3 "$SCRIPT_DIR/ardour_fixer.py" ref add "$ref_src" --library "${ref_lib/#\~/$HOME}"
+                    else
+                        echo -e "${RED}Need a library folder and an existing file/folder.${NC}"
+                    fi
+                    pause
+                    continue
+                fi
 
                 # Prefer configured report output if set
                 report_dir=$(python3 - <<'PY'
@@ -3957,7 +4003,12 @@ PY
                     extra_args+=("--ref" "$ref_file")
                 fi
 
-                read -p "Save PNG spectrum plot? (y/N): " want_plot
+                read -p "Optional reference library folder (Enter to skip): " ref_lib
+                if [[ -n "$ref_lib" ]]; then
+                    extra_args+=("--ref-library" "${ref_lib/#\~/$HOME}")
+                fi
+
+                read -p "Save spectrum + loudness plot (SVG)? (y/N): " want_plot
                 [[ "$want_plot" =~ ^[Yy]$ ]] && extra_args+=("--plot")
 
                 read -p "Export Mid/Side diagnostic WAVs? (y/N): " want_xray
@@ -3975,6 +4026,10 @@ PY
                     fi
                 else
                     read -p "Directory to analyze (Enter for default): " analysis_dir
+                    if [[ "$want_master" =~ ^[Yy]$ ]]; then
+                        read -p "Album mode: same gain for every track, keeps song-to-song levels? (y/N): " want_album
+                        [[ "$want_album" =~ ^[Yy]$ ]] && extra_args+=("--album")
+                    fi
                     if [[ -z "$analysis_dir" ]]; then
                         if [[ -n "$report_dir" ]]; then
                             python3 ""$SCRIPT_DIR"/ardour_fixer.py" --out "$report_dir" "${extra_args[@]}"
@@ -4071,6 +4126,46 @@ menu_notation_studio(){
     pause
 }
 
+# ==============================================================================
+# Batch Render Queue (overnight catalogs)
+# ==============================================================================
+menu_render_queue(){
+    echo -e "${CYAN}--- 🗂️ Batch Render Queue ---${NC}"
+    echo -e "${YELLOW}Runs a JSON manifest of render jobs in parallel (see the top of render_queue.py for the format).${NC}"
+    echo -e "${YELLOW}Progress is saved; running the same manifest again resumes where it stopped.${NC}"
+    get_input_file "Drag the manifest (.json):"
+    local manifest="$input_file"
+
+    python3 "$SCRIPT_DIR/render_queue.py" "$manifest" --status
+    echo
+    echo "1. Run / resume queue"
+    echo "2. Run and retry failed jobs"
+    echo "3. Dry run (show commands and resource plan)"
+    echo "4. Return"
+    read -p "Select [1]: " q_choice
+
+    local queue_args=()
+    case $q_choice in
+        2) queue_args+=(--retry-failed) ;;
+        3) queue_args+=(--dry-run) ;;
+        4) return ;;
+    esac
+
+    local threads=$(get_setting "advanced.ffmpeg_threads")
+    local temp=$(get_setting "advanced.temp_folder")
+    read -p "RAM budget in MB (Enter = 80% of available): " q_ram
+    [[ "$q_ram" =~ ^[0-9]+$ ]] && queue_args+=(--max-ram "$q_ram")
+
+    echo -e "${PURPLE}Running queue... (Ctrl+C stops safely; unfinished jobs resume next time)${NC}"
+    if python3 "$SCRIPT_DIR/render_queue.py" "$manifest" --threads "${threads:-0}" \
+        --log-dir "${temp:-/tmp}" "${queue_args[@]}"; then
+        echo -e "${GREEN}✓ Queue complete.${NC}"
+    else
+        echo -e "${RED}Some jobs failed. Check the logs in ${temp:-/tmp}/ (supertool_queue_*.log).${NC}"
+    fi
+    pause
+}
+
 # --- Main Loop ---
 if [[ "${BASH_SOURCE[0]}" == "${0}" ]]; then
     # Script is running directly (not sourced) -> run interactive main loop
@@ -4098,9 +4193,10 @@ if [[ "${BASH_SOURCE[0]}" == "${0}" ]]; then
     echo "  6. 📱 Social Media Tools (Batch, Captions, Post)"
     echo "  7. ⚙️  Settings"
     echo "  8. ⚖️  Legal & Info"
+    echo "  9. 🗂️  Batch Render Queue (overnight manifests)"
     echo "  0. 🚪 Exit"
     echo
-    read -p "  Enter choice [0-8]: " main_choice
+    read -p "  Enter choice [0-9]: " main_choice
     case $main_choice in
         1) menu_standard_video ;;
         2) menu_visualizers ;;
@@ -4110,6 +4206,7 @@ if [[ "${BASH_SOURCE[0]}" == "${0}" ]]; then
         6) menu_social_tools ;;
         7) menu_settings ;;
         8) menu_legal ;;
+        9) menu_render_queue ;;
         0) echo "Exiting..."; exit 0 ;;
         *) echo -e "${RED}Invalid selection.${NC}"; sleep 1 ;;
     esac
@@ -38,5 +38,12 @@ echo "[3/3] Installing Python libraries..."
 # and fallback or warn.
 pip3 install -r requirements.txt --break-system-packages 2>/dev/null || pip3 install -r requirements.txt
 
+# 4. Offline rhyme index for the Songwriting Assistant (optional, needs internet once)
+echo "Building offline rhyme index..."
+python3 rhyme_engine.py build --cmudict https://raw.githubusercontent.com/cmusphinx/cmudict/master/cmudict.dict \
+    || echo "Skipped (no internet?). Run later: python3 rhyme_engine.py build --cmudict <cmudict file or URL>"
+python3 rhyme_engine.py build --freq https://raw.githubusercontent.com/hermitdave/FrequencyWords/master/content/2018/en/en_50k.txt \
+    || echo "Skipped ranking rhymes by word frequency. Run later: python3 rhyme_engine.py build --freq <word list file or URL>"
+
 echo -e "\033[1;32mInstallation Complete!\033[0m"
 echo "You can now run the tool with: ./freeed_media_super_tool.sh"
@@ -3,73 +3,236 @@ import requests
 import json
 import os
 import argparse
+import asyncio
+import re
+import time
+
+from lyric_http import TIMEOUTS, get_json, http_session, set_timeouts
+from lyric_meter import MeterAnalyzer, annotate
+from rhyme_engine import RhymeEngine, default_related
+
+# --- Optional async HTTP client for batch mode (falls back to the requests session in threads) ---
+try:
+    import aiohttp
+    AIOHTTP_AVAIL = True
+except ImportError:
+    AIOHTTP_AVAIL = False
+
+# Set from --offline: never fall back to the Datamuse web API
+OFFLINE = False
+# Set from --no-cache: always ask Datamuse instead of the local response cache
+USE_CACHE = True
+_engine = None
+_analyzer = None
+
+def local_engine():
+    """Offline rhyme index (see rhyme_engine.py), loaded once; None if it hasn't been built."""
+    global _engine
+    if _engine is None:
+        _engine = RhymeEngine.load() or False
+    return _engine or None
+
+def lyric_analyzer():
+    """Syllable / meter / rhyme analyzer over the same pronunciations as the rhyme lookups."""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = MeterAnalyzer(local_engine())
+    return _analyzer
+
+def analyze_lyrics(path, meter=None):
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError as e:
+        print(f"Could not read {path}: {e}")
+        return
+    if local_engine() is None:
+        print("(No offline rhyme index yet: syllables are estimated from spelling.)")
+    print(annotate(lyric_analyzer().analyze(text, meter)))
+
+def print_columns(words):
+    for i in range(0, len(words), 4):
+        print("\t".join(f"{w:<15}" for w in words[i:i+4]))
 
 def get_datamuse(endpoint, params):
     url = f"https://api.datamuse.com/{endpoint}"
     try:
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            return response.json()
+        return get_json(url, params, cache=USE_CACHE)
+    except requests.exceptions.Timeout:
+        print("Datamuse API timed out (try again, or use the offline index).")
     except Exception as e:
         print(f"Error connecting to Datamuse API: {e}")
     return []
 
-def find_rhymes(word):
+def find_rhymes(word, kinds=("perfect", "slant", "multi")):
     print(f"\n--- Rhymes for '{word}' ---")
+    engine = local_engine()
+    if engine and engine.knows(word):
+        for kind in kinds:
+            words = engine.rhymes(word, kind)
+            if words:
+                print(f"[{kind}]")
+                print_columns(words)
+        return
+    if OFFLINE:
+        print("Word not in the offline dictionary." if engine else
+              "No offline rhyme index (build it with: python3 rhyme_engine.py build --cmudict <file or URL>).")
+        return
     results = get_datamuse("words", {"rel_rhy": word, "max": 20})
     if results:
-        words = [r['word'] for r in results]
-        # Print in columns
-        for i in range(0, len(words), 4):
-            print("\t".join(f"{w:<15}" for w in words[i:i+4]))
+        print_columns([r['word'] for r in results])
     else:
         print("No rhymes found.")
 
 def find_related(word):
     print(f"\n--- Words related to '{word}' ---")
+    engine = local_engine()
+    words = engine.related(word) if engine else default_related().get(word.lower().strip(), [])[:20]
+    if words:
+        print_columns(words)
+        return
+    if OFFLINE:
+        print("No related words offline (add your own with: python3 rhyme_engine.py build --corpus <lyrics folder>).")
+        return
     results = get_datamuse("words", {"ml": word, "max": 20})
     if results:
-        words = [r['word'] for r in results]
-        for i in range(0, len(words), 4):
-            print("\t".join(f"{w:<15}" for w in words[i:i+4]))
+        print_columns([r['word'] for r in results])
     else:
         print("No related words found.")
 
-def generate_lyrics_ollama(prompt, model="llama3", style="Verse-Chorus"):
-    """Generate lyrics using a local Ollama instance (Free, Offline)"""
-    print(f"\n--- Generating Lyrics (Local Ollama: {model}) for: '{prompt}' ---")
-    print("Thinking... (this depends on your GPU/CPU)")
+def ollama_base_url():
+    host = os.environ.get("OLLAMA_HOST", "localhost:11434")
+    return host if "://" in host else f"http://{host}"
 
-    url = "http://localhost:11434/api/generate"
-    
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+OPENAI_MODEL = "gpt-3.5-turbo"
+
+def songwriter_prompt(style):
     system_prompt = "You are a professional songwriter. Write creative, rhythmic lyrics."
     if style:
         system_prompt += f" Structure the song as {style}."
-    
+    return system_prompt
+
+def ollama_request(prompt, model, style, stream, temperature=None):
+    """(url, json payload, headers) for Ollama's /api/generate."""
     payload = {
         "model": model,
-        "prompt": f"{system_prompt}\n\nWrite a song about: {prompt}",
-        "stream": False
+        "prompt": f"{songwriter_prompt(style)}\n\nWrite a song about: {prompt}",
+        "stream": stream
+    }
+    if temperature is not None:
+        payload["options"] = {"temperature": temperature}
+    return f"{ollama_base_url()}/api/generate", payload, {}
+
+def openai_request(prompt, api_key, style, stream, model=OPENAI_MODEL, temperature=0.7):
+    """(url, json payload, headers) for OpenAI chat completions."""
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+    data = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": songwriter_prompt(style)},
+            {"role": "user", "content": f"Write a song about: {prompt}"}
+        ],
+        "temperature": temperature,
+        "stream": stream
     }
+    return f"{OPENAI_BASE_URL}/chat/completions", data, headers
+
+def stream_ollama(response, stats):
+    """Text pieces from Ollama's NDJSON stream; token counts from the final line go into stats."""
+    for line in response.iter_lines():
+        if not line:
+            continue
+        chunk = json.loads(line)
+        if chunk.get("error"):
+            raise RuntimeError(chunk["error"])
+        if chunk.get("response"):
+            yield chunk["response"]
+        if chunk.get("done"):
+            stats["tokens"] = chunk.get("eval_count")
+            if chunk.get("eval_duration"):
+                stats["gen_seconds"] = chunk["eval_duration"] / 1e9
+            if chunk.get("total_duration"):
+                stats["server_seconds"] = chunk["total_duration"] / 1e9
+            break
 
+def stream_openai(response, stats):
+    """Text pieces from an OpenAI chat completion SSE stream (one delta is about one token)."""
+    for line in response.iter_lines():
+        line = line.decode("utf-8", errors="replace")
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        chunk = json.loads(data)
+        for choice in chunk.get("choices", []):
+            text = choice.get("delta", {}).get("content")
+            if text:
+                stats["tokens"] = stats.get("tokens", 0) + 1
+                yield text
+
+def print_stream(pieces, stats, start):
+    """Print text as it arrives -> (text, cancelled). Ctrl-C stops the stream and keeps what arrived.
+
+    `start` is time.time() from before the request was sent: servers only answer once the
+    model is loaded and the first token is ready, so that wait belongs to the first token.
+    """
+    first = None
+    parts = []
+    cancelled = False
+    print("\n" + "="*40)
     try:
-        response = requests.post(url, json=payload)
-        if response.status_code == 200:
-            result = response.json()
-            content = result.get('response', '')
-            print("\n" + "="*40)
-            print(content)
-            print("="*40 + "\n")
-            
-            save = input("Save these lyrics to file? (y/n): ").lower()
-            if save == 'y':
-                filename = input("Enter filename (e.g., song.txt): ")
-                with open(filename, 'w') as f:
-                    f.write(content)
-                print(f"Saved to {filename}")
-        else:
-            print(f"Error from Ollama: {response.status_code}")
-            print("Make sure Ollama is running (run 'ollama serve' in a terminal).")
+        for piece in pieces:
+            if first is None:
+                first = time.time()
+            parts.append(piece)
+            sys.stdout.write(piece)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        cancelled = True
+        print("\n[Stopped - keeping the partial lyrics]")
+    print("\n" + "="*40)
+
+    end = time.time()
+    if first is not None:
+        tokens = stats.get("tokens") or len(parts)
+        seconds = stats.get("gen_seconds") or max(end - start, 1e-6)
+        print(f"First token: {first - start:.2f}s | {tokens} tokens in {end - start:.1f}s | {tokens / seconds:.1f} tokens/s")
+    return "".join(parts), cancelled
+
+def offer_save(content):
+    if not content.strip():
+        return
+    save = input("Save these lyrics to file? (y/n): ").lower()
+    if save == 'y':
+        filename = input("Enter filename (e.g., song.txt): ")
+        with open(filename, 'w') as f:
+            f.write(content)
+        print(f"Saved to {filename}")
+
+def generate_lyrics_ollama(prompt, model="llama3", style="Verse-Chorus"):
+    """Generate lyrics using a local Ollama instance (Free, Offline)"""
+    print(f"\n--- Generating Lyrics (Local Ollama: {model}) for: '{prompt}' ---")
+    print("Thinking... (this depends on your GPU/CPU, Ctrl+C stops early)")
+
+    url, payload, _ = ollama_request(prompt, model, style, stream=True)
+
+    try:
+        start = time.time()
+        with http_session().post(url, json=payload, timeout=TIMEOUTS["generate"], stream=True) as response:
+            if response.status_code != 200:
+                print(f"Error from Ollama: {response.status_code}")
+                print("Make sure Ollama is running (run 'ollama serve' in a terminal).")
+                return
+            stats = {}
+            content, _ = print_stream(stream_ollama(response, stats), stats, start)
+        offer_save(content)
+    except requests.exceptions.Timeout:
+        print(f"\n[!] Ollama did not answer within {TIMEOUTS['generate'][1]:.0f}s (raise it with --read-timeout).")
     except requests.exceptions.ConnectionError:
         print("\n[!] Could not connect to Ollama.")
         print("    1. Install Ollama from https://ollama.com")
@@ -85,62 +248,189 @@ def generate_lyrics_ai(prompt, api_key, style="Verse-Chorus"):
         return
 
     print(f"\n--- Generating Lyrics for: '{prompt}' ---")
-    print("Contacting AI... (this may take a few seconds)")
+    print("Contacting AI... (Ctrl+C stops early)")
     
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
-    system_prompt = "You are a professional songwriter. Write creative, rhythmic lyrics."
-    if style:
-        system_prompt += f" Structure the song as {style}."
-
-    data = {
-        "model": "gpt-3.5-turbo",
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Write a song about: {prompt}"}
-        ],
-        "temperature": 0.7
-    }
+    url, data, headers = openai_request(prompt, api_key, style, stream=True)
     
     try:
-        response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data)
-        if response.status_code == 200:
-            result = response.json()
-            content = result['choices'][0]['message']['content']
-            print("\n" + "="*40)
-            print(content)
-            print("="*40 + "\n")
-            
-            # Offer to save
-            save = input("Save these lyrics to file? (y/n): ").lower()
-            if save == 'y':
-                filename = input("Enter filename (e.g., song.txt): ")
-                with open(filename, 'w') as f:
-                    f.write(content)
-                print(f"Saved to {filename}")
-        else:
-            print(f"Error from AI API: {response.status_code} - {response.text}")
+        start = time.time()
+        with http_session().post(url, headers=headers, json=data,
+                                 timeout=TIMEOUTS["generate"], stream=True) as response:
+            if response.status_code != 200:
+                print(f"Error from AI API: {response.status_code} - {response.text}")
+                return
+            stats = {}
+            content, _ = print_stream(stream_openai(response, stats), stats, start)
+        offer_save(content)
+    except requests.exceptions.Timeout:
+        print(f"\n[!] The AI API did not answer within {TIMEOUTS['generate'][1]:.0f}s (raise it with --read-timeout).")
     except Exception as e:
         print(f"Error: {e}")
 
+def slugify(text):
+    """File-name-safe stem: lowercase letters, digits and underscores, at most 40 characters."""
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_")[:40]
+
+def load_batch(path, defaults):
+    """JSONL prompts -> list of job dicts. Each line needs "prompt"; optional: style, backend, model,
+    temperature, count (number of variations), name."""
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{lineno}: {e}")
+            if isinstance(item, str):
+                item = {"prompt": item}
+            if not item.get("prompt"):
+                raise ValueError(f"{path}:{lineno}: missing \"prompt\"")
+            job = {**defaults, **item}
+            if job["backend"] not in ("ollama", "openai"):
+                raise ValueError(f"{path}:{lineno}: backend must be ollama or openai")
+            base = slugify(item.get("name") or job["prompt"]) or "song"
+            count = max(1, int(item.get("count", 1)))
+            for n in range(count):
+                suffix = f"_v{n + 1}" if count > 1 else ""
+                jobs.append({**job, "name": f"{len(jobs) + 1:03d}_{base}{suffix}"})
+    return jobs
+
+def batch_request(job, api_key):
+    if job["backend"] == "openai":
+        return openai_request(job["prompt"], api_key, job.get("style"), stream=False,
+                              model=job.get("model") or OPENAI_MODEL, temperature=job.get("temperature", 0.7))
+    return ollama_request(job["prompt"], job.get("model") or "llama3", job.get("style"), stream=False,
+                          temperature=job.get("temperature"))
+
+def parse_completion(backend, body):
+    """Non-streamed response -> (text, prompt tokens, completion tokens)."""
+    if backend == "openai":
+        usage = body.get("usage") or {}
+        text = body["choices"][0]["message"]["content"]
+        return text, usage.get("prompt_tokens"), usage.get("completion_tokens")
+    return body.get("response", ""), body.get("prompt_eval_count"), body.get("eval_count")
+
+def post_json_blocking(url, payload, headers):
+    response = http_session().post(url, json=payload, headers=headers, timeout=TIMEOUTS["generate"])
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return response.status_code, response.text
+
+async def post_json(client, url, payload, headers):
+    """(status, parsed JSON or text) via aiohttp when installed, else the requests session in a thread."""
+    if client is None:
+        return await asyncio.to_thread(post_json_blocking, url, payload, headers)
+    async with client.post(url, json=payload, headers=headers) as response:
+        text = await response.text()
+        try:
+            return response.status, json.loads(text)
+        except ValueError:
+            return response.status, text
+
+async def run_batch_job(job, client, limit, api_key, outdir):
+    async with limit:
+        url, payload, headers = batch_request(job, api_key)
+        meta = {k: job.get(k) for k in ("name", "prompt", "style", "backend", "model")}
+        meta["model"] = payload["model"]
+        start = time.time()
+        try:
+            status, body = await post_json(client, url, payload, headers)
+            if status != 200 or not isinstance(body, dict):
+                raise RuntimeError(f"HTTP {status}: {str(body)[:200]}")
+            text, prompt_tokens, completion_tokens = parse_completion(job["backend"], body)
+            latency = time.time() - start
+            meta.update(latency_s=round(latency, 2), prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                        tokens_per_s=round(completion_tokens / latency, 1) if completion_tokens else None)
+            with open(os.path.join(outdir, f"{job['name']}.txt"), "w", encoding="utf-8") as f:
+                f.write(text)
+            meta["analysis"] = lyric_analyzer().analyze(text)["summary"]
+        except Exception as e:  # keep the rest of the batch going
+            meta.update(error=str(e) or type(e).__name__, latency_s=round(time.time() - start, 2))
+        try:
+            with open(os.path.join(outdir, f"{job['name']}.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+        except OSError as e:
+            meta.setdefault("error", f"metadata: {e}")
+        status = f"ERROR {meta['error']}" if meta.get("error") else \
+            f"{meta['latency_s']}s, {meta.get('completion_tokens') or '?'} tokens, score {meta['analysis']['score']:.0f}"
+        print(f"[{job['name']}] {status}")
+        return meta
+
+async def run_batch_async(jobs, concurrency, api_key, outdir):
+    limit = asyncio.Semaphore(concurrency)
+    if AIOHTTP_AVAIL:
+        connect, read = TIMEOUTS["generate"]
+        timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=concurrency)) as client:
+            return await asyncio.gather(*(run_batch_job(j, client, limit, api_key, outdir) for j in jobs))
+    http_session(pool_size=max(10, concurrency))
+    return await asyncio.gather(*(run_batch_job(j, None, limit, api_key, outdir) for j in jobs))
+
+def run_batch(path, outdir, concurrency, api_key, backend, model):
+    """Non-interactive: generate every prompt in a JSONL file, `concurrency` requests at a time."""
+    try:
+        jobs = load_batch(path, {"backend": backend, "model": model, "style": "Verse-Chorus"})
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"Error: {e}\n")
+        return 1
+    if any(j["backend"] == "openai" for j in jobs) and not api_key:
+        sys.stderr.write("Error: OpenAI jobs need --key or OPENAI_API_KEY\n")
+        return 1
+    os.makedirs(outdir, exist_ok=True)
+    concurrency = max(1, concurrency)
+    print(f"Batch: {len(jobs)} generation(s), {concurrency} at a time -> {outdir}")
+    start = time.time()
+    results = asyncio.run(run_batch_async(jobs, concurrency, api_key, outdir))
+    failed = [r for r in results if r.get("error")]
+    tokens = sum(r.get("completion_tokens") or 0 for r in results)
+    print(f"Done: {len(results) - len(failed)} ok, {len(failed)} failed, {tokens} tokens in {time.time() - start:.1f}s")
+    return 1 if failed else 0
+
 def main():
     parser = argparse.ArgumentParser(description="Songwriting Assistant")
-    parser.add_argument("--mode", choices=["rhyme", "related", "generate", "interactive"], default="interactive")
+    parser.add_argument("--mode", choices=["rhyme", "related", "generate", "batch", "analyze", "interactive"],
+                        default="interactive")
     parser.add_argument("--word", help="Word to find rhymes/related for")
     parser.add_argument("--prompt", help="Prompt for lyric generation")
+    parser.add_argument("--file", help="Lyrics .txt file to analyze (syllables, meter, rhyme)")
+    parser.add_argument("--meter", choices=["iambic", "trochaic", "anapestic", "dactylic"],
+                        help="Target meter for --mode analyze (default: best fit)")
     parser.add_argument("--key", help="OpenAI API Key", default=os.environ.get("OPENAI_API_KEY"))
+    parser.add_argument("--rhyme-type", choices=["perfect", "slant", "multi", "all"], default="all")
+    parser.add_argument("--offline", action="store_true", help="Only use the local rhyme index, never Datamuse")
+    parser.add_argument("--no-cache", action="store_true", help="Don't use the local Datamuse response cache")
+    parser.add_argument("--connect-timeout", type=float, help=f"Seconds to connect to an API (default {TIMEOUTS['lookup'][0]:.0f})")
+    parser.add_argument("--read-timeout", type=float,
+                        help=f"Seconds to wait for generated lyrics (default {TIMEOUTS['generate'][1]:.0f})")
+    parser.add_argument("--batch", help="Batch mode: JSONL file, one {\"prompt\": ..., \"style\": ...} per line")
+    parser.add_argument("--outdir", default="lyrics_batch", help="Batch mode: where to write lyrics + metadata")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch mode: generations running at once")
+    parser.add_argument("--backend", choices=["ollama", "openai"], default="ollama", help="Batch mode default backend")
+    parser.add_argument("--model", help="Batch mode default model (llama3 / gpt-3.5-turbo)")
     
     args = parser.parse_args()
+    global OFFLINE, USE_CACHE
+    OFFLINE = args.offline
+    USE_CACHE = not args.no_cache
+    set_timeouts(args.connect_timeout, args.read_timeout)
+    rhyme_kinds = ("perfect", "slant", "multi") if args.rhyme_type == "all" else (args.rhyme_type,)
 
-    if args.mode == "rhyme" and args.word:
-        find_rhymes(args.word)
+    if args.mode == "batch" or args.batch:
+        if not args.batch:
+            parser.error("--mode batch needs --batch FILE.jsonl")
+        sys.exit(run_batch(args.batch, args.outdir, args.concurrency, args.key, args.backend, args.model))
+    elif args.mode == "rhyme" and args.word:
+        find_rhymes(args.word, rhyme_kinds)
     elif args.mode == "related" and args.word:
         find_related(args.word)
     elif args.mode == "generate" and args.prompt:
         generate_lyrics_ai(args.prompt, args.key)
+    elif args.mode == "analyze" and args.file:
+        analyze_lyrics(args.file, args.meter)
     else:
         # Interactive Loop
         print("\n🎵 Welcome to the Songwriting Assistant 🎵")
@@ -149,12 +439,13 @@ def main():
             print("2. Find Related Words / Synonyms")
             print("3. Generate Lyrics (OpenAI - Paid/Key Required)")
             print("4. Generate Lyrics (Ollama - Free/Local)")
-            print("5. Exit")
-            choice = input("Select option (1-5): ")
+            print("5. Analyze Lyrics File (syllables / meter / rhyme)")
+            print("6. Exit")
+            choice = input("Select option (1-6): ")
             
             if choice == "1":
                 w = input("Enter word to rhyme: ")
-                find_rhymes(w)
+                find_rhymes(w, rhyme_kinds)
             elif choice == "2":
                 w = input("Enter word for meaning/synonyms: ")
                 find_related(w)
@@ -172,6 +463,9 @@ def main():
                 if not m: m = "llama3"
                 generate_lyrics_ollama(p, model=m)
             elif choice == "5":
+                path = input("Lyrics file (.txt): ").strip().strip("'\"")
+                analyze_lyrics(path)
+            elif choice == "6":
                 print("Keep writing! 🎵")
                 break
 
@@ -0,0 +1,150 @@
+"""HTTP plumbing for lyric_assistant.py: one pooled session, timeouts, retries and a response cache.
+
+- http_session(): a shared requests.Session (keep-alive connection pool) that
+  retries connection errors, and GETs that hit 429/5xx, with exponential backoff.
+- TIMEOUTS: (connect, read) seconds per kind of call; "generate" allows slow
+  local models, "lookup" is for quick word APIs. Set from the command line.
+- ResponseCache: SQLite store for repeated lookups (Datamuse) with a TTL and
+  a size cap; the least recently used entries go first.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CACHE_PATH = os.path.expanduser("~/.freeed_media_super_tool/lyric_cache.sqlite")
+CACHE_TTL = 30 * 24 * 3600       # seconds
+CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+TIMEOUTS = {
+    "lookup": (5.0, 15.0),
+    "generate": (5.0, 300.0),
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def set_timeouts(connect=None, read=None):
+    """Override the connect timeout (all calls) and/or the read timeout for generation calls."""
+    for kind, (c, r) in TIMEOUTS.items():
+        TIMEOUTS[kind] = (connect or c, (read or r) if kind == "generate" else r)
+
+
+def http_session(retries=3, backoff=0.5, pool_size=10):
+    """Process-wide Session; created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=retries,
+                backoff_factor=backoff,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),  # POSTs only retry when the connection failed
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "FreeEd4Med-SuperTool lyric_assistant"
+            _session = session
+    return _session
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.path, self.ttl, self.max_bytes = path, ttl, max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, body TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    @staticmethod
+    def make_key(url, params):
+        return url + "?" + json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+    def get(self, key):
+        """Cached JSON value, or None when missing or older than the TTL."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT body, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        body = json.dumps(value, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used rows until the cache is back under 90% of the cap
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+
+_cache = None
+
+
+def response_cache():
+    """Shared cache; None if the SQLite file can't be opened (e.g. read-only home)."""
+    global _cache
+    if _cache is None:
+        try:
+            _cache = ResponseCache()
+        except (OSError, sqlite3.Error):
+            _cache = False
+    return _cache or None
+
+
+def get_json(url, params=None, cache=True):
+    """GET a JSON API through the shared session, using the response cache when enabled."""
+    params = params or {}
+    store = response_cache() if cache else None
+    key = ResponseCache.make_key(url, params)
+    if store:
+        hit = store.get(key)
+        if hit is not None:
+            return hit
+    response = http_session().get(url, params=params, timeout=TIMEOUTS["lookup"])
+    response.raise_for_status()
+    value = response.json()
+    if store:
+        store.put(key, value)
+    return value
@@ -0,0 +1,304 @@
+"""Syllable, meter and rhyme analysis for lyric drafts.
+
+Uses the pronunciations in the offline rhyme index (see rhyme_engine.py) and
+a spelling heuristic for words the dictionary doesn't know, so it also works
+(less precisely) before the index has been built.
+
+For every line:
+- syllables and stress pattern ("/" stressed, "x" unstressed, "." for
+  one-syllable function words, which can go either way)
+- meter fit: share of syllables that follow the target foot (iambic x/,
+  trochaic /x, anapestic xx/, dactylic /xx), best starting offset
+- end rhyme letter (ABAB...) within the stanza, perfect or slant
+- internal rhyme density: share of words rhyming with another word in the line
+
+    python3 lyric_meter.py annotate song.txt --meter iambic
+    python3 lyric_meter.py score lyrics_batch --min-score 60     # rank / filter drafts
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from rhyme_engine import STOPWORDS, RhymeEngine, is_vowel, rhyme_keys
+
+METERS = {"iambic": "x/", "trochaic": "/x", "anapestic": "xx/", "dactylic": "/xx"}
+TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z']*")
+VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+# Skipped as end words / ignored for internal rhymes, in addition to rhyme_engine.STOPWORDS
+FILLERS = {"oh", "ooh", "yeah", "la", "na", "hey", "whoa", "uh"}
+SECTION_RE = re.compile(r"^\s*[\[(].*[\])]\s*$")  # [Chorus], (Verse 2)
+
+
+def heuristic_syllables(word):
+    """Vowel-group count with the usual English corrections (silent e, -ed, -es)."""
+    w = word.lower().replace("'", "")
+    groups = VOWEL_GROUP_RE.findall(w)
+    count = len(groups)
+    if count > 1 and w.endswith("e") and not w.endswith(("le", "ee", "ye")):
+        count -= 1  # silent e: "stone", "fire"
+    elif count > 1 and w.endswith(("ed", "es")) and not w.endswith(("ted", "ded", "ses", "zes", "ces", "ches", "shes")):
+        count -= 1  # "burned", "lines"
+    if w.endswith("le") and len(w) > 2 and w[-3] not in "aeiouy":
+        count = max(count, 2)  # "little", "candle"
+    for pair in ("ia", "io", "eo", "ua", "uo"):
+        count += w.count(pair)  # split diphthongs: "lion", "radio"
+    return max(1, count)
+
+
+def heuristic_rhyme_key(word):
+    """Spelling-based rhyme part (last vowel group to the end), for words outside the dictionary."""
+    w = word.lower().replace("'", "")
+    if w.endswith("e") and len(w) > 2:
+        w = w[:-1]
+    match = None
+    for match in VOWEL_GROUP_RE.finditer(w):
+        pass
+    return "~" + (w[match.start():] if match else w)
+
+
+class MeterAnalyzer:
+    def __init__(self, engine=None):
+        self.prons = engine.prons if engine else {}
+        self._cache = {}
+
+    def word(self, word):
+        """(syllables, stress string, flexible, perfect rhyme key, slant rhyme key), cached per word."""
+        key = word.lower().strip("'")
+        if word.lower().endswith("in'"):
+            key += "g"  # dropped g: "lovin'" is "loving"
+        info = self._cache.get(key)
+        if info is not None:
+            return info
+        prons = self.prons.get(key)
+        if prons:
+            phones = prons[0].split()
+            stress = "".join("/" if p[-1] in "12" else "x" for p in phones if is_vowel(p))
+            keys = rhyme_keys(prons[0])
+            perfect, slant = keys["perfect"][0], keys["slant"][-1]
+        else:
+            n = heuristic_syllables(key)
+            # Unknown words: stress the first of two syllables, the penultimate of longer ones
+            stress = "/" if n == 1 else "/x" if n == 2 else "x" * (n - 2) + "/x"
+            perfect = slant = heuristic_rhyme_key(key)
+        stress = stress or "x"
+        flexible = len(stress) == 1
+        if flexible:
+            stress = "x" if key in STOPWORDS else "/"
+        info = (len(stress), stress, flexible, perfect, slant)
+        self._cache[key] = info
+        return info
+
+    def pattern(self, words):
+        """Stress string for a list of words plus a per-syllable 'could go either way' flag."""
+        infos = [self.word(w) for w in words]
+        stress = "".join(i[1] for i in infos)
+        flexible = [f for i in infos for f in [i[2]] * i[0]]
+        return infos, stress, flexible
+
+    def line(self, text, meter=None):
+        words = TOKEN_RE.findall(text)
+        infos, stress, flexible = self.pattern(words)
+        display = "".join(s if not f or s == "/" else "." for s, f in zip(stress, flexible))
+        result = {"text": text, "syllables": len(stress), "stress": display}
+        if meter and stress:
+            result["meter_fit"] = meter_fit(stress, flexible, METERS[meter])
+        content = [(w.lower(), i) for w, i in zip(words, infos) if w.lower() not in STOPWORDS and w.lower() not in FILLERS]
+        rhyming = 0
+        for w, info in content:
+            if any(o != w and (oi[3] == info[3] or oi[4] == info[4]) for o, oi in content):
+                rhyming += 1
+        result["internal_rhyme"] = rhyming / len(content) if content else 0.0
+        end = [(w.lower(), i) for w, i in zip(words, infos) if w.lower() not in FILLERS]
+        result["end"] = (end[-1][0], end[-1][1][3], end[-1][1][4]) if end else None
+        return result
+
+    def analyze(self, text, meter=None):
+        """Whole lyric -> {"lines": [...], "summary": {...}}; meter=None picks the best-fitting one."""
+        raw = [l.rstrip() for l in text.splitlines()]
+        if meter is None:
+            meter = self.detect_meter(raw)
+        lines = []
+        stanza = []
+        for text_line in raw:
+            if not TOKEN_RE.search(text_line) or SECTION_RE.match(text_line):
+                stanza = []
+                lines.append({"text": text_line, "blank": True})
+                continue
+            result = self.line(text_line, meter)
+            assign_rhyme(result, stanza)
+            stanza.append(result)
+            lines.append(result)
+        return {"meter": meter, "lines": lines, "summary": summarize(lines, meter)}
+
+    def detect_meter(self, raw_lines):
+        sample = [self.pattern(TOKEN_RE.findall(l))[1:] for l in raw_lines[:200] if not SECTION_RE.match(l)]
+        sample = [(stress, flexible) for stress, flexible in sample if stress]
+        best, best_fit = "iambic", -1.0
+        for name, foot in METERS.items():
+            fits = [meter_fit(stress, flexible, foot) for stress, flexible in sample]
+            fit = statistics.mean(fits) if fits else 0.0
+            if fit > best_fit + 0.01:  # ties go to the simpler feet listed first
+                best, best_fit = name, fit
+        return best
+
+
+def meter_fit(stress, flexible, foot):
+    """Share of syllables matching the foot pattern at its best offset; one-syllable words get half credit."""
+    best = 0.0
+    for offset in range(len(foot)):
+        score = 0.0
+        for i, s in enumerate(stress):
+            if s == foot[(i + offset) % len(foot)]:
+                score += 1
+            elif flexible[i]:
+                score += 0.5
+        best = max(best, score / len(stress))
+    return best
+
+
+def assign_rhyme(result, stanza, window=4):
+    """Rhyme letter for the line's end word, matched against the previous `window` lines of the stanza."""
+    result["rhyme"] = None
+    if not result["end"]:
+        result["letter"] = "-"
+        return
+    word, perfect, slant = result["end"]
+    for other in reversed(stanza[-window:]):
+        if not other.get("end") or other["end"][0] == word:
+            continue
+        if other["end"][1] == perfect:
+            result["rhyme"], result["rhyme_kind"] = other["letter"], "perfect"
+            break
+        if other["end"][2] == slant:
+            result["rhyme"], result["rhyme_kind"] = other["letter"], "slant"
+            break
+    if result["rhyme"]:
+        result["letter"] = result["rhyme"]
+        return
+    used = {r["letter"] for r in stanza}
+    result["letter"] = next((chr(c) for c in range(ord("A"), ord("Z") + 1) if chr(c) not in used), "?")
+
+
+def summarize(lines, meter):
+    rows = [l for l in lines if not l.get("blank")]
+    if not rows:
+        return {"lines": 0, "score": 0.0}
+    counts = [r["syllables"] for r in rows]
+    median = statistics.median(counts)
+    consistency = sum(abs(c - median) <= 1 for c in counts) / len(rows)
+    fit = statistics.mean(r.get("meter_fit", 0.0) for r in rows)
+    # A line rhymes if it answers an earlier line of its stanza or a later line answers it
+    stanzas = [[]]
+    for l in lines:
+        if l.get("blank"):
+            stanzas.append([])
+        else:
+            stanzas[-1].append(l)
+    end_rhyme = 0
+    for stanza in stanzas:
+        answered = {l["rhyme"] for l in stanza if l["rhyme"]}
+        end_rhyme += sum(1 for l in stanza if l["rhyme"] or l["letter"] in answered)
+    end_rhyme /= len(rows)
+    internal = statistics.mean(r["internal_rhyme"] for r in rows)
+    score = 100 * (0.35 * fit + 0.3 * consistency + 0.3 * end_rhyme + 0.05 * min(1.0, internal * 2))
+    return {"lines": len(rows), "meter": meter, "meter_fit": round(fit, 3), "syllables_median": median,
+            "syllable_consistency": round(consistency, 3), "end_rhyme": round(end_rhyme, 3),
+            "internal_rhyme": round(internal, 3), "score": round(score, 1)}
+
+
+def annotate(result):
+    out = []
+    width = max((len(l["text"]) for l in result["lines"]), default=0)
+    width = min(width, 60)
+    for l in result["lines"]:
+        if l.get("blank"):
+            out.append(l["text"])
+            continue
+        rhyme = l["letter"] + ("~" if l.get("rhyme_kind") == "slant" else " ")
+        fit = f"{l['meter_fit'] * 100:3.0f}%" if "meter_fit" in l else "    "
+        out.append(f"{l['text']:<{width}}  | {l['syllables']:>2} {rhyme} {fit}  {l['stress']}")
+    s = result["summary"]
+    out.append("")
+    out.append(f"Meter: {result['meter']} ({s.get('meter_fit', 0) * 100:.0f}% fit), syllables median "
+               f"{s.get('syllables_median', 0):g} ({s.get('syllable_consistency', 0) * 100:.0f}% within +/-1), "
+               f"end rhyme {s.get('end_rhyme', 0) * 100:.0f}%, internal rhyme {s.get('internal_rhyme', 0) * 100:.0f}%")
+    out.append(f"Score: {s['score']:.0f}/100")
+    return "\n".join(out)
+
+
+def lyric_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, n) for n in os.listdir(path) if n.lower().endswith(".txt"))
+        else:
+            files.append(path)
+    return files
+
+
+def load_analyzer(index=None):
+    engine = RhymeEngine.load(index)
+    if engine is None:
+        sys.stderr.write("Note: no rhyme index found, using spelling heuristics only "
+                         "(build it with: python3 rhyme_engine.py build --cmudict ...)\n")
+    return MeterAnalyzer(engine)
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--index", help="Rhyme index file (default: the one lyric_assistant.py uses)")
+    common.add_argument("--meter", choices=list(METERS) + ["auto"], default="auto",
+                        help="Target meter (default: whichever fits the lyric best)")
+    parser = argparse.ArgumentParser(description="Syllable / meter / rhyme analysis for lyrics")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ann = sub.add_parser("annotate", parents=[common], help="Print a lyric file with per-line syllables, rhyme and stress")
+    ann.add_argument("file")
+    ann.add_argument("--json", action="store_true", help="Print the analysis as JSON")
+    score = sub.add_parser("score", parents=[common], help="Score and rank lyric files (e.g. a batch output folder)")
+    score.add_argument("paths", nargs="+", help=".txt files or folders")
+    score.add_argument("--min-score", type=float, default=0, help="Only list files scoring at least this")
+    score.add_argument("--json", action="store_true", help="Print one JSON summary per line")
+    args = parser.parse_args()
+
+    analyzer = load_analyzer(args.index)
+    meter = None if args.meter == "auto" else args.meter
+    start = time.perf_counter()
+    if args.command == "annotate":
+        try:
+            with open(args.file, "r", encoding="utf-8", errors="replace") as f:
+                result = analyzer.analyze(f.read(), meter)
+        except OSError as e:
+            sys.stderr.write(f"Error: {e}\n")
+            sys.exit(1)
+        print(json.dumps(result, indent=2) if args.json else annotate(result))
+        nlines = result["summary"]["lines"]
+    else:
+        ranked = []
+        nlines = 0
+        for path in lyric_files(args.paths):
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    summary = analyzer.analyze(f.read(), meter)["summary"]
+            except OSError as e:
+                sys.stderr.write(f"Skipping {path}: {e}\n")
+                continue
+            nlines += summary["lines"]
+            if summary["score"] >= args.min_score:
+                ranked.append((summary["score"], path, summary))
+        ranked.sort(key=lambda r: -r[0])
+        for value, path, summary in ranked:
+            if args.json:
+                print(json.dumps({"file": path, **summary}))
+            else:
+                print(f"{value:5.1f}  {summary['meter']:<9} fit {summary['meter_fit'] * 100:3.0f}%  "
+                      f"end {summary['end_rhyme'] * 100:3.0f}%  {path}")
+    elapsed = time.perf_counter() - start
+    print(f"({nlines} lines in {elapsed:.2f}s, {nlines / elapsed if elapsed else 0:.0f} lines/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Plots for ardour_fixer.py --plot, rendered in parallel worker processes.
+
+A plot job is a plain dict built by ardour_fixer.plot_job():
+
+    {"name": "song", "spectrum": {band: dB}, "ref_spec": {band: dB} or None,
+     "momentary": [LUFS every 100 ms], "short_term": [...], "target_lufs": -14.0}
+
+svg (default): written directly by a small SVG writer, no plotting library.
+png: drawn with matplotlib, imported only inside the workers that need it;
+     each worker builds its figure once and redraws it for every track.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+
+BAND_NAMES = ["Sub", "Bass", "LowMid", "Mid", "UpMid", "Pres", "Treble", "Air"]
+FORMATS = ("svg", "png")
+BLOCK_SECONDS = 0.1  # spacing of the momentary / short-term values
+
+BG = "#000000"
+TRACK_COLOR = "#ffffff"
+REF_COLOR = "#9b59b6"
+ACCENT = "#8e44ad"
+LABEL_COLOR = "#808080"
+SHORT_TERM_COLOR = "#00bcd4"
+TARGET_COLOR = "#e74c3c"
+
+WIDTH = 1000
+SPECTRUM_HEIGHT = 600
+TIMELINE_HEIGHT = 260
+MARGIN_L, MARGIN_R, MARGIN_T, MARGIN_B = 80, 30, 50, 50
+MAX_TIMELINE_POINTS = 1200
+
+
+def nice_range(values, step):
+    """Axis limits rounded out to a multiple of step, with at least one step of room."""
+    lo = min(values)
+    hi = max(values)
+    lo = step * ((lo - step / 2) // step)
+    hi = step * -((-hi - step / 2) // step)
+    return lo, max(hi, lo + step)
+
+
+def decimate(values, limit=MAX_TIMELINE_POINTS):
+    """Every k-th value so a long track stays a light polyline -> (values, seconds per point)."""
+    k = max(1, -(-len(values) // limit))
+    return values[::k], BLOCK_SECONDS * k
+
+
+class SvgWriter:
+    """Just enough SVG for line charts: lines, polylines, polygons, circles and text."""
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.parts = [f'<rect width="{width}" height="{height}" fill="{BG}"/>']
+
+    def line(self, x1, y1, x2, y2, color, width=1.0, opacity=1.0, dash=None):
+        extra = f' stroke-dasharray="{dash}"' if dash else ""
+        self.parts.append(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" stroke="{color}" '
+                          f'stroke-width="{width}" stroke-opacity="{opacity}"{extra}/>')
+
+    def polyline(self, points, color, width=1.0, dash=None):
+        extra = f' stroke-dasharray="{dash}"' if dash else ""
+        coords = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+        self.parts.append(f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="{width}" '
+                          f'stroke-linejoin="round"{extra}/>')
+
+    def polygon(self, points, color, opacity):
+        coords = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+        self.parts.append(f'<polygon points="{coords}" fill="{color}" fill-opacity="{opacity}" stroke="none"/>')
+
+    def circle(self, x, y, r, color):
+        self.parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{r}" fill="{color}"/>')
+
+    def text(self, x, y, text, color, size=12, anchor="start", bold=False, rotate=None):
+        weight = ' font-weight="bold"' if bold else ""
+        transform = f' transform="rotate({rotate} {x:.1f} {y:.1f})"' if rotate else ""
+        self.parts.append(f'<text x="{x:.1f}" y="{y:.1f}" fill="{color}" font-size="{size}" '
+                          f'text-anchor="{anchor}"{weight}{transform}>{escape(str(text))}</text>')
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+                    f'viewBox="0 0 {self.width} {self.height}" font-family="DejaVu Sans, Arial, sans-serif">\n')
+            f.write("\n".join(self.parts))
+            f.write("\n</svg>\n")
+
+
+class Panel:
+    """Maps data coordinates into one rectangle of the SVG and draws its frame, grid and labels."""
+
+    def __init__(self, svg, top, height, x_range, y_range):
+        self.svg = svg
+        self.left, self.right = MARGIN_L, svg.width - MARGIN_R
+        self.top, self.bottom = top + MARGIN_T, top + height - MARGIN_B
+        self.x_range, self.y_range = x_range, y_range
+
+    def xy(self, x, y):
+        (x0, x1), (y0, y1) = self.x_range, self.y_range
+        px = self.left + (x - x0) / ((x1 - x0) or 1) * (self.right - self.left)
+        py = self.bottom - (min(max(y, y0), y1) - y0) / ((y1 - y0) or 1) * (self.bottom - self.top)
+        return px, py
+
+    def frame(self, title, y_label, y_step, x_ticks):
+        svg = self.svg
+        svg.text((self.left + self.right) / 2, self.top - 18, title, TRACK_COLOR, size=15, anchor="middle", bold=True)
+        svg.text(22, (self.top + self.bottom) / 2, y_label, LABEL_COLOR, anchor="middle", rotate=-90)
+        y0, y1 = self.y_range
+        y = y0
+        while y <= y1 + 1e-9:
+            _, py = self.xy(self.x_range[0], y)
+            svg.line(self.left, py, self.right, py, ACCENT, opacity=0.2)
+            svg.text(self.left - 8, py + 4, f"{y:.0f}", LABEL_COLOR, anchor="end")
+            y += y_step
+        for x, label in x_ticks:
+            px, _ = self.xy(x, y0)
+            svg.line(px, self.top, px, self.bottom, ACCENT, opacity=0.2)
+            svg.text(px, self.bottom + 20, label, LABEL_COLOR, anchor="middle")
+        svg.line(self.left, self.bottom, self.right, self.bottom, LABEL_COLOR)
+        svg.line(self.left, self.top, self.left, self.bottom, LABEL_COLOR)
+
+    def legend(self, entries):
+        """entries: [(label, color, dash)] drawn top-right."""
+        x = self.right - 150
+        y = self.top + 10
+        self.svg.parts.append(f'<rect x="{x - 10}" y="{y - 4}" width="150" height="{len(entries) * 20 + 8}" '
+                              f'fill="{BG}" stroke="{ACCENT}"/>')
+        for i, (label, color, dash) in enumerate(entries):
+            ly = y + 10 + i * 20
+            self.svg.line(x, ly, x + 30, ly, color, width=2, dash=dash)
+            self.svg.text(x + 40, ly + 4, label, TRACK_COLOR)
+
+
+def render_svg(job, path):
+    timeline = job.get("short_term") or job.get("momentary")
+    svg = SvgWriter(WIDTH, SPECTRUM_HEIGHT + (TIMELINE_HEIGHT if timeline else 0))
+
+    track = [job["spectrum"].get(b, 0.0) for b in BAND_NAMES]
+    ref = [job["ref_spec"].get(b, 0.0) for b in BAND_NAMES] if job.get("ref_spec") else None
+    panel = Panel(svg, 0, SPECTRUM_HEIGHT, (-0.3, len(BAND_NAMES) - 0.7), nice_range(track + (ref or []), 6))
+    panel.frame(f"Spectrum: {job['name']}", "RMS Energy (dBFS)", 6, list(enumerate(BAND_NAMES)))
+    track_pts = [panel.xy(i, v) for i, v in enumerate(track)]
+    entries = [("Track", TRACK_COLOR, None)]
+    if ref:
+        ref_pts = [panel.xy(i, v) for i, v in enumerate(ref)]
+        svg.polygon(track_pts + ref_pts[::-1], ACCENT, 0.15)
+        svg.polyline(ref_pts, REF_COLOR, width=2, dash="8,5")
+        entries.append(("Reference", REF_COLOR, "8,5"))
+    svg.polyline(track_pts, TRACK_COLOR, width=2.4)
+    for x, y in track_pts:
+        svg.circle(x, y, 4, TRACK_COLOR)
+    panel.legend(entries)
+
+    if timeline:
+        momentary, step = decimate(job.get("momentary") or [])
+        short_term, _ = decimate(job.get("short_term") or [])
+        target = job.get("target_lufs")
+        seconds = max(len(momentary), len(short_term)) * step
+        audible = [v for v in momentary + short_term if v > -70] or [-70.0]
+        y_lo, y_hi = nice_range(audible + ([target] if target is not None else []), 6)
+        y_lo = max(y_lo, y_hi - 36)  # keep the interesting top 36 LU readable
+        tl = Panel(svg, SPECTRUM_HEIGHT, TIMELINE_HEIGHT, (0, seconds or 1), (y_lo, y_hi))
+        tick = next((t for t in (10, 30, 60, 120, 300, 600) if seconds / t <= 10), 1200)
+        ticks = [(t, f"{t // 60}:{t % 60:02d}") for t in range(0, int(seconds) + 1, tick)]
+        tl.frame("Loudness over time", "LUFS", 6, ticks)
+        entries = []
+        if momentary:
+            svg.polyline([tl.xy(i * step, v) for i, v in enumerate(momentary)], LABEL_COLOR, width=1)
+            entries.append(("Momentary", LABEL_COLOR, None))
+        if short_term:
+            svg.polyline([tl.xy(i * step, v) for i, v in enumerate(short_term)], SHORT_TERM_COLOR, width=2)
+            entries.append(("Short-term", SHORT_TERM_COLOR, None))
+        if target is not None:
+            x0, y = tl.xy(0, target)
+            x1, _ = tl.xy(seconds, target)
+            svg.line(x0, y, x1, y, TARGET_COLOR, width=1.5, dash="6,4")
+            entries.append(("Target", TARGET_COLOR, "6,4"))
+        tl.legend(entries)
+
+    svg.save(path)
+
+
+_figure = None
+
+
+def render_matplotlib(job, path):
+    """PNG via matplotlib; the figure is built once per worker process and redrawn per track."""
+    global _figure
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    timeline = job.get("short_term") or job.get("momentary")
+    if _figure is None:
+        plt.style.use("dark_background")
+        fig, (ax, tl) = plt.subplots(2, 1, figsize=(10, 8.5), gridspec_kw={"height_ratios": [2.3, 1]})
+        fig.patch.set_facecolor("black")
+        _figure = fig, ax, tl
+    fig, ax, tl = _figure
+    for a in (ax, tl):
+        a.cla()
+        a.set_facecolor("black")
+    tl.set_visible(bool(timeline))
+
+    track = [job["spectrum"].get(b, 0.0) for b in BAND_NAMES]
+    ax.plot(BAND_NAMES, track, label="Track", color="white", linewidth=2.4, marker="o", markersize=4)
+    if job.get("ref_spec"):
+        ref = [job["ref_spec"].get(b, 0.0) for b in BAND_NAMES]
+        ax.plot(BAND_NAMES, ref, label="Reference", color=REF_COLOR, linestyle="--", linewidth=2)
+        ax.fill_between(BAND_NAMES, track, ref, alpha=0.15, color=ACCENT)
+    ax.set_title(f"Spectrum: {job['name']}", color="white", fontsize=12, fontweight="bold")
+    ax.set_ylabel("RMS Energy (dBFS)", color="gray")
+    ax.grid(True, color=ACCENT, alpha=0.2)
+    ax.legend(frameon=True, facecolor="black", edgecolor=ACCENT, labelcolor="white")
+
+    if timeline:
+        momentary, step = decimate(job.get("momentary") or [])
+        short_term, _ = decimate(job.get("short_term") or [])
+        if momentary:
+            tl.plot([i * step for i in range(len(momentary))], momentary, color=LABEL_COLOR, linewidth=0.8,
+                    label="Momentary")
+        if short_term:
+            tl.plot([i * step for i in range(len(short_term))], short_term, color=SHORT_TERM_COLOR, linewidth=1.6,
+                    label="Short-term")
+        if job.get("target_lufs") is not None:
+            tl.axhline(job["target_lufs"], color=TARGET_COLOR, linestyle="--", linewidth=1.2, label="Target")
+        audible = [v for v in momentary + short_term if v > -70] or [-70.0]
+        tl.set_ylim(max(min(audible), max(audible) - 36) - 2, max(audible) + 3)
+        tl.set_title("Loudness over time", color="white", fontsize=11)
+        tl.set_xlabel("Seconds", color="gray")
+        tl.set_ylabel("LUFS", color="gray")
+        tl.grid(True, color=ACCENT, alpha=0.2)
+        tl.legend(frameon=True, facecolor="black", edgecolor=ACCENT, labelcolor="white", loc="lower right")
+
+    fig.savefig(path, dpi=100, bbox_inches="tight", facecolor="black")
+
+
+def render_job(job, out_dir, fmt):
+    """Worker entry point -> (path, error message or None)."""
+    path = os.path.join(out_dir, f"{job['name']}_spectrum.{fmt}")
+    try:
+        if fmt == "png":
+            render_matplotlib(job, path)
+        else:
+            render_svg(job, path)
+    except ImportError:
+        return path, "PNG plots need matplotlib (pip install matplotlib), or use --plot-format svg"
+    except (OSError, ValueError) as e:
+        return path, str(e)
+    return path, None
+
+
+def render_plots(jobs, out_dir, fmt="svg", workers=None):
+    """Render every plot job in worker processes -> [(path, error)] in job order."""
+    if not jobs:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    if workers == 1:
+        return [render_job(job, out_dir, fmt) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_job, jobs, [out_dir] * len(jobs), [fmt] * len(jobs)))
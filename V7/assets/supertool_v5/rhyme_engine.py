@@ -0,0 +1,348 @@
+"""Offline rhyme and related-word engine for lyric_assistant.py.
+
+The engine reads a precompiled index (gzipped JSON) built once from a
+CMUdict-format pronunciation dictionary:
+
+    python3 rhyme_engine.py build --cmudict cmudict.dict
+    python3 rhyme_engine.py build --cmudict https://raw.githubusercontent.com/cmusphinx/cmudict/master/cmudict.dict
+    python3 rhyme_engine.py build --freq en_50k.txt      # rank rhymes by a word-frequency list
+    python3 rhyme_engine.py build --corpus ~/lyrics      # add "related" words from your own texts
+
+The index holds every pronunciation plus inverted indexes from rhyme part to
+words, so a lookup is a couple of dict hits:
+
+- perfect: same sounds from the last stressed vowel to the end (time / climb)
+- slant:   same vowels from the last stressed vowel, different consonants (time / line / light)
+- multi:   same vowel pattern over the last two or more syllables (education / dedication)
+
+Each bucket lists common words first: by a frequency list when one is given
+(one "word [count]" per line, most common first), otherwise short words first.
+Initialisms (abc, fbi: more syllables than the spelling has vowel groups) are
+left out.
+
+"related" words come from a co-occurrence table (PMI over a +/-5 word window)
+computed from a folder of .txt files, e.g. your own lyrics; words it doesn't
+cover fall back to the small table shipped in related_words.json.
+
+    python3 rhyme_engine.py rhyme fire --kind slant
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import sys
+import time
+import urllib.request
+from collections import Counter, defaultdict
+
+INDEX_PATH = os.path.expanduser("~/.freeed_media_super_tool/rhyme_index.json.gz")
+RELATED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "related_words.json")
+INDEX_VERSION = 3
+KINDS = ("perfect", "slant", "multi")
+
+# Consonant manner classes, used to rank slant rhymes (same class sounds closer)
+MANNER = {
+    **dict.fromkeys(["P", "B", "T", "D", "K", "G"], "stop"),
+    **dict.fromkeys(["F", "V", "TH", "DH", "S", "Z", "SH", "ZH", "HH"], "fricative"),
+    **dict.fromkeys(["CH", "JH"], "affricate"),
+    **dict.fromkeys(["M", "N", "NG"], "nasal"),
+    **dict.fromkeys(["L", "R"], "liquid"),
+    **dict.fromkeys(["W", "Y"], "glide"),
+}
+STOPWORDS = set("""
+a an the and or but if then so of to in on at by for with from as is am are was were be been being it its
+this that these those i me my you your he him his she her we us our they them their what which who whom
+not no yes do does did have has had will would can could should just oh ooh yeah la na
+""".split())
+WORD_RE = re.compile(r"[a-z][a-z']*")
+VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+
+def is_vowel(phone):
+    return phone[-1].isdigit()
+
+
+def strip_stress(phones):
+    return [p.rstrip("012") for p in phones]
+
+
+def rhyme_start(phones):
+    """Index of the last primary-stressed vowel (else secondary, else the last vowel)."""
+    vowels = [i for i, p in enumerate(phones) if is_vowel(p)]
+    if not vowels:
+        return 0
+    for mark in ("1", "2"):
+        stressed = [i for i in vowels if phones[i].endswith(mark)]
+        if stressed:
+            return stressed[-1]
+    return vowels[-1]
+
+
+def rhyme_keys(pron):
+    """Pronunciation string ('T AY1 M') -> {kind: [keys, closest match first]}.
+
+    Each kind lists a strict key before a loose one, so a lookup can walk
+    the buckets in order and stop as soon as it has enough words:
+    slant = vowels + final consonant class, then vowels only;
+    multi = earlier vowel + the perfect rhyme part, then the vowel pattern only.
+    """
+    phones = pron.split()
+    start = rhyme_start(phones)
+    tail = strip_stress(phones[start:])
+    perfect = " ".join(tail)
+    vowels = " ".join(p for p, raw in zip(tail, phones[start:]) if is_vowel(raw))
+    coda = next((p for p in reversed(tail) if p in MANNER), None)
+    keys = {"perfect": [perfect], "slant": [f"{vowels}|{MANNER[coda] if coda else '-'}", vowels], "multi": []}
+    before = [i for i, p in enumerate(phones[:start]) if is_vowel(p)]
+    if before:
+        # Vowel pattern from the syllable before the rhyme to the end (2+ syllables)
+        pre = phones[before[-1]].rstrip("012")
+        keys["multi"] = [f"{pre}|{perfect}", " ".join(p.rstrip("012") for p in phones[before[-1]:] if is_vowel(p))]
+    return keys
+
+
+def is_initialism(word, pron):
+    """True for spelled-out abbreviations ('abc' = EY1 B IY1 S IY1)."""
+    syllables = sum(1 for p in pron.split() if is_vowel(p))
+    return syllables > len(VOWEL_GROUP_RE.findall(word)) + 1
+
+
+def parse_cmudict(lines):
+    """CMUdict lines ('word  W ER1 D', 'word(2) ...', ';;;' comments) -> {word: [pronunciations]}."""
+    prons = defaultdict(list)
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith(";;;"):
+            continue
+        word, _, pron = line.partition(" ")
+        word = re.sub(r"\(\d+\)$", "", word).lower()
+        pron = " ".join(pron.split())
+        if pron and pron not in prons[word]:
+            prons[word].append(pron)
+    return dict(prons)
+
+
+def parse_frequencies(lines):
+    """Frequency list ('word [count]' per line, most common first) -> {word: rank}."""
+    rank = {}
+    for line in lines:
+        parts = line.split()
+        if parts:
+            rank.setdefault(parts[0].lower(), len(rank))
+    return rank
+
+
+def read_source(source):
+    if re.match(r"https?://", source):
+        with urllib.request.urlopen(source, timeout=60) as resp:
+            return resp.read().decode("latin-1").splitlines()
+    with open(source, "r", encoding="latin-1") as f:
+        return f.read().splitlines()
+
+
+def build_inverted(prons, rank=None):
+    """-> ({kind: {rhyme key: [words]}}, {word: [perfect keys]}).
+
+    Lists are ordered by `rank` ({word: position in a frequency list}), then
+    short words first. The perfect keys let slant lookups skip perfect rhymes
+    without re-deriving every candidate's keys.
+    """
+    index = {kind: defaultdict(set) for kind in KINDS}
+    perfect = defaultdict(list)
+    for word, variants in prons.items():
+        if not WORD_RE.fullmatch(word):
+            continue  # skip entries with punctuation
+        for pron in variants:
+            if is_initialism(word, pron):
+                continue
+            keys = rhyme_keys(pron)
+            if keys["perfect"][0] not in perfect[word]:
+                perfect[word].append(keys["perfect"][0])
+            for kind, kind_keys in keys.items():
+                for key in kind_keys:
+                    index[kind][key].add(word)
+    rank = rank or {}
+    unranked = len(rank)
+    order = lambda w: (rank.get(w, unranked), len(w), w)
+    rhymes = {kind: {key: sorted(words, key=order) for key, words in table.items() if len(words) > 1}
+              for kind, table in index.items()}
+    return rhymes, dict(perfect)
+
+
+def build_related(paths, window=5, min_count=3, keep=20):
+    """Top co-occurring words (PMI, +/- window words) from .txt files -> {word: [words]}."""
+    counts = Counter()
+    pairs = Counter()
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, n) for n in names if n.lower().endswith((".txt", ".lrc", ".md"))]
+        else:
+            files.append(path)
+    for name in files:
+        with open(name, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                words = [w for w in WORD_RE.findall(line.lower()) if w not in STOPWORDS]
+                counts.update(words)
+                for i, w in enumerate(words):
+                    for other in words[i + 1:i + 1 + window]:
+                        if other != w:
+                            pairs[(w, other) if w < other else (other, w)] += 1
+    total = sum(counts.values()) or 1
+    scored = defaultdict(list)
+    for (a, b), n in pairs.items():
+        if n < 2 or counts[a] < min_count or counts[b] < min_count:
+            continue
+        pmi = math.log(n * total / (counts[a] * counts[b]))
+        if pmi > 0:
+            weight = pmi * math.log1p(n)  # favour pairs seen more than once or twice
+            scored[a].append((weight, b))
+            scored[b].append((weight, a))
+    return {w: [o for _, o in sorted(lst, reverse=True)[:keep]] for w, lst in scored.items()}, len(files)
+
+
+_default_related = None
+
+
+def default_related():
+    """The related-words table shipped with the tool ({} if it is missing)."""
+    global _default_related
+    if _default_related is None:
+        try:
+            with open(RELATED_PATH, "r", encoding="utf-8") as f:
+                _default_related = json.load(f)
+        except (OSError, ValueError):
+            _default_related = {}
+    return _default_related
+
+
+class RhymeEngine:
+    def __init__(self, data):
+        self.prons = data.get("pron", {})
+        self.index = data.get("rhymes", {})
+        self.perfect = data.get("perfect", {})
+        self.related_words = data.get("related", {})
+
+    @classmethod
+    def load(cls, path=None):
+        """Engine from the precompiled index, or None if it has not been built yet."""
+        path = path or os.environ.get("SUPERTOOL_RHYME_INDEX") or INDEX_PATH
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(data)
+
+    def knows(self, word):
+        return word.lower() in self.prons
+
+    def rhymes(self, word, kind="perfect", limit=20):
+        """Rhymes of one kind, best first; [] for words missing from the dictionary.
+
+        Walks the precomputed buckets from strict to loose and stops at
+        `limit`, so the cost does not depend on how common the rhyme is.
+        """
+        word = word.lower().strip()
+        found = []
+        seen = {word}
+        for pron in self.prons.get(word, []):
+            keys = rhyme_keys(pron)
+            perfect = keys["perfect"][0]
+            for key in keys[kind]:
+                for w in self.index[kind].get(key, []):
+                    if w in seen:
+                        continue
+                    seen.add(w)
+                    if kind == "slant" and perfect in self.perfect.get(w, ()):
+                        continue  # near rhymes only
+                    found.append(w)
+                    if len(found) >= limit:
+                        return found
+        return found
+
+    def related(self, word, limit=20):
+        word = word.lower().strip()
+        return (self.related_words.get(word) or default_related().get(word, []))[:limit]
+
+
+def save_index(data, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline rhyme / related-word index")
+    parser.add_argument("--index", default=INDEX_PATH, help="Index file (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build or update the index")
+    build.add_argument("--cmudict", help="CMUdict-format file or URL")
+    build.add_argument("--freq", help="Word-frequency list file or URL ('word [count]' per line, most common first)")
+    build.add_argument("--corpus", nargs="+", help="Text files/folders for related words (e.g. your lyrics)")
+    rhyme = sub.add_parser("rhyme", help="Look up rhymes")
+    rhyme.add_argument("word")
+    rhyme.add_argument("--kind", choices=KINDS + ("all",), default="all")
+    related = sub.add_parser("related", help="Look up related words")
+    related.add_argument("word")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if not args.cmudict and not args.freq and not args.corpus:
+            sys.stderr.write("Error: give --cmudict, --freq and/or --corpus\n")
+            sys.exit(1)
+        data = {"version": INDEX_VERSION, "pron": {}, "rhymes": {k: {} for k in KINDS}, "perfect": {}, "rank": {},
+                "related": {}}
+        if os.path.exists(args.index):
+            with gzip.open(args.index, "rt", encoding="utf-8") as f:
+                data.update(json.load(f))
+        rebuild = data.get("version") != INDEX_VERSION  # older index layout
+        for option, source in (("cmudict", args.cmudict), ("freq", args.freq)):
+            if not source:
+                continue
+            try:
+                lines = read_source(source)
+            except OSError as e:
+                sys.stderr.write(f"Error: could not read {source}: {e}\n")
+                sys.exit(1)
+            if option == "cmudict":
+                data["pron"] = parse_cmudict(lines)
+                print(f"Pronunciations: {len(data['pron'])} words")
+            else:
+                data["rank"] = parse_frequencies(lines)
+                print(f"Word frequencies: {len(data['rank'])} words")
+            rebuild = True
+        if rebuild:
+            data["rhymes"], data["perfect"] = build_inverted(data["pron"], data.get("rank"))
+        if args.corpus:
+            data["related"], nfiles = build_related(args.corpus)
+            print(f"Related words: {len(data['related'])} words from {nfiles} file(s)")
+        data["version"] = INDEX_VERSION
+        save_index(data, args.index)
+        print(f"Index saved: {args.index} ({os.path.getsize(args.index) // 1024} KB)")
+        return
+
+    start = time.perf_counter()
+    engine = RhymeEngine.load(args.index)
+    if engine is None and args.command == "related":
+        engine = RhymeEngine({})  # the shipped related-words table needs no index
+    if engine is None:
+        sys.stderr.write(f"Error: no index at {args.index} (run: python3 rhyme_engine.py build --cmudict ...)\n")
+        sys.exit(1)
+    loaded = time.perf_counter()
+    if args.command == "rhyme":
+        for kind in (KINDS if args.kind == "all" else (args.kind,)):
+            print(f"{kind}: {', '.join(engine.rhymes(args.word, kind)) or '-'}")
+    else:
+        print(", ".join(engine.related(args.word)) or "-")
+    print(f"(index load {loaded - start:.2f}s, lookup {(time.perf_counter() - loaded) * 1000:.2f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
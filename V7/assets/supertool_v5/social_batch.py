@@ -0,0 +1,285 @@
+"""Social Media Batch renderer (menu: Social Media Batch Generator).
+
+Builds every requested platform version of one post in a single run:
+
+- audio + still image: the audio is decoded once into an uncompressed WAV
+  cache (or FLAC with --cache-format flac) and the image goes in as one
+  looped frame. Every platform encode reads those shared inputs, so there is
+  no intermediate libx264 source video and no repeated MP3/AAC decoding.
+  The cache sits in the OS page cache, so parallel encodes share it.
+- video: each platform encode reads the source video directly.
+
+Encodes run in a job queue limited to --jobs at a time.
+
+Example:
+    python3 social_batch.py --audio song.mp3 --image cover.png --formats tok,ig --preset high
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+PLATFORMS = {
+    "tok": {"label": "TikTok", "suffix": "video_Tok", "size": (1080, 1920)},
+    "yt": {"label": "YouTube", "suffix": "video_YT", "size": (1920, 1080)},
+    "x": {"label": "X / Twitter", "suffix": "video_X", "size": (1280, 720)},
+    "ig": {"label": "Instagram", "suffix": "video_IG", "size": (1080, 1080)},
+    "meta": {"label": "Facebook / META", "suffix": "video_META", "size": (1280, 720)},
+}
+# Menu numbers used by the shell script
+MENU_CODES = {"1": "tok", "2": "yt", "3": "x", "4": "ig", "5": "meta"}
+
+# Per-platform encode settings: vbit = target/max bitrate, crf + speed = x264 rate control
+PRESETS = {
+    "low": {
+        "tok": {"vbit": "2000k", "crf": "23", "speed": "fast", "audio": "copy"},
+        "yt": {"crf": "24", "speed": "fast", "audio": "192k"},
+        "x": {"vbit": "2000k", "audio": "160k"},
+        "ig": {"vbit": "2000k", "crf": "22", "speed": "medium", "audio": "160k"},
+        "meta": {"vbit": "2000k", "audio": "192k"},
+    },
+    "medium": {
+        "tok": {"vbit": "3500k", "crf": "20", "speed": "medium", "audio": "192k"},
+        "yt": {"crf": "18", "speed": "medium", "audio": "320k"},
+        "x": {"vbit": "3500k", "audio": "160k"},
+        "ig": {"vbit": "3000k", "crf": "20", "speed": "medium", "audio": "160k"},
+        "meta": {"vbit": "4000k", "audio": "192k"},
+    },
+    "high": {
+        "tok": {"vbit": "6000k", "crf": "16", "speed": "slow", "audio": "320k"},
+        "yt": {"crf": "16", "speed": "slow", "audio": "320k"},
+        "x": {"vbit": "5500k", "audio": "160k"},
+        "ig": {"vbit": "4500k", "crf": "18", "speed": "slow", "audio": "160k"},
+        "meta": {"vbit": "6000k", "audio": "192k"},
+    },
+}
+SETTING_KEYS = ("vbit", "crf", "speed", "audio")
+
+
+def parse_formats(text):
+    """'1,4', 'tok,ig' or 'a'/'all' -> list of platform codes (order kept, duplicates dropped)."""
+    if text.strip().lower() in ("a", "all"):
+        return list(PLATFORMS)
+    codes = []
+    for item in text.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        code = MENU_CODES.get(item, item)
+        if code not in PLATFORMS:
+            raise ValueError(f"unknown format '{item}' (use 1-5 or {', '.join(PLATFORMS)})")
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+
+def bitrate_bits(value):
+    """ffmpeg-style bitrate ('2000k', '4M', '2500000') -> bits per second."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*", value)
+    if not match:
+        raise ValueError(f"bad bitrate '{value}' (expected e.g. 2500k, 4M or 2500000)")
+    number, unit = match.groups()
+    return int(float(number) * {"": 1, "k": 1000, "m": 1000000}[unit.lower()])
+
+
+def apply_overrides(settings, overrides):
+    """Apply KEY=VALUE overrides such as 'tok.vbit=4000k' or 'yt.audio=-b:a 256k'."""
+    for item in overrides:
+        key, sep, value = item.partition("=")
+        code, _, field = key.strip().lower().partition(".")
+        if not sep or code not in settings or field not in SETTING_KEYS:
+            raise ValueError(f"bad --set '{item}' (expected e.g. tok.vbit=4000k)")
+        value = value.strip()
+        if field == "audio" and value.startswith("-b:a"):
+            value = value[len("-b:a"):].strip()
+        if field == "vbit" and value:
+            bitrate_bits(value)  # reject typos here rather than in ffmpeg
+        settings[code][field] = value
+
+
+def cache_audio(audio_path, cache_dir, cache_format):
+    """Decode the source audio once; returns (cache path, duration in seconds or None)."""
+    if cache_format == "flac":
+        out = os.path.join(cache_dir, "audio.flac")
+        codec = ["-c:a", "flac"]
+    else:
+        out = os.path.join(cache_dir, "audio.wav")
+        codec = ["-c:a", "pcm_s16le"]
+    # Downmix to stereo like the platform outputs; ffmpeg writes WAVE_FORMAT_EXTENSIBLE
+    # for more channels, which the wave module rejects before Python 3.12
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", audio_path, "-vn", "-ac", "2", *codec, out]
+    subprocess.run(cmd, check=True)
+
+    duration = None
+    if cache_format == "wav":
+        try:
+            with wave.open(out, "rb") as wf:
+                duration = wf.getnframes() / float(wf.getframerate())
+        except (wave.Error, EOFError):
+            pass  # encodes then stop on -shortest instead of -t
+    return out, duration
+
+
+def video_filter(width, height, still):
+    vf = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+    )
+    if still:
+        # Scale the single image frame once, then repeat it at the output rate
+        vf += ",fps=30"
+    return vf + ",format=yuv420p"
+
+
+def rate_args(spec):
+    args = ["-preset", spec.get("speed") or "medium"]
+    if spec.get("crf"):
+        args += ["-crf", spec["crf"]]
+    elif spec.get("vbit"):
+        args += ["-b:v", spec["vbit"]]
+    if spec.get("vbit"):
+        args += ["-maxrate", spec["vbit"], "-bufsize", str(bitrate_bits(spec["vbit"]) * 2)]
+    return args
+
+
+def audio_args(spec, can_copy):
+    audio = spec.get("audio") or "192k"
+    if audio == "copy":
+        if can_copy:
+            return ["-c:a", "copy"]
+        # Decoded PCM can't be stream-copied into MP4
+        audio = "192k"
+    return ["-c:a", "aac", "-b:a", audio]
+
+
+def build_command(code, spec, output, video=None, image=None, audio=None, duration=None, threads=0):
+    width, height = PLATFORMS[code]["size"]
+    cmd = ["ffmpeg", "-y", "-v", "error"]
+    if video:
+        cmd += ["-i", video]
+        cmd += ["-vf", video_filter(width, height, still=False)]
+    else:
+        cmd += ["-loop", "1", "-framerate", "1", "-i", image, "-i", audio]
+        cmd += ["-map", "0:v", "-map", "1:a", "-vf", video_filter(width, height, still=True), "-tune", "stillimage"]
+        if duration:
+            cmd += ["-t", f"{duration:.3f}"]
+        else:
+            cmd.append("-shortest")
+    cmd += ["-c:v", "libx264", *rate_args(spec)]
+    cmd += audio_args(spec, can_copy=bool(video))
+    if threads:
+        cmd += ["-threads", str(threads)]
+    cmd += ["-movflags", "+faststart", output]
+    return cmd
+
+
+def run_job(code, cmd, log_path):
+    start = time.time()
+    with open(log_path, "w", encoding="utf-8") as log:
+        log.write(" ".join(cmd) + "\n\n")
+        log.flush()
+        result = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+    return code, result.returncode, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render several social media versions of one post")
+    parser.add_argument("--video", help="Source video")
+    parser.add_argument("--audio", help="Source audio (used with --image)")
+    parser.add_argument("--image", help="Still image shown for the whole track (used with --audio)")
+    parser.add_argument("--formats", default="all", help="Comma list of 1-5 or tok,yt,x,ig,meta, or 'all'")
+    parser.add_argument("--preset", default="medium", choices=sorted(PRESETS))
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override one setting, e.g. tok.vbit=4000k, yt.crf=20, ig.audio=192k")
+    parser.add_argument("--name", help="Output base name (default: source file name)")
+    parser.add_argument("--outdir", default=".", help="Where to write the videos")
+    parser.add_argument("--jobs", type=int, default=2, help="Encodes to run at once")
+    parser.add_argument("--threads", type=int, default=0, help="ffmpeg -threads per encode (0 = auto)")
+    parser.add_argument("--cache-dir", default=tempfile.gettempdir(), help="Where to put the decoded audio cache")
+    parser.add_argument("--cache-format", default="wav", choices=["wav", "flac"],
+                        help="wav = fastest to read, flac = about half the disk space")
+    parser.add_argument("--keep-cache", action="store_true", help="Don't delete the audio cache afterwards")
+    parser.add_argument("--log-dir", default=tempfile.gettempdir(), help="Where to write one ffmpeg log per output")
+    args = parser.parse_args()
+
+    if args.video:
+        if not os.path.isfile(args.video):
+            sys.stderr.write(f"Error: video not found: {args.video}\n")
+            sys.exit(1)
+    elif not (args.audio and args.image):
+        sys.stderr.write("Error: give --video, or both --audio and --image\n")
+        sys.exit(1)
+    else:
+        for path in (args.audio, args.image):
+            if not os.path.isfile(path):
+                sys.stderr.write(f"Error: file not found: {path}\n")
+                sys.exit(1)
+
+    try:
+        codes = parse_formats(args.formats)
+        settings = {code: dict(spec) for code, spec in PRESETS[args.preset].items()}
+        apply_overrides(settings, args.overrides)
+    except ValueError as e:
+        sys.stderr.write(f"Error: {e}\n")
+        sys.exit(1)
+    if not codes:
+        sys.stderr.write("Error: no formats selected\n")
+        sys.exit(1)
+
+    source = args.video or args.audio
+    name = args.name or os.path.splitext(os.path.basename(source))[0]
+    os.makedirs(args.outdir, exist_ok=True)
+
+    cache_dir = None
+    audio_cache, duration = None, None
+    try:
+        if not args.video:
+            cache_dir = tempfile.mkdtemp(prefix="supertool_batch_", dir=args.cache_dir)
+            print(f"Decoding audio once: {args.audio}")
+            try:
+                audio_cache, duration = cache_audio(args.audio, cache_dir, args.cache_format)
+            except subprocess.CalledProcessError:
+                sys.stderr.write(f"Error: could not decode {args.audio}\n")
+                sys.exit(1)
+
+        jobs = {}
+        for code in codes:
+            output = os.path.join(args.outdir, f"{name}_{PLATFORMS[code]['suffix']}.mp4")
+            log_path = os.path.join(args.log_dir, f"supertool_batch_{name}_{code}.log")
+            cmd = build_command(code, settings[code], output, video=args.video, image=args.image,
+                                audio=audio_cache, duration=duration, threads=args.threads)
+            jobs[code] = (cmd, output, log_path)
+
+        workers = max(1, min(args.jobs, len(jobs)))
+        print(f"Rendering {len(jobs)} output(s), {workers} at a time...")
+        batch_start = time.time()
+        failures = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_job, code, cmd, log) for code, (cmd, _, log) in jobs.items()]
+            for future in as_completed(futures):
+                code, returncode, seconds = future.result()
+                _, output, log_path = jobs[code]
+                label = PLATFORMS[code]["label"]
+                if returncode == 0 and os.path.isfile(output):
+                    print(f"Saved: {output} ({label}, {seconds:.1f}s, log: {log_path})")
+                else:
+                    failures += 1
+                    print(f"Failed: {output} ({label}, see log: {log_path})")
+        print(f"Batch finished in {time.time() - batch_start:.1f}s")
+    finally:
+        if cache_dir and not args.keep_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        elif cache_dir:
+            print(f"Audio cache kept: {cache_dir}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Streaming onset, tempo and beat tracking for viz_master.py.
+
+One BeatTracker runs per render and is fed the spectral flux of every frame.
+Each update does a fixed amount of work (one vector op over the candidate
+tempo lags), so long renders cost the same per frame as short ones.
+
+- Onsets: flux above an adaptive threshold (running mean + k * std).
+- Tempo: decaying autocorrelation of onset strength over 60-180 BPM lags.
+- Beats: a phase accumulator at the estimated period, nudged toward onsets.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+BeatInfo = namedtuple("BeatInfo", "onset onset_strength beat beat_phase tempo")
+
+
+class BeatTracker:
+    def __init__(self, fps, min_bpm=60, max_bpm=180, sensitivity=1.5,
+                 threshold_seconds=1.0, tempo_memory_seconds=8.0, refractory_seconds=0.1):
+        self.fps = fps
+        self.sensitivity = sensitivity
+        self.lags = np.arange(max(1, int(fps * 60 / max_bpm)), int(fps * 60 / min_bpm) + 1)
+        self.history = np.zeros(self.lags[-1] + 1)
+        self.pos = 0
+        self.autocorr = np.zeros(len(self.lags))
+        self.ac_decay = math.exp(-1.0 / (fps * tempo_memory_seconds))
+
+        self.alpha = 1.0 / max(1.0, fps * threshold_seconds)
+        self.warmup = int(fps * threshold_seconds)
+        self.refractory = max(1, int(fps * refractory_seconds))
+        self.mean = 0.0
+        self.var = 0.0
+        self.prev_flux = 0.0
+        self.frames = 0
+        self.since_onset = self.refractory
+
+        self.period = fps * 0.5  # 120 BPM until the autocorrelation says otherwise
+        self.phase = 0.0
+
+    @property
+    def tempo(self):
+        return 60.0 * self.fps / self.period
+
+    def update(self, flux):
+        # --- Onset: adaptive threshold on spectral flux ---
+        std = math.sqrt(self.var)
+        deviation = flux - self.mean
+        onset = (
+            self.frames >= self.warmup
+            and self.since_onset >= self.refractory
+            and deviation > self.sensitivity * std
+            and flux >= self.prev_flux
+        )
+        strength = min(1.0, max(0.0, deviation) / (3.0 * std + 1e-9))
+        self.since_onset = 0 if onset else self.since_onset + 1
+
+        self.mean += self.alpha * deviation
+        self.var = (1 - self.alpha) * (self.var + self.alpha * deviation * deviation)
+        self.prev_flux = flux
+        self.frames += 1
+
+        # --- Tempo: running autocorrelation of onset strength ---
+        novelty = max(0.0, deviation)
+        size = len(self.history)
+        self.history[self.pos] = novelty
+        lagged = self.history[(self.pos - self.lags) % size]
+        self.autocorr = self.autocorr * self.ac_decay + novelty * lagged
+        self.pos = (self.pos + 1) % size
+        if self.autocorr.any():
+            best = float(self.lags[int(np.argmax(self.autocorr))])
+            self.period += 0.1 * (best - self.period)
+
+        # --- Beat phase: advance one frame, lock toward onsets ---
+        self.phase += 1.0 / self.period
+        beat = self.phase >= 1.0
+        if beat:
+            self.phase -= 1.0
+        if onset:
+            error = self.phase if self.phase < 0.5 else self.phase - 1.0
+            self.phase = (self.phase - 0.3 * error) % 1.0
+
+        return BeatInfo(onset, strength, beat, self.phase, self.tempo)
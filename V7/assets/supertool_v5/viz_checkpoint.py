@@ -0,0 +1,129 @@
+"""Segmented output with checkpoint/resume for long viz_master.py renders.
+
+With --segment-dir, viz_master encodes its own output as fixed-length MP4
+segments instead of writing raw frames to stdout. After each segment is
+encoded, the visualizer state (arrays, particle lists, RNG state) and the next
+frame index are pickled next to it. Re-running the same command resumes after
+the last completed segment; once the input ends the segments are joined with
+a stream copy and muxed with the original audio.
+
+The segment directory is self-contained, so an interrupted render can be
+copied to another machine and finished there.
+"""
+import glob
+import os
+import pickle
+import subprocess
+
+import pygame
+
+DEFAULT_ENCODE_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "18", "-pix_fmt", "yuv420p"]
+
+
+def visualizer_state(viz):
+    """Everything on a visualizer except pygame surfaces, which __init__ rebuilds."""
+    return {k: v for k, v in vars(viz).items() if not isinstance(v, pygame.Surface)}
+
+
+def restore_visualizer_state(viz, state):
+    vars(viz).update(state)
+
+
+class SegmentedRender:
+    def __init__(self, seg_dir, width, height, fps, segment_seconds, settings, encode_args=None):
+        self.dir = seg_dir
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.segment_frames = max(1, int(round(segment_seconds * fps)))
+        # Anything that changes the picture must match when resuming
+        self.settings = dict(settings, width=width, height=height, fps=fps, segment_frames=self.segment_frames)
+        self.encode_args = encode_args or DEFAULT_ENCODE_ARGS
+        os.makedirs(seg_dir, exist_ok=True)
+
+    def segment_path(self, n):
+        return os.path.join(self.dir, f"seg_{n:05d}.mp4")
+
+    def checkpoint_path(self, n):
+        return os.path.join(self.dir, f"seg_{n:05d}.ckpt")
+
+    def load_latest(self):
+        """Newest checkpoint whose segment is on disk, or None to start fresh."""
+        for path in sorted(glob.glob(os.path.join(self.dir, "seg_*.ckpt")), reverse=True):
+            try:
+                with open(path, "rb") as fh:
+                    ckpt = pickle.load(fh)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+            if ckpt["settings"] != self.settings:
+                raise ValueError(f"{self.dir} holds a render with different settings; use a new --segment-dir")
+            if os.path.exists(self.segment_path(ckpt["segment"])):
+                # Keep encoding with the same x264 settings so the segments still join by stream copy
+                self.encode_args = ckpt.get("encode_args", self.encode_args)
+                return ckpt
+        return None
+
+    def _start_encoder(self, n):
+        cmd = [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "rawvideo", "-pixel_format", "rgb24",
+            "-video_size", f"{self.width}x{self.height}", "-framerate", str(self.fps), "-i", "-",
+            *self.encode_args, self.segment_path(n)
+        ]
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def _finish_segment(self, proc, n, viz, next_frame, final):
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed while encoding segment {n}")
+        ckpt = {
+            "segment": n,
+            "frame": next_frame,
+            "final": final,
+            "settings": self.settings,
+            "encode_args": self.encode_args,
+            "state": visualizer_state(viz),
+        }
+        tmp = self.checkpoint_path(n) + ".tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(ckpt, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.checkpoint_path(n))
+
+    def run(self, viz, frames, canvas, first_segment=0):
+        """Render `frames` into segments starting at `first_segment`; returns the segment count."""
+        n = first_segment
+        proc = None
+        count = 0
+        next_frame = 0
+        for frame in frames:
+            if proc is None:
+                proc = self._start_encoder(n)
+            viz.update(frame, canvas)
+            proc.stdin.write(canvas.tobytes())
+            count += 1
+            next_frame = frame.index + 1
+            if count == self.segment_frames:
+                self._finish_segment(proc, n, viz, next_frame, final=False)
+                n += 1
+                proc = None
+                count = 0
+        if proc is not None:
+            self._finish_segment(proc, n, viz, next_frame, final=True)
+            n += 1
+        return n
+
+    def concat(self, n_segments, output, audio_path=None):
+        list_path = os.path.join(self.dir, "segments.txt")
+        with open(list_path, "w", encoding="utf-8") as fh:
+            for i in range(n_segments):
+                path = os.path.abspath(self.segment_path(i)).replace("'", "'\\''")
+                fh.write(f"file '{path}'\n")
+
+        cmd = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a", "-c:v", "copy",
+                    "-c:a", "aac", "-b:a", "192k", "-shortest"]
+        else:
+            cmd += ["-c", "copy"]
+        cmd.append(output)
+        subprocess.run(cmd, check=True)
@@ -9,56 +9,61 @@ import numpy as np
 import pygame
 import argparse
 import math
-import random
+
+from encode_tuner import encode_args
+from viz_checkpoint import SegmentedRender, restore_visualizer_state
+from viz_features import FeatureReader, FrameAnalyzer, analyze_to_file, decode_pcm, read_pcm_chunks
+from viz_palettes import get_palette, has_palette, load_palette_file
+from viz_raster import BACKENDS, make_canvas
 
 # --- Configuration ---
 FPS = 30
 SAMPLE_RATE = 44100
 CHUNK_SIZE = int(SAMPLE_RATE / FPS)
 
-def get_audio_chunk():
-    raw_data = sys.stdin.buffer.read(CHUNK_SIZE * 2)
-    if not raw_data or len(raw_data) < CHUNK_SIZE * 2:
-        return None
-    return np.frombuffer(raw_data, dtype=np.int16) / 32768.0
-
-def get_fft(audio_data):
-    window = np.hanning(len(audio_data))
-    fft_data = np.abs(np.fft.rfft(audio_data * window))
-    return fft_data
+def band_means(fft_data, bins):
+    """Mean magnitude between consecutive bin edges (vectorized, empty bands widened to 1 bin)."""
+    n = len(fft_data)
+    start = np.minimum(bins[:-1], n)
+    end = np.minimum(np.maximum(bins[1:], bins[:-1] + 1), n)
+    csum = np.concatenate(([0.0], np.cumsum(fft_data)))
+    count = end - start
+    return np.where(count > 0, (csum[end] - csum[start]) / np.maximum(count, 1), 0.0)
 
 # --- Visualizers ---
 
 class LavaLamp:
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None):
         self.width = width
         self.height = height
+        self.rng = np.random.default_rng(seed)
         self.blobs = []
         self.colors = [
             (255, 69, 0), (255, 140, 0), (138, 43, 226), (255, 0, 255)
         ]
 
-    def update(self, audio_data, screen):
-        fft_data = get_fft(audio_data)
+    def update(self, frame, canvas):
+        fft_data = frame.fft
         bass_range = int(len(fft_data) * 0.1)
         bass_energy = np.mean(fft_data[:bass_range]) / 5.0
         bass_energy = np.clip(bass_energy, 0, 1)
 
-        if bass_energy > 0.4 and random.random() < 0.2:
-            radius = random.randint(30, 80)
-            x = random.randint(0, self.width)
-            speed = random.uniform(2, 5)
-            color = random.choice(self.colors)
-            self.blobs.append({'x': x, 'y': self.height + radius, 'r': radius, 'base_r': radius, 's': speed, 'c': color, 'phase': random.uniform(0, 6.28)})
+        # Spawn on detected onsets instead of random chance on raw bass level
+        if frame.onset and bass_energy > 0.2:
+            radius = int(self.rng.integers(30, 81))
+            x = int(self.rng.integers(0, self.width + 1))
+            speed = self.rng.uniform(2, 5)
+            color = self.colors[self.rng.integers(len(self.colors))]
+            self.blobs.append({'x': x, 'y': self.height + radius, 'r': radius, 'base_r': radius, 's': speed, 'c': color, 'phase': self.rng.uniform(0, 6.28)})
 
         if len(self.blobs) < 5:
-             radius = random.randint(30, 80)
-             x = random.randint(0, self.width)
-             speed = random.uniform(2, 5)
-             color = random.choice(self.colors)
-             self.blobs.append({'x': x, 'y': self.height + radius, 'r': radius, 'base_r': radius, 's': speed, 'c': color, 'phase': random.uniform(0, 6.28)})
+             radius = int(self.rng.integers(30, 81))
+             x = int(self.rng.integers(0, self.width + 1))
+             speed = self.rng.uniform(2, 5)
+             color = self.colors[self.rng.integers(len(self.colors))]
+             self.blobs.append({'x': x, 'y': self.height + radius, 'r': radius, 'base_r': radius, 's': speed, 'c': color, 'phase': self.rng.uniform(0, 6.28)})
 
-        screen.fill((20, 0, 20))
+        canvas.fill((20, 0, 20))
         
         for b in self.blobs:
             b['y'] -= b['s'] * (1 + bass_energy * 2)
@@ -66,82 +71,130 @@ class LavaLamp:
             b['x'] += math.sin(b['phase']) * 2
             target_r = b['base_r'] * (1 + bass_energy * 0.5)
             b['r'] = b['r'] * 0.9 + target_r * 0.1
-            
-            # Draw blob
-            surf = pygame.Surface((int(b['r']*2), int(b['r']*2)), pygame.SRCALPHA)
-            pygame.draw.circle(surf, (*b['c'], 150), (int(b['r']), int(b['r'])), int(b['r']))
-            pygame.draw.circle(surf, (255, 255, 255, 200), (int(b['r']), int(b['r'])), int(b['r']*0.5))
-            screen.blit(surf, (int(b['x']-b['r']), int(b['y']-b['r'])))
+
+        # Draw blobs (colored body + bright core)
+        if self.blobs:
+            centers = [(b['x'], b['y']) for b in self.blobs]
+            radii = np.array([b['r'] for b in self.blobs])
+            canvas.circles(centers, radii, [b['c'] for b in self.blobs], alpha=150)
+            canvas.circles(centers, radii * 0.5, (255, 255, 255), alpha=200)
 
         self.blobs = [b for b in self.blobs if b['y'] > -b['r']*2]
 
 class Bars:
-    def __init__(self, width, height):
+    def __init__(self, width, height, color_name="rainbow"):
         self.width = width
         self.height = height
         self.num_bars = 64
         self.bar_width = width / self.num_bars
         self.heights = np.zeros(self.num_bars)
+        self.palette = get_palette(color_name, "rainbow")
 
-    def update(self, audio_data, screen):
-        fft_data = get_fft(audio_data)
+    def update(self, frame, canvas):
+        fft_data = frame.fft
         # Logarithmic binning for better visual spread
         bins = np.logspace(0, np.log10(len(fft_data)), self.num_bars + 1).astype(int)
         
-        screen.fill((10, 10, 15))
-        
-        for i in range(self.num_bars):
-            start, end = bins[i], bins[i+1]
-            if end <= start: end = start + 1
-            
-            # Get magnitude
-            mag = np.mean(fft_data[start:end]) if start < len(fft_data) else 0
-            mag = np.log10(mag + 1) * 20 # dB scale-ish
-            
-            # Smooth decay
-            target_h = min(mag * 10, self.height)
-            self.heights[i] = self.heights[i] * 0.8 + target_h * 0.2
-            
-            h = self.heights[i]
-            
-            # Color gradient based on height
-            hue = (i / self.num_bars) * 360
-            color = pygame.Color(0)
-            color.hsla = (hue, 100, 50, 100)
-            
-            rect = pygame.Rect(i * self.bar_width, self.height - h, self.bar_width - 2, h)
-            pygame.draw.rect(screen, color, rect)
-            
-            # Reflection
-            rect_ref = pygame.Rect(i * self.bar_width, self.height, self.bar_width - 2, h * 0.3)
-            pygame.draw.rect(screen, (color.r//4, color.g//4, color.b//4), rect_ref)
+        canvas.fill((10, 10, 15))
+        
+        # Get magnitudes
+        mags = band_means(fft_data, bins)
+        mags = np.log10(mags + 1) * 20 # dB scale-ish
+
+        # Smooth decay
+        target_h = np.minimum(mags * 10, self.height)
+        self.heights = self.heights * 0.8 + target_h * 0.2
+        h = self.heights
+
+        # Color gradient across the bars, or by height for intensity palettes
+        if self.palette.by_position:
+            colors = self.palette.table(self.num_bars)
+        else:
+            colors = self.palette.map(h / self.height)
+
+        x = np.arange(self.num_bars) * self.bar_width
+        w = np.full(self.num_bars, self.bar_width - 2)
+        canvas.rects(np.column_stack([x, self.height - h, w, h]), colors)
+
+        # Reflection
+        canvas.rects(np.column_stack([x, np.full(self.num_bars, self.height), w, h * 0.3]), colors // 4)
+
+def column_envelopes(samples, columns):
+    """Split samples into `columns` blocks; returns per-block (min, max, rms) arrays.
+
+    Blocks hold every sample between their edges, so peaks between columns are
+    never skipped, and min/max also take in the first sample of the next block
+    so neighbouring columns always join up. With fewer samples than columns,
+    blocks share samples.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    edges = (np.arange(columns) * len(samples)) // columns
+    following = samples[np.append(edges[1:], len(samples) - 1)]
+    mins = np.minimum(np.minimum.reduceat(samples, edges), following)
+    maxs = np.maximum(np.maximum.reduceat(samples, edges), following)
+    counts = np.diff(np.append(edges, len(samples)))
+    sums = np.add.reduceat(samples * samples, edges)
+    rms = np.sqrt(np.where(counts > 0, sums / np.maximum(counts, 1), samples[edges] ** 2))
+    return mins, maxs, rms.astype(np.float32)
 
 class Waveform:
-    def __init__(self, width, height):
+    """Oscilloscope-style waveform.
+
+    styles: "line"     - polyline through each column's peak sample
+            "envelope" - filled min/max envelope with the RMS band inside
+            "history"  - scrolling envelope; each frame adds `history_step`
+                         columns on the right, older columns live in a ring buffer
+    """
+    STYLES = ("line", "envelope", "history")
+
+    def __init__(self, width, height, style="line", history_step=4):
         self.width = width
         self.height = height
-        self.points = []
-
-    def update(self, audio_data, screen):
-        screen.fill((0, 0, 0))
-        
-        # Subsample to fit width
-        step = max(1, len(audio_data) // self.width)
-        points = []
-        for x in range(0, self.width):
-            idx = int(x / self.width * len(audio_data))
-            y = int(self.height/2 + audio_data[idx] * self.height/2)
-            points.append((x, y))
-            
-        if len(points) > 1:
-            pygame.draw.lines(screen, (0, 255, 200), False, points, 2)
-            # Glow effect
-            pygame.draw.lines(screen, (0, 100, 80), False, points, 6)
+        self.style = style
+        self.history_step = max(1, history_step)
+        # Ring buffer of (min, max, rms) per screen column, oldest at self.head
+        self.history = np.zeros((3, width), dtype=np.float32)
+        self.head = 0
+        self.xs = np.arange(width)
+
+    def to_y(self, values):
+        return (self.height / 2 + values * self.height / 2).astype(int)
+
+    def draw_envelope(self, canvas, mins, maxs, rms):
+        canvas.spans(self.xs, self.to_y(mins), self.to_y(maxs), (0, 100, 80))
+        canvas.spans(self.xs, self.to_y(np.maximum(mins, -rms)), self.to_y(np.minimum(maxs, rms)), (0, 255, 200))
+
+    def update(self, frame, canvas):
+        audio_data = frame.samples
+        canvas.fill((0, 0, 0))
+
+        if self.style == "history":
+            # Only the new columns are reduced; the rest is read back from the ring
+            step = min(self.history_step, self.width)
+            new = np.stack(column_envelopes(audio_data, step))
+            idx = (self.head + np.arange(step)) % self.width
+            self.history[:, idx] = new
+            self.head = (self.head + step) % self.width
+            order = (self.head + self.xs) % self.width
+            self.draw_envelope(canvas, *self.history[:, order])
+            return
+
+        mins, maxs, rms = column_envelopes(audio_data, self.width)
+        if self.style == "envelope":
+            self.draw_envelope(canvas, mins, maxs, rms)
+            return
+
+        peaks = np.where(-mins > maxs, mins, maxs)
+        points = np.column_stack([self.xs, self.to_y(peaks)])
+        canvas.polyline(points, (0, 255, 200), 2)
+        # Glow effect
+        canvas.polyline(points, (0, 100, 80), 6)
 
 class Particles:
-    def __init__(self, width, height, color_name="white"):
+    def __init__(self, width, height, color_name="white", seed=None):
         self.width = width
         self.height = height
+        self.rng = np.random.default_rng(seed)
         self.particles = []
         self.center = (width//2, height//2)
         self.color_name = color_name
@@ -154,45 +207,56 @@ class Particles:
             "neon": [(255, 0, 255), (0, 255, 255), (255, 255, 0)],
             "matrix": [(0, 255, 0), (50, 200, 50), (100, 255, 100)]
         }
-        self.current_palette = self.palettes.get(color_name, self.palettes["white"])
-
-    def update(self, audio_data, screen):
-        fft_data = get_fft(audio_data)
+        if color_name in self.palettes:
+            self.current_palette = self.palettes[color_name]
+        elif has_palette(color_name):
+            # Palettes from --palette-file: pick among their stop colors
+            self.current_palette = get_palette(color_name).colors
+        else:
+            self.current_palette = self.palettes["white"]
+
+    def update(self, frame, canvas):
+        fft_data = frame.fft
         bass = np.mean(fft_data[:10])
         mid = np.mean(fft_data[10:100])
         
         # Spawn particles - INCREASED RATE
         # Spawn more particles based on energy
         spawn_count = int(mid * 2) # Increased multiplier
+        # Burst on the beat so the cloud breathes with the groove
+        if frame.beat:
+            spawn_count += int(20 + 40 * frame.onset_strength)
         if spawn_count > 0:
             for _ in range(spawn_count):
-                angle = random.uniform(0, 6.28)
-                speed = random.uniform(2, 15) + bass * 2 # Faster
-                color = random.choice(self.current_palette)
+                angle = self.rng.uniform(0, 6.28)
+                speed = self.rng.uniform(2, 15) + bass * 2 # Faster
+                color = self.current_palette[self.rng.integers(len(self.current_palette))]
                 self.particles.append({
                     'x': self.center[0], 'y': self.center[1],
                     'vx': math.cos(angle) * speed, 'vy': math.sin(angle) * speed,
-                    'life': random.randint(100, 255), 
+                    'life': int(self.rng.integers(100, 256)), 
                     'color': color,
-                    'size': random.randint(2, 5)
+                    'size': int(self.rng.integers(2, 6))
                 })
 
-        screen.fill((0, 0, 0))
+        canvas.fill((0, 0, 0))
         
-        # Update and draw
+        # Update
         for p in self.particles:
             p['x'] += p['vx']
             p['y'] += p['vy']
             p['life'] -= 3 # Slower fade for longer trails
-            
-            if p['life'] > 0:
-                # Fade alpha
-                # Pygame surface for alpha
-                s = pygame.Surface((p['size']*2, p['size']*2), pygame.SRCALPHA)
-                c = (*p['color'], p['life'])
-                pygame.draw.circle(s, c, (p['size'], p['size']), p['size'])
-                screen.blit(s, (int(p['x']-p['size']), int(p['y']-p['size'])))
-        
+
+        # Draw living particles in one batch, alpha fades with life
+        alive = [p for p in self.particles if p['life'] > 0]
+        if alive:
+            canvas.circles(
+                [(p['x'], p['y']) for p in alive],
+                [p['size'] for p in alive],
+                [p['color'] for p in alive],
+                alpha=[p['life'] for p in alive],
+            )
+
         self.particles = [p for p in self.particles if p['life'] > 0 and 0 <= p['x'] <= self.width and 0 <= p['y'] <= self.height]
 
 class SpectrumRadial:
@@ -204,6 +268,7 @@ class SpectrumRadial:
         self.num_bars = 120
         self.bars = np.zeros(self.num_bars)
         self.color_name = color_name
+        self.palette = get_palette(color_name)
         self.image_surf = None
         self.logo_surf = None
         self.logo_layer = logo_layer
@@ -228,72 +293,55 @@ class SpectrumRadial:
             except Exception as e:
                 sys.stderr.write(f"Error loading logo: {e}\n")
         
-    def update(self, audio_data, screen):
-        fft_data = get_fft(audio_data)
+    def update(self, frame, canvas):
+        fft_data = frame.fft
         # Logarithmic binning
         bins = np.logspace(0, np.log10(len(fft_data)), self.num_bars + 1).astype(int)
         
-        screen.fill((0, 0, 0))
+        canvas.fill((0, 0, 0))
         
         # 1. Draw Background Image (Always behind bars)
         if self.image_surf:
-            screen.blit(self.image_surf, (0, 0))
+            canvas.blit(self.image_surf, (0, 0))
 
         # 2. Draw Logo (If layer is 'back')
         if self.logo_surf and self.logo_layer == "back":
             logo_rect = self.logo_surf.get_rect(center=self.center)
-            screen.blit(self.logo_surf, logo_rect)
+            canvas.blit(self.logo_surf, logo_rect.topleft)
         
         # 3. Draw circular guide
-        pygame.draw.circle(screen, (20, 20, 20), self.center, self.radius, 1)
+        canvas.circles([self.center], self.radius, (20, 20, 20), width=1)
         
         # 4. Draw Bars
-        for i in range(self.num_bars):
-            start, end = bins[i], bins[i+1]
-            if end <= start: end = start + 1
-            mag = np.mean(fft_data[start:end]) if start < len(fft_data) else 0
-            mag = np.log10(mag + 1) * 20
-            
-            # Smooth
-            self.bars[i] = self.bars[i] * 0.85 + mag * 0.15
-            h = self.bars[i] * 5
-            
-            angle = (i / self.num_bars) * 2 * math.pi
-            
-            # Start point (on circle)
-            start_x = self.center[0] + math.cos(angle) * self.radius
-            start_y = self.center[1] + math.sin(angle) * self.radius
-            
-            # End point (outwards)
-            end_x = self.center[0] + math.cos(angle) * (self.radius + h)
-            end_y = self.center[1] + math.sin(angle) * (self.radius + h)
-            
-            # Color Logic
-            color = pygame.Color(255, 255, 255)
-            if self.color_name == "rainbow":
-                hue = (i / self.num_bars) * 360
-                color.hsla = (hue, 100, 50, 100)
-            elif self.color_name == "fire":
-                val = min(255, int(h * 10))
-                color = (255, val, 0)
-            elif self.color_name == "ice":
-                val = min(255, int(h * 10))
-                color = (0, val, 255)
-            elif self.color_name == "matrix":
-                val = min(255, int(h * 10))
-                color = (0, 255, val)
-            
-            pygame.draw.line(screen, color, (start_x, start_y), (end_x, end_y), 3)
-            
-            # Mirror (Inwards)
-            end_x_in = self.center[0] + math.cos(angle) * (self.radius - h * 0.3)
-            end_y_in = self.center[1] + math.sin(angle) * (self.radius - h * 0.3)
-            pygame.draw.line(screen, (color.r//3, color.g//3, color.b//3), (start_x, start_y), (end_x_in, end_y_in), 3)
+        mags = band_means(fft_data, bins)
+        mags = np.log10(mags + 1) * 20
+
+        # Smooth
+        self.bars = self.bars * 0.85 + mags * 0.15
+        h = self.bars * 5
+
+        angle = np.arange(self.num_bars) / self.num_bars * 2 * math.pi
+        direction = np.column_stack([np.cos(angle), np.sin(angle)])
+        center = np.array(self.center, dtype=float)
+
+        # Start points on the circle, bars outwards, mirror inwards
+        starts = center + direction * self.radius
+        ends = center + direction * (self.radius + h)[:, None]
+        ends_in = center + direction * (self.radius - h * 0.3)[:, None]
+
+        # Color: around the circle for position palettes, by bar length otherwise
+        if self.palette.by_position:
+            colors = self.palette.table(self.num_bars)
+        else:
+            colors = self.palette.map(h * 10 / 255)
+
+        canvas.lines(starts, ends, colors, 3)
+        canvas.lines(starts, ends_in, colors // 3, 3)
 
         # 5. Draw Logo (If layer is 'front')
         if self.logo_surf and self.logo_layer == "front":
             logo_rect = self.logo_surf.get_rect(center=self.center)
-            screen.blit(self.logo_surf, logo_rect)
+            canvas.blit(self.logo_surf, logo_rect.topleft)
 
 class Terrain3D:
     def __init__(self, width, height, color_name="cyan"):
@@ -308,108 +356,59 @@ class Terrain3D:
         self.z_map = np.zeros((self.rows, self.cols))
         self.speed = 2
         self.color_name = color_name
+        self.palette = get_palette(color_name, "cyan")
         
-    def update(self, audio_data, screen):
-        fft_data = get_fft(audio_data)
+    def update(self, frame, canvas):
+        fft_data = frame.fft
         
         # Shift rows down (scrolling effect)
         self.z_map[1:] = self.z_map[:-1]
         
         # New row based on FFT
-        new_row = np.zeros(self.cols)
         bins = np.linspace(0, len(fft_data)//4, self.cols).astype(int) # Linear for terrain looks better usually
-        for i in range(self.cols):
-            idx = bins[i]
-            val = fft_data[idx] if idx < len(fft_data) else 0
-            new_row[i] = np.log10(val + 1) * 50
-        self.z_map[0] = new_row
+        self.z_map[0] = np.log10(fft_data[bins] + 1) * 50
         
-        screen.fill((0, 0, 10))
+        canvas.fill((0, 0, 10))
         
         # Simple 3D Projection
         # Center of screen is vanishing point
         cx, cy = self.width // 2, self.height // 3
-        
-        for y in range(self.rows - 1):
-            for x in range(self.cols - 1):
-                # We only draw lines, no filled polys for speed
-                
-                # Calculate 3D coords for 4 points of a quad
-                # x goes -1 to 1, y goes 0 to 1 (depth)
-                
-                def project(r, c):
-                    # Perspective projection
-                    # Z grows with row index (y)
-                    z_depth = 100 + r * 20
-                    scale = 400 / z_depth
-                    
-                    x_pos = (c - self.cols/2) * self.cell_w
-                    y_pos = 200 # Floor level
-                    y_pos -= self.z_map[r, c] # Height
-                    
-                    px = cx + x_pos * scale
-                    py = cy + y_pos * scale + r * 5 # Tilt
-                    return (px, py)
-
-                p1 = project(y, x)
-                p2 = project(y, x+1)
-                # p3 = project(y+1, x+1) # Not needed for lines
-                p4 = project(y+1, x)
-                
-                # Color based on height
-                h_val = self.z_map[y, x]
-                c_val = min(255, max(50, int(h_val * 5)))
-                
-                if self.color_name == "cyan":
-                    color = (0, c_val, c_val)
-                elif self.color_name == "magenta":
-                    color = (c_val, 0, c_val)
-                elif self.color_name == "green":
-                    color = (0, c_val, 0)
-                elif self.color_name == "red":
-                    color = (c_val, 0, 0)
-                else:
-                    color = (c_val, c_val, c_val)
-                
-                # Draw grid lines
-                pygame.draw.line(screen, color, p1, p2, 1)
-                pygame.draw.line(screen, color, p1, p4, 1)
+
+        # Perspective projection of every grid point at once
+        # Z grows with row index, x goes -cols/2..cols/2 around the center
+        r = np.arange(self.rows)[:, None]
+        c = np.arange(self.cols)[None, :]
+        scale = 400 / (100 + r * 20)
+        x_pos = (c - self.cols/2) * self.cell_w
+        y_pos = 200 - self.z_map # Floor level minus height
+        px = cx + x_pos * scale
+        py = cy + y_pos * scale + r * 5 # Tilt
+        pts = np.stack([np.broadcast_to(px, self.z_map.shape), py], axis=-1)
+
+        # Color and brightness based on height
+        level = np.clip((self.z_map[:-1, :-1] * 5).astype(int), 50, 255).ravel() / 255
+        colors = (self.palette.map(level) * level[:, None]).astype(int)
+
+        # Grid lines only (no filled polys for speed): right and down from each cell corner
+        p1 = pts[:-1, :-1].reshape(-1, 2)
+        canvas.lines(p1, pts[:-1, 1:].reshape(-1, 2), colors, 1)
+        canvas.lines(p1, pts[1:, :-1].reshape(-1, 2), colors, 1)
 
 class RealFire:
-    def __init__(self, width, height):
+    def __init__(self, width, height, seed=None):
         self.width = width
         self.height = height
+        self.rng = np.random.default_rng(seed)
         self.scale = 4
         self.w = width // self.scale
         self.h = height // self.scale
         self.buffer = np.zeros((self.h, self.w), dtype=np.uint8)
         
-        # Create palette (Black -> Red -> Orange -> Yellow -> White)
-        self.palette = []
-        for i in range(256):
-            if i < 64: # Black to Red
-                r = i * 4
-                g = 0
-                b = 0
-            elif i < 128: # Red to Yellow
-                r = 255
-                g = (i - 64) * 4
-                b = 0
-            elif i < 192: # Yellow to White
-                r = 255
-                g = 255
-                b = (i - 128) * 4
-            else: # White
-                r = 255
-                g = 255
-                b = 255
-            self.palette.append((min(255,r), min(255,g), min(255,b)))
-            
-        self.surf = pygame.Surface((self.w, self.h), 0, 8)
-        self.surf.set_palette(self.palette)
-
-    def update(self, audio_data, screen):
-        fft_data = get_fft(audio_data)
+        # Heat value -> RGB (Black -> Red -> Orange -> Yellow -> White)
+        self.lut = get_palette("flame").lut
+
+    def update(self, frame, canvas):
+        fft_data = frame.fft
         bass = np.mean(fft_data[:10])
         mid = np.mean(fft_data[10:50])
         
@@ -418,7 +417,7 @@ class RealFire:
         intensity = int(min(255, 150 + bass * 100))
         
         # Randomize source slightly
-        noise = np.random.randint(0, 50, self.w)
+        noise = self.rng.integers(0, 50, self.w)
         source = np.clip(intensity - noise, 0, 255).astype(np.uint8)
         self.buffer[-1, :] = source
         
@@ -433,7 +432,7 @@ class RealFire:
         base_decay = 3
         if mid > 0.5: base_decay = 1
         
-        decay = np.random.randint(0, base_decay + 2, src.shape)
+        decay = self.rng.integers(0, base_decay + 2, src.shape)
         
         # Horizontal spread (Wind/Turbulence)
         # We create 3 versions of src: shifted left, center, shifted right
@@ -442,7 +441,7 @@ class RealFire:
         roll_c = src
         
         # Randomly choose which pixel to pull from for each spot
-        choices = np.random.randint(0, 3, src.shape)
+        choices = self.rng.integers(0, 3, src.shape)
         new_vals = np.choose(choices, [roll_l, roll_c, roll_r])
         
         # Apply decay
@@ -453,14 +452,8 @@ class RealFire:
         self.buffer[:-1] = new_vals
         
         # 3. Render
-        # Blit the 8-bit buffer to the 8-bit surface
-        # surfarray.blit_array expects (w, h), so we transpose our (h, w) buffer
-        pygame.surfarray.blit_array(self.surf, self.buffer.T)
-        
-        # Scale up to full screen
-        # Convert 8-bit surface to 32-bit for scaling to main screen
-        surf_32 = self.surf.convert(32)
-        pygame.transform.scale(surf_32, (self.width, self.height), screen)
+        # Map heat through the palette and scale up to full screen
+        canvas.blit_array(self.lut[self.buffer])
 
 class ReactiveText:
     def __init__(self, width, height, text=None, image_path=None):
@@ -493,25 +486,23 @@ class ReactiveText:
             font = pygame.font.Font(None, 200)
             self.surface = font.render(display_text, True, (255, 255, 255))
 
-    def update(self, audio_data, screen):
-        fft_data = get_fft(audio_data)
+    def update(self, frame, canvas):
+        fft_data = frame.fft
         bass_range = int(len(fft_data) * 0.1)
         bass_energy = np.mean(fft_data[:bass_range]) / 5.0
         bass_energy = np.clip(bass_energy, 0, 1)
         
-        screen.fill((10, 10, 15))
+        canvas.fill((10, 10, 15))
         
         # Draw background effect (faint radial waves)
         center = (self.width // 2, self.height // 2)
         
         # Pulse circles
-        for i in range(3):
-            r = int(min(self.width, self.height) * (0.3 + i*0.1 + bass_energy * 0.1))
-            alpha = int(50 * (1 - i*0.2))
-            pygame.draw.circle(screen, (50, 0, 50), center, r, 2)
+        radii = [int(min(self.width, self.height) * (0.3 + i*0.1 + bass_energy * 0.1)) for i in range(3)]
+        canvas.circles([center] * 3, radii, (50, 0, 50), width=2)
 
-        # Scale logo/text
-        scale = 1.0 + bass_energy * 0.3
+        # Scale logo/text (bass level plus a kick on every beat)
+        scale = 1.0 + bass_energy * 0.2 + frame.pulse * 0.1
         w = int(self.surface.get_width() * scale)
         h = int(self.surface.get_height() * scale)
         
@@ -521,7 +512,7 @@ class ReactiveText:
         x = (self.width - w) // 2
         y = (self.height - h) // 2
         
-        screen.blit(scaled_surf, (x, y))
+        canvas.blit(scaled_surf, (x, y))
         
         # If image mode, print path for debugging (only once)
         if self.image_path and not hasattr(self, 'debug_printed'):
@@ -529,7 +520,39 @@ class ReactiveText:
              self.debug_printed = True
 
 
+def analyze_main(argv):
+    parser = argparse.ArgumentParser(prog="viz_master.py analyze", description="Precompute audio features for --features renders")
+    parser.add_argument("input", help="Audio file to analyze, or - for 16-bit mono PCM on stdin")
+    parser.add_argument("-o", "--output", default=None, help="Output .vizfeat path (default: <input>.vizfeat)")
+    parser.add_argument("--fps", type=int, default=FPS, help="Video frame rate the features are sliced for")
+    parser.add_argument("--sample-rate", type=int, default=SAMPLE_RATE, help="Decode sample rate")
+    args = parser.parse_args(argv)
+
+    if args.input == "-":
+        out_path = args.output or "stdin.vizfeat"
+        frames = analyze_to_file(sys.stdin.buffer, out_path, args.fps, args.sample_rate)
+    else:
+        if not os.path.exists(args.input):
+            sys.stderr.write(f"Error: File not found: {args.input}\n")
+            sys.exit(1)
+        out_path = args.output or os.path.splitext(args.input)[0] + ".vizfeat"
+        proc = decode_pcm(args.input, args.sample_rate)
+        try:
+            frames = analyze_to_file(proc.stdout, out_path, args.fps, args.sample_rate)
+        finally:
+            proc.stdout.close()
+            proc.wait()
+        if proc.returncode != 0:
+            sys.stderr.write(f"Error: ffmpeg could not decode {args.input}\n")
+            sys.exit(1)
+    sys.stderr.write(f"Wrote {frames} frames @ {args.fps} fps to {out_path}\n")
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "analyze":
+        analyze_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser()
     parser.add_argument("--width", type=int, default=1280)
     parser.add_argument("--height", type=int, default=720)
@@ -539,41 +562,99 @@ def main():
     parser.add_argument("--logo", type=str, default=None, help="Path to logo for radial mode")
     parser.add_argument("--logo_layer", type=str, default="front", choices=["front", "back"], help="Logo layer position")
     parser.add_argument("--logo_scale", type=float, default=0.4, help="Logo scale relative to screen height (0.1 to 1.0)")
-    parser.add_argument("--color", type=str, default="white", help="Color palette name")
+    parser.add_argument("--wave-style", type=str, default="line", choices=Waveform.STYLES, help="Waveform mode drawing style")
+    parser.add_argument("--color", type=str, default=None, help="Color palette name (see viz_palettes.py); bars default to rainbow, other modes to white")
+    parser.add_argument("--palette-file", type=str, default=None, help="JSON file with extra gradient palettes")
+    parser.add_argument("--features", type=str, default=None, help="Read a .vizfeat file (from 'analyze') instead of PCM on stdin")
+    parser.add_argument("--start-frame", type=int, default=0, help="First frame to render (instant seek with --features)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed; the same seed and input give identical frames")
+    parser.add_argument("--segment-dir", type=str, default=None, help="Encode resumable segments + checkpoints here instead of writing to stdout")
+    parser.add_argument("--segment-seconds", type=float, default=30.0, help="Segment length for --segment-dir")
+    parser.add_argument("--audio", type=str, default=None, help="Audio to mux into --output when segments are joined")
+    parser.add_argument("--output", type=str, default=None, help="Final video file to join segments into")
+    parser.add_argument("--backend", type=str, default="pygame", choices=BACKENDS, help="Drawing backend (numpy is faster for modes with many shapes: terrain, particles, bars, radial)")
     args = parser.parse_args()
 
+    if args.palette_file:
+        try:
+            load_palette_file(args.palette_file)
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"Error loading palettes: {e}\n")
+            sys.exit(1)
+
     pygame.init()
     # Initialize display even for headless to support convert_alpha()
     pygame.display.set_mode((1, 1))
-    screen = pygame.Surface((args.width, args.height))
+    canvas = make_canvas(args.backend, args.width, args.height)
 
     if args.mode == "lava":
-        viz = LavaLamp(args.width, args.height)
+        viz = LavaLamp(args.width, args.height, seed=args.seed)
     elif args.mode == "bars":
-        viz = Bars(args.width, args.height)
+        viz = Bars(args.width, args.height, color_name=args.color or "rainbow")
     elif args.mode == "wave":
-        viz = Waveform(args.width, args.height)
+        viz = Waveform(args.width, args.height, style=args.wave_style)
     elif args.mode == "particles":
-        viz = Particles(args.width, args.height, color_name=args.color)
+        viz = Particles(args.width, args.height, color_name=args.color or "white", seed=args.seed)
     elif args.mode == "radial":
-        viz = SpectrumRadial(args.width, args.height, color_name=args.color, image_path=args.image, logo_path=args.logo, logo_layer=args.logo_layer, logo_scale=args.logo_scale)
+        viz = SpectrumRadial(args.width, args.height, color_name=args.color or "white", image_path=args.image, logo_path=args.logo, logo_layer=args.logo_layer, logo_scale=args.logo_scale)
     elif args.mode == "terrain":
-        viz = Terrain3D(args.width, args.height, color_name=args.color)
+        viz = Terrain3D(args.width, args.height, color_name=args.color or "white")
     elif args.mode == "text":
         viz = ReactiveText(args.width, args.height, text=args.text, image_path=args.image)
     elif args.mode == "fire":
-        viz = RealFire(args.width, args.height)
+        viz = RealFire(args.width, args.height, seed=args.seed)
+
+    fps = FPS
+    start_frame = args.start_frame
+    segments = None
+    first_segment = 0
+    if args.features:
+        features = FeatureReader(args.features)
+        fps = features.fps
+
+    if args.segment_dir:
+        settings = {
+            "mode": args.mode, "color": args.color, "text": args.text, "seed": args.seed,
+            "start_frame": args.start_frame, "backend": args.backend, "wave_style": args.wave_style,
+            "palette_file": args.palette_file
+        }
+        video_args = encode_args(args.mode, args.width, args.height) + ["-pix_fmt", "yuv420p"]
+        segments = SegmentedRender(args.segment_dir, args.width, args.height, fps, args.segment_seconds, settings,
+                                   encode_args=video_args)
+        try:
+            ckpt = segments.load_latest()
+        except ValueError as e:
+            sys.stderr.write(f"Error: {e}\n")
+            sys.exit(1)
+        if ckpt:
+            restore_visualizer_state(viz, ckpt["state"])
+            start_frame = ckpt["frame"]
+            first_segment = ckpt["segment"] + 1
+            sys.stderr.write(f"Resuming after segment {ckpt['segment']} (frame {start_frame})\n")
+
+    if args.features:
+        frames = features.frames(start=start_frame)
+    else:
+        # PCM can't seek: skipped frames still go through the analyzer so beat tracking state matches
+        analyzer = FrameAnalyzer(CHUNK_SIZE, SAMPLE_RATE)
+        frames = (analyzer.process(chunk) for chunk in read_pcm_chunks(sys.stdin.buffer, CHUNK_SIZE))
+        frames = (f for f in frames if f.index >= start_frame)
+
+    if segments:
+        try:
+            n_segments = segments.run(viz, frames, canvas, first_segment)
+            if args.output:
+                segments.concat(n_segments, args.output, args.audio)
+                sys.stderr.write(f"Joined {n_segments} segments into {args.output}\n")
+        except Exception as e:
+            sys.stderr.write(f"Error in viz_master.py: {e}\n")
+            sys.exit(1)
+        return
 
     try:
-        while True:
-            audio = get_audio_chunk()
-            if audio is None:
-                break
-                
-            viz.update(audio, screen)
-            
-            video_data = pygame.image.tostring(screen, "RGB")
-            sys.stdout.buffer.write(video_data)
+        for frame in frames:
+            viz.update(frame, canvas)
+            sys.stdout.buffer.write(canvas.tobytes())
     except Exception as e:
         sys.stderr.write(f"Error in viz_master.py: {e}\n")
         sys.exit(1)
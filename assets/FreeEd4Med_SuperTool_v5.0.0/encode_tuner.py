@@ -0,0 +1,305 @@
+"""Per-machine x264 settings for the Python visualizers (menu: Visualizer Lab -> c).
+
+Flat-color modes (bars, wave) and noisy ones (fire, particles) compress very
+differently, so one "-preset fast -crf 18" is either too slow or too big for
+some of them. Calibration renders a short clip of every viz_master.py mode
+from a synthetic test track, encodes it with each preset / CRF / tune in the
+grid and records encode fps, bitrate and SSIM:
+
+    python3 encode_tuner.py calibrate                  # all modes, 1280x720
+    python3 encode_tuner.py calibrate --modes fire,bars --target-speed 3
+    python3 encode_tuner.py show
+
+Results go to ~/.freeed_media_super_tool/encode_profile.json under this
+machine's id (host name, CPU model and core count), so a shared home folder
+keeps a separate profile per server. Render commands then ask for settings:
+
+    python3 encode_tuner.py args --mode fire --width 1920 --height 1080
+    -> -c:v libx264 -preset veryfast -crf 18 -tune grain
+
+By default the pick is the best-quality setting whose encoder alone runs at
+least --target-speed x real time (scaled from the calibration resolution).
+With --min-ssim the pick is the fastest setting at or above that SSIM
+instead. Without a profile the built-in "-preset fast -crf 18" is used.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".freeed_media_super_tool", "encode_profile.json")
+
+FPS = 30
+SAMPLE_RATE = 44100
+MODES = ("lava", "bars", "wave", "particles", "radial", "terrain", "text", "fire")
+PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow")
+DEFAULT_GRID = {
+    "presets": ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium"),
+    "crfs": ("18", "23"),
+    "tunes": ("none", "animation"),
+}
+DEFAULT_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "18"]
+DEFAULT_TARGET_SPEED = 2.0
+
+
+def machine_id():
+    """Host name, CPU model and core count - what makes encode speeds comparable."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return f"{platform.node()} | {cpu} | {os.cpu_count()} cores"
+
+
+# --- profile file ---
+
+def load_profile(path=None):
+    """This machine's profile, or None if it was never calibrated."""
+    try:
+        with open(path or PROFILE_PATH, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return data.get("machines", {}).get(machine_id())
+
+
+def save_profile(profile, path=None):
+    path = path or PROFILE_PATH
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        data = {}
+    data.setdefault("machines", {})[machine_id()] = profile
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2)
+    os.replace(tmp, path)
+
+
+# --- choosing settings ---
+
+def setting_args(result):
+    args = ["-c:v", "libx264", "-preset", result["preset"], "-crf", str(result["crf"])]
+    if result.get("tune") and result["tune"] != "none":
+        args += ["-tune", result["tune"]]
+    return args
+
+
+def choose(entry, width, height, target_speed=None, min_ssim=None):
+    """Best calibration result of one mode for the wanted output size and target."""
+    scale = entry["width"] * entry["height"] / float(width * height)
+    results = [dict(r, speed=r["fps"] * scale / FPS) for r in entry["results"]]
+    if not results:
+        return None
+    if min_ssim:
+        good = [r for r in results if (r.get("ssim") or 0) >= min_ssim]
+        if good:
+            return max(good, key=lambda r: r["speed"])
+        return max(results, key=lambda r: r.get("ssim") or 0)
+    fast_enough = [r for r in results if r["speed"] >= (target_speed or DEFAULT_TARGET_SPEED)]
+    if not fast_enough:
+        return max(results, key=lambda r: r["speed"])
+    # Quality first (SSIM differences below 0.001 are noise), then the smaller file
+    return max(fast_enough, key=lambda r: (round(r.get("ssim") or 0, 3), -int(r["crf"]), -r["kbps"]))
+
+
+def encode_args(mode, width, height, target_speed=None, min_ssim=None, profile=None, path=None):
+    """ffmpeg video codec arguments for a viz_master mode; built-in defaults without a profile."""
+    profile = profile or load_profile(path)
+    if not profile or mode not in profile.get("modes", {}):
+        return list(DEFAULT_ARGS)
+    if target_speed is None and min_ssim is None:
+        target_speed = profile.get("target_speed")
+        min_ssim = profile.get("min_ssim")
+    best = choose(profile["modes"][mode], width, height, target_speed, min_ssim)
+    return setting_args(best) if best else list(DEFAULT_ARGS)
+
+
+# --- calibration ---
+
+def synthetic_audio(seconds, sample_rate=SAMPLE_RATE):
+    """Deterministic test track: kick on every beat, hats, a pulsing chord and a rising sweep."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    rng = np.random.default_rng(1)
+    beat = t % 0.5
+    kick = np.sin(2 * np.pi * (50 + 80 * np.exp(-beat * 30)) * beat) * np.exp(-beat * 8)
+    offbeat = (t + 0.25) % 0.5
+    hats = rng.standard_normal(len(t)) * np.exp(-offbeat * 40)
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (220.0, 277.2, 329.6)) / 3 * (0.6 + 0.4 * np.sin(2 * np.pi * 0.5 * t))
+    sweep = np.sin(2 * np.pi * (200 * t + 2000 * t * t / seconds))
+    mix = 0.5 * kick + 0.15 * hats + 0.3 * chord + 0.15 * sweep
+    mix *= 0.8 / np.abs(mix).max()
+    return (mix * 32767).astype("<i2").tobytes()
+
+
+def render_frames(mode, pcm, width, height, out_path):
+    """Raw rgb24 frames of one mode for the test track; returns the frame count."""
+    cmd = [sys.executable, os.path.join(SCRIPT_DIR, "viz_master.py"), "--mode", mode,
+           "--width", str(width), "--height", str(height), "--seed", "1"]
+    if mode == "text":
+        cmd += ["--text", "FreeEd4Med"]
+    with open(out_path, "wb") as out:
+        subprocess.run(cmd, input=pcm, stdout=out, stderr=subprocess.DEVNULL, check=True)
+    return os.path.getsize(out_path) // (width * height * 3)
+
+
+def raw_input_args(raw_path, width, height):
+    return ["-f", "rawvideo", "-pixel_format", "rgb24", "-video_size", f"{width}x{height}",
+            "-framerate", str(FPS), "-i", raw_path]
+
+
+def measure_ssim(encoded, raw_path, width, height):
+    cmd = ["ffmpeg", "-v", "info", "-nostats", "-i", encoded, *raw_input_args(raw_path, width, height),
+           "-lavfi", "[0:v]format=yuv420p[a];[1:v]format=yuv420p[b];[a][b]ssim", "-f", "null", "-"]
+    err = subprocess.run(cmd, capture_output=True, text=True).stderr
+    match = re.search(r"All:([0-9.]+)", err)
+    return float(match.group(1)) if match else None
+
+
+def measure(raw_path, width, height, frames, preset, crf, tune, threads, tmp_dir, quality=True):
+    out = os.path.join(tmp_dir, "probe.mp4")
+    result = {"preset": preset, "crf": crf, "tune": tune}
+    cmd = ["ffmpeg", "-y", "-v", "error", *raw_input_args(raw_path, width, height),
+           *setting_args(result), "-pix_fmt", "yuv420p"]
+    if threads:
+        cmd += ["-threads", str(threads)]
+    start = time.perf_counter()
+    subprocess.run(cmd + [out], check=True)
+    seconds = time.perf_counter() - start
+    result["fps"] = round(frames / seconds, 2)
+    result["kbps"] = round(os.path.getsize(out) * 8 / (frames / FPS) / 1000, 1)
+    result["ssim"] = measure_ssim(out, raw_path, width, height) if quality else None
+    os.remove(out)
+    return result
+
+
+def split_list(text):
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def calibrate(args):
+    modes = split_list(args.modes) if args.modes else list(MODES)
+    for mode in modes:
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r} (use {', '.join(MODES)})")
+    presets = split_list(args.presets)
+    for preset in presets:
+        if preset not in PRESETS:
+            raise ValueError(f"unknown preset {preset!r} (use {', '.join(PRESETS)})")
+    crfs = split_list(args.crfs)
+    tunes = split_list(args.tunes)
+
+    profile = load_profile(args.profile) or {"modes": {}}
+    profile.update({
+        "machine": machine_id(),
+        "calibrated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "threads": args.threads,
+        "target_speed": args.target_speed,
+        "min_ssim": args.min_ssim,
+    })
+    pcm = synthetic_audio(args.seconds)
+    grid = [(p, c, t) for p in presets for c in crfs for t in tunes]
+    with tempfile.TemporaryDirectory(prefix="supertool_tune_") as tmp_dir:
+        raw_path = os.path.join(tmp_dir, "frames.rgb")
+        for mode in modes:
+            print(f"\n{mode}: rendering {args.seconds:g}s test clip at {args.width}x{args.height}...")
+            frames = render_frames(mode, pcm, args.width, args.height, raw_path)
+            if not frames:
+                sys.stderr.write(f"Warning: {mode} produced no frames, skipped\n")
+                continue
+            results = []
+            for preset, crf, tune in grid:
+                r = measure(raw_path, args.width, args.height, frames, preset, crf, tune, args.threads, tmp_dir,
+                            quality=not args.no_quality)
+                ssim = f"{r['ssim']:.4f}" if r["ssim"] is not None else "-"
+                print(f"  {preset:<10} crf {crf:<3} tune {tune:<10} {r['fps']:7.1f} fps "
+                      f"({r['fps'] / FPS:5.1f}x)  {r['kbps']:8.0f} kb/s  ssim {ssim}")
+                results.append(r)
+            profile["modes"][mode] = {"width": args.width, "height": args.height, "frames": frames, "results": results}
+            best = choose(profile["modes"][mode], args.width, args.height, args.target_speed, args.min_ssim)
+            print(f"  -> {shlex.join(setting_args(best))}")
+            # Save per mode so an interrupted calibration keeps what it measured
+            save_profile(profile, args.profile)
+    print(f"\nProfile saved to {args.profile or PROFILE_PATH}")
+
+
+def show(args):
+    profile = load_profile(args.profile)
+    if not profile:
+        print(f"No encode profile for this machine ({machine_id()}); run: encode_tuner.py calibrate")
+        return
+    print(f"Machine: {profile['machine']}\nCalibrated: {profile['calibrated']}")
+    target = f"SSIM >= {profile['min_ssim']}" if profile.get("min_ssim") else f"{profile.get('target_speed')}x real time"
+    print(f"Target: {target}\n")
+    for mode, entry in sorted(profile["modes"].items()):
+        best = choose(entry, args.width, args.height, profile.get("target_speed"), profile.get("min_ssim"))
+        print(f"{mode:<10} {args.width}x{args.height}: {shlex.join(setting_args(best))}  "
+              f"(~{best['speed']:.1f}x real time, {best['kbps'] * (args.width * args.height) / (entry['width'] * entry['height']):.0f} kb/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate and pick x264 settings for the Python visualizers")
+    parser.add_argument("--profile", default=None, help=f"Profile file (default: {PROFILE_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cal = sub.add_parser("calibrate", help="Measure encode speed/size/quality for every mode")
+    cal.add_argument("--modes", default=None, help=f"Comma list (default: all of {', '.join(MODES)})")
+    cal.add_argument("--width", type=int, default=1280)
+    cal.add_argument("--height", type=int, default=720)
+    cal.add_argument("--seconds", type=float, default=2.0, help="Test clip length")
+    cal.add_argument("--presets", default=",".join(DEFAULT_GRID["presets"]))
+    cal.add_argument("--crfs", default=",".join(DEFAULT_GRID["crfs"]))
+    cal.add_argument("--tunes", default=",".join(DEFAULT_GRID["tunes"]), help="x264 tunes; 'none' = no -tune")
+    cal.add_argument("--threads", type=int, default=0, help="ffmpeg threads while measuring (0 = auto)")
+    cal.add_argument("--target-speed", type=float, default=DEFAULT_TARGET_SPEED,
+                     help="Encoder speed to meet, in x real time (used by render commands)")
+    cal.add_argument("--min-ssim", type=float, default=None,
+                     help="Aim for this quality instead (e.g. 0.98), as fast as possible")
+    cal.add_argument("--no-quality", action="store_true", help="Skip the SSIM pass (faster calibration)")
+
+    pick = sub.add_parser("args", help="Print ffmpeg video arguments for a mode")
+    pick.add_argument("--mode", required=True, choices=MODES)
+    pick.add_argument("--width", type=int, default=1920)
+    pick.add_argument("--height", type=int, default=1080)
+    pick.add_argument("--target-speed", type=float, default=None)
+    pick.add_argument("--min-ssim", type=float, default=None)
+
+    view = sub.add_parser("show", help="Show the profile and the current picks")
+    view.add_argument("--width", type=int, default=1920)
+    view.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    if args.command == "calibrate":
+        try:
+            calibrate(args)
+        except ValueError as e:
+            sys.stderr.write(f"Error: {e}\n")
+            sys.exit(1)
+        except subprocess.CalledProcessError as e:
+            sys.stderr.write(f"Error: command failed: {shlex.join(e.cmd)}\n")
+            sys.exit(1)
+    elif args.command == "args":
+        print(shlex.join(encode_args(args.mode, args.width, args.height, args.target_speed, args.min_ssim,
+                                     path=args.profile)))
+    else:
+        show(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""Stand-in LLM server and benchmark for the lyric_assistant.py backends.
+
+serve: a local HTTP server speaking enough of both APIs for lyric_assistant.py:
+
+    POST /api/generate           Ollama (NDJSON stream or one JSON reply)
+    GET  /api/tags               Ollama model list (used as a cheap GET probe)
+    POST /v1/chat/completions    OpenAI (SSE stream or one JSON reply)
+
+  with configurable latency (time to first token), token rate, reply length
+  and injected faults (503s, hung requests):
+
+    python3 llm_stub.py serve --port 11435 --latency 0.8 --token-rate 25 --fail-rate 0.1
+    OLLAMA_HOST=127.0.0.1:11435 python3 lyric_assistant.py
+
+bench: drives the real lyric_assistant client code (shared session, timeouts,
+stream parsers) against a server, the built-in stub by default:
+
+    python3 llm_stub.py bench --concurrency 1,4,8 --requests 16 --stream
+    python3 llm_stub.py bench --url http://studio-pc:11434 --model llama3 --concurrency 1,2
+
+  and reports latency / time to first token percentiles, throughput, client
+  overhead (wall time minus the server's own total_duration, Ollama only)
+  and how retries and timeouts behave with the fault settings.
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import lyric_assistant as la
+from lyric_http import TIMEOUTS, http_session, set_timeouts
+
+VOCAB = ("fire night heart rain city road light dream alone tonight ride wild sky gold river home "
+         "burn fly shadow whisper thunder dance slow break run hold").split()
+
+
+class StubConfig:
+    def __init__(self, latency=0.5, token_rate=30.0, tokens=120, jitter=0.2, fail_rate=0.0, hang_rate=0.0,
+                 hang_seconds=600.0, seed=None):
+        self.latency, self.token_rate, self.tokens, self.jitter = latency, token_rate, tokens, jitter
+        self.fail_rate, self.hang_rate, self.hang_seconds = fail_rate, hang_rate, hang_seconds
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "failed": 0, "hung": 0}
+
+    def roll(self):
+        """Draw the fate and shape of one request -> (fault or None, ttft, tokens)."""
+        with self.lock:
+            self.counts["requests"] += 1
+            r = self.random.random()
+            fault = "fail" if r < self.fail_rate else "hang" if r < self.fail_rate + self.hang_rate else None
+            if fault == "fail":
+                self.counts["failed"] += 1
+            elif fault == "hang":
+                self.counts["hung"] += 1
+            spread = 1 + self.random.uniform(-self.jitter, self.jitter)
+            tokens = max(1, int(self.tokens * spread))
+            words = [self.random.choice(VOCAB) for _ in range(tokens)]
+        return fault, self.latency * spread, words
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None  # set by make_server
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass  # clients may drop a kept-alive connection (e.g. after leaving a stream early)
+
+    def send_json(self, status, value):
+        body = json.dumps(value).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def apply_fault(self, fault):
+        if fault == "fail":
+            self.send_json(503, {"error": "stub: injected failure"})
+            return True
+        if fault == "hang":
+            time.sleep(self.config.hang_seconds)
+            self.close_connection = True
+            return True
+        return False
+
+    def do_GET(self):
+        fault, _, _ = self.config.roll()
+        if self.apply_fault(fault):
+            return
+        if self.path.startswith("/api/tags"):
+            self.send_json(200, {"models": [{"name": "stub:latest"}]})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": "bad json"})
+            return
+        ollama = self.path.startswith("/api/generate")
+        if not ollama and not self.path.startswith("/v1/chat/completions"):
+            self.send_json(404, {"error": "not found"})
+            return
+        fault, ttft, words = self.config.roll()
+        if self.apply_fault(fault):
+            return
+        start = time.time()
+        model = body.get("model", "stub")
+        prompt_tokens = len(json.dumps(body.get("prompt") or body.get("messages", "")).split())
+        step = 1.0 / self.config.token_rate if self.config.token_rate > 0 else 0.0
+        time.sleep(ttft)
+
+        if not body.get("stream"):
+            time.sleep(step * len(words))
+            text = " ".join(words)
+            if ollama:
+                self.send_json(200, {"model": model, "response": text, "done": True,
+                                     "prompt_eval_count": prompt_tokens, "eval_count": len(words),
+                                     "eval_duration": int(step * len(words) * 1e9),
+                                     "total_duration": int((time.time() - start) * 1e9)})
+            else:
+                self.send_json(200, {"model": model, "choices": [{"index": 0, "message": {"role": "assistant",
+                                                                                          "content": text}}],
+                                     "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words)}})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson" if ollama else "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            gen_start = time.time()
+            for i, word in enumerate(words):
+                piece = word if i == 0 else " " + word
+                if ollama:
+                    self.send_chunk((json.dumps({"model": model, "response": piece, "done": False}) + "\n").encode())
+                else:
+                    event = {"model": model, "choices": [{"index": 0, "delta": {"content": piece}}]}
+                    self.send_chunk(f"data: {json.dumps(event)}\n\n".encode())
+                time.sleep(step)
+            if ollama:
+                final = {"model": model, "response": "", "done": True, "prompt_eval_count": prompt_tokens,
+                         "eval_count": len(words), "eval_duration": int((time.time() - gen_start) * 1e9),
+                         "total_duration": int((time.time() - start) * 1e9)}
+                self.send_chunk((json.dumps(final) + "\n").encode())
+            else:
+                self.send_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client cancelled mid-stream
+
+
+def make_server(config, host="127.0.0.1", port=11435):
+    handler = type("Handler", (StubHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def one_call(backend, model, stream, api_key):
+    """One generation through lyric_assistant's client code -> result dict."""
+    if backend == "openai":
+        url, payload, headers = la.openai_request("benchmark", api_key, None, stream, model=model or la.OPENAI_MODEL)
+    else:
+        url, payload, headers = la.ollama_request("benchmark", model or "llama3", None, stream)
+    result = {"ok": False, "error": None, "ttft": None, "tokens": 0, "server": None}
+    start = time.perf_counter()
+    try:
+        if stream:
+            with http_session().post(url, json=payload, headers=headers, timeout=TIMEOUTS["generate"],
+                                     stream=True) as response:
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}")
+                stats = {}
+                parse = la.stream_ollama if backend == "ollama" else la.stream_openai
+                pieces = 0
+                for _ in parse(response, stats):
+                    if result["ttft"] is None:
+                        result["ttft"] = time.perf_counter() - start
+                    pieces += 1
+                result["tokens"] = stats.get("tokens") or pieces
+                result["server"] = stats.get("server_seconds")
+        else:
+            status, body = la.post_json_blocking(url, payload, headers)
+            if status != 200 or not isinstance(body, dict):
+                raise RuntimeError(f"HTTP {status}")
+            _, _, completion = la.parse_completion(backend, body)
+            result["tokens"] = completion or 0
+            if body.get("total_duration"):
+                result["server"] = body["total_duration"] / 1e9
+        result["ok"] = True
+    except requests.exceptions.Timeout:
+        result["error"] = "timeout"
+    except requests.exceptions.ConnectionError:
+        result["error"] = "connection"
+    except RuntimeError as e:
+        result["error"] = str(e)
+    result["wall"] = time.perf_counter() - start
+    return result
+
+
+def fmt(value, unit="s", digits=2):
+    return "-" if value is None else f"{value:.{digits}f}{unit}"
+
+
+def run_level(concurrency, count, backend, model, stream, api_key):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: one_call(backend, model, stream, api_key), range(count)))
+    elapsed = time.perf_counter() - start
+    ok = [r for r in results if r["ok"]]
+    errors = {}
+    for r in results:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    walls = [r["wall"] for r in ok]
+    overheads = [r["wall"] - r["server"] for r in ok if r["server"] is not None]
+    tokens = sum(r["tokens"] for r in ok)
+    print(f"{concurrency:>5} {len(ok):>4}/{count:<4} {len(ok) / elapsed:>6.2f} {tokens / elapsed:>8.1f} "
+          f"{fmt(percentile(walls, 0.5)):>8} {fmt(percentile(walls, 0.95)):>8} "
+          f"{fmt(percentile([r['ttft'] for r in ok if r['ttft'] is not None], 0.5)):>8} "
+          f"{fmt(statistics.median(overheads) * 1000 if overheads else None, 'ms', 1):>9}  "
+          f"{', '.join(f'{k}:{v}' for k, v in errors.items()) or '-'}")
+
+
+def retry_probe(base_url, count, stub_config):
+    """GETs go through the session's Retry adapter; compare client calls with requests the server saw."""
+    before = dict(stub_config.counts) if stub_config else None
+    ok = failed = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        try:
+            response = http_session().get(f"{base_url}/api/tags", timeout=TIMEOUTS["lookup"])
+            ok += response.status_code == 200
+            failed += response.status_code != 200
+        except requests.exceptions.RequestException:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    line = f"GET probe: {ok}/{count} ok, {failed} failed after retries, {elapsed / count * 1000:.0f} ms per call"
+    if stub_config:
+        seen = stub_config.counts["requests"] - before["requests"]
+        line += f", server saw {seen} requests ({seen - count} retries)"
+    print(line)
+
+
+def bench(args):
+    stub_config = server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        stub_config = StubConfig(args.latency, args.token_rate, args.tokens, args.jitter, args.fail_rate,
+                                 args.hang_rate, hang_seconds=max(args.read_timeout or 0, 5) * 4, seed=args.seed)
+        server = make_server(stub_config, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    la.OPENAI_BASE_URL = f"{base_url}/v1"
+    la.ollama_base_url = lambda: base_url
+    set_timeouts(args.connect_timeout, args.read_timeout)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    http_session(pool_size=max(levels + [10]))
+
+    where = base_url if args.url else (f"built-in stub at {base_url} (ttft {args.latency}s, {args.token_rate} tok/s, "
+                                       f"~{args.tokens} tokens, fail {args.fail_rate:.0%}, hang {args.hang_rate:.0%})")
+    print(f"Benchmark: {args.backend}, {'streaming' if args.stream else 'single reply'}, {where}")
+    print(f"Timeouts: connect {TIMEOUTS['generate'][0]}s, read {TIMEOUTS['generate'][1]}s")
+    print(f"{'conc':>5} {'ok':>9} {'req/s':>6} {'tok/s':>8} {'p50':>8} {'p95':>8} {'ttft50':>8} {'overhead':>9}  errors")
+    for level in levels:
+        run_level(level, args.requests, args.backend, args.model, args.stream, args.key)
+    if args.backend == "ollama":
+        retry_probe(base_url, args.probes, stub_config)
+    if server:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub LLM server and client benchmark for lyric_assistant.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("serve", "bench"):
+        p = sub.add_parser(name)
+        p.add_argument("--latency", type=float, default=0.5, help="Stub: seconds before the first token")
+        p.add_argument("--token-rate", type=float, default=30.0, help="Stub: tokens per second")
+        p.add_argument("--tokens", type=int, default=120, help="Stub: tokens per reply")
+        p.add_argument("--jitter", type=float, default=0.2, help="Stub: +/- fraction applied to latency and length")
+        p.add_argument("--fail-rate", type=float, default=0.0, help="Stub: fraction of requests answered with 503")
+        p.add_argument("--hang-rate", type=float, default=0.0, help="Stub: fraction of requests that never answer")
+        p.add_argument("--seed", type=int, help="Stub: random seed for repeatable runs")
+    serve = sub.choices["serve"]
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=11435)
+    serve.add_argument("--hang-seconds", type=float, default=600.0)
+    b = sub.choices["bench"]
+    b.add_argument("--url", help="Benchmark this server instead of the built-in stub (e.g. http://studio-pc:11434)")
+    b.add_argument("--backend", choices=["ollama", "openai"], default="ollama")
+    b.add_argument("--model", help="Model name to request")
+    b.add_argument("--key", default="stub", help="OpenAI API key (any value for the stub)")
+    b.add_argument("--stream", action="store_true", help="Use streaming replies (measures time to first token)")
+    b.add_argument("--requests", type=int, default=12, help="Requests per concurrency level")
+    b.add_argument("--concurrency", default="1,4", help="Comma list of concurrency levels")
+    b.add_argument("--probes", type=int, default=10, help="GET probes for the retry check (Ollama only)")
+    b.add_argument("--connect-timeout", type=float)
+    b.add_argument("--read-timeout", type=float)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args)
+        return
+    config = StubConfig(args.latency, args.token_rate, args.tokens, args.jitter, args.fail_rate, args.hang_rate,
+                        args.hang_seconds, args.seed)
+    server = make_server(config, args.host, args.port)
+    print(f"Stub LLM on http://{args.host}:{args.port} (Ollama: /api/generate, OpenAI: /v1/chat/completions)")
+    print(f"  OLLAMA_HOST={args.host}:{args.port}  OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nServed {config.counts['requests']} requests ({config.counts['failed']} failed, "
+              f"{config.counts['hung']} hung)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,512 @@
+"""Overnight render queue for the super tool (menu: Batch Render Queue).
+
+Runs a manifest of render jobs unattended, several at a time:
+
+    python3 render_queue.py catalog.json            # run / resume
+    python3 render_queue.py catalog.json --status   # show progress only
+
+Manifest (JSON) - "defaults" are merged into every job's params:
+
+    {
+        "defaults": {"width": 1920, "height": 1080},
+        "jobs": [
+            {"operation": "viz", "input": "song.mp3", "output": "out/song_bars.mp4",
+             "params": {"mode": "bars", "color": "fire"}},
+            {"operation": "static", "input": "song.mp3", "output": "out/song.mp4",
+             "params": {"image": "cover.png", "format": "yt"}},
+            {"operation": "hardsub", "input": "song.mp3", "output": "out/lyrics.mp4",
+             "params": {"image": "bg.jpg", "subs": "song.ass"}},
+            {"operation": "softsub", "input": "song.mp3", "output": "out/soft.mp4",
+             "params": {"image": "bg.jpg", "subs": "song.srt"}},
+            {"operation": "slideshow", "input": "photos/", "output": "out/show.mp4",
+             "params": {"audio": "song.mp3", "subs": "song.ass", "seconds": 5, "ext": "jpg"}},
+            {"operation": "convert", "input": "clip.mov", "output": "out/clip_tok.mp4",
+             "params": {"format": "tok"}}
+        ]
+    }
+
+A bare list of jobs is accepted too. Each operation runs the same ffmpeg /
+viz_master.py commands as the matching menu. Optional per-job keys: "id"
+(defaults to the output path) and "ram_mb" (overrides the memory estimate).
+
+Scheduling: every job needs a number of cores (its ffmpeg thread count, plus
+one for the Python renderer in viz jobs) and an estimated amount of RAM. A job
+starts only when both fit in what is left of --cores and --max-ram, so a few
+4K visualizers and many small conversions can share a machine without
+swapping. With the defaults each encode gets up to 4 threads and the queue
+runs as many jobs as the cores allow, since x264 gains little from more
+threads per encode than that.
+
+Progress is saved to <manifest>.state.json after every change. Outputs are
+written to a .partial file and renamed when complete, so after a crash or
+Ctrl-C the same command picks up where it left off; finished jobs are skipped
+and failed ones are only retried with --retry-failed.
+"""
+import argparse
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from encode_tuner import encode_args
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Same frames as the Format Converter / Simple Image + Audio menus
+FORMATS = {
+    "tok": (1080, 1920),
+    "yt": (1920, 1080),
+    "ig": (1080, 1080),
+    "ig45": (1080, 1350),
+    "x": (1280, 720),
+    "meta": (1280, 720),
+}
+OPERATIONS = ("viz", "static", "hardsub", "softsub", "slideshow", "convert")
+# viz job params -> viz_master.py options
+VIZ_FLAGS = {
+    "color": "--color", "wave_style": "--wave-style", "palette_file": "--palette-file", "text": "--text",
+    "image": "--image", "logo": "--logo", "logo_layer": "--logo_layer", "logo_scale": "--logo_scale",
+    "seed": "--seed", "backend": "--backend",
+}
+DEFAULT_THREADS_PER_JOB = 4
+
+
+class JobError(ValueError):
+    pass
+
+
+# --- machine resources ---
+
+def available_ram_mb():
+    """MemAvailable from /proc/meminfo, else physical RAM, else None."""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def plan_threads(cores, threads):
+    """ffmpeg threads per job: the configured value, or up to 4 when 0/auto."""
+    if threads and threads > 0:
+        return min(threads, cores)
+    return max(1, min(DEFAULT_THREADS_PER_JOB, cores))
+
+
+# --- manifest ---
+
+def load_manifest(path):
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    if isinstance(data, list):
+        data = {"jobs": data}
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise JobError(f"{path}: expected a list of jobs or an object with a 'jobs' list")
+    defaults = data.get("defaults") or {}
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    seen = set()
+    for n, raw in enumerate(data["jobs"], 1):
+        if not isinstance(raw, dict):
+            raise JobError(f"job {n}: expected an object")
+        op = raw.get("operation")
+        if op not in OPERATIONS:
+            raise JobError(f"job {n}: operation must be one of {', '.join(OPERATIONS)}")
+        if not raw.get("input") or not raw.get("output"):
+            raise JobError(f"job {n}: 'input' and 'output' are required")
+        params = dict(defaults, **(raw.get("params") or {}))
+        # Relative paths are relative to the manifest
+        for key in ("image", "subs", "audio", "logo", "palette_file"):
+            if isinstance(params.get(key), str):
+                params[key] = os.path.join(base, params[key])
+        job = {
+            "id": str(raw.get("id") or raw["output"]),
+            "operation": op,
+            "input": os.path.join(base, raw["input"]),
+            "output": os.path.join(base, raw["output"]),
+            "params": params,
+            "ram_mb": raw.get("ram_mb"),
+        }
+        if job["id"] in seen:
+            raise JobError(f"job {n}: duplicate id/output {job['id']!r}")
+        seen.add(job["id"])
+        jobs.append(job)
+    return jobs
+
+
+# --- commands (mirroring the interactive menus) ---
+
+def frame_size(params, default=(1920, 1080)):
+    if params.get("format"):
+        if params["format"] not in FORMATS:
+            raise JobError(f"unknown format {params['format']!r} (use {', '.join(FORMATS)})")
+        return FORMATS[params["format"]]
+    return int(params.get("width", default[0])), int(params.get("height", default[1]))
+
+
+def fit_filter(width, height):
+    return f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2"
+
+
+def subs_filter(path):
+    escaped = path.replace("\\", "\\\\").replace(":", "\\:").replace("'", "\\'")
+    if path.lower().endswith(".ass"):
+        return f"ass='{escaped}'"
+    return f"subtitles='{escaped}'"
+
+
+def require(params, *keys):
+    for key in keys:
+        if not params.get(key):
+            raise JobError(f"missing param '{key}'")
+
+
+def x264_args(params, threads, crf="18"):
+    return ["-c:v", "libx264", "-preset", str(params.get("preset", "fast")), "-crf", str(params.get("crf", crf)),
+            "-threads", str(threads)]
+
+
+def build_pipeline(job, output, threads):
+    """List of commands to run as a pipe (one command for plain ffmpeg jobs)."""
+    op, src, params = job["operation"], job["input"], job["params"]
+    head = ["ffmpeg", "-y", "-v", "error", "-stats"]
+    if op == "viz":
+        width, height = frame_size(params)
+        decode = ["ffmpeg", "-v", "error", "-i", src, "-f", "s16le", "-ac", "1", "-ar", "44100", "-vn", "-"]
+        render = [sys.executable, os.path.join(SCRIPT_DIR, "viz_master.py"), "--mode", params.get("mode", "bars"),
+                  "--width", str(width), "--height", str(height)]
+        for key, flag in VIZ_FLAGS.items():
+            if params.get(key) is not None:
+                render += [flag, str(params[key])]
+        if params.get("preset") or params.get("crf"):
+            video = x264_args(params, threads)
+        else:
+            # Calibrated per-mode settings (encode_tuner.py), or the menu's fast/18
+            video = encode_args(params.get("mode", "bars"), width, height) + ["-threads", str(threads)]
+        encode = head + ["-f", "rawvideo", "-pixel_format", "rgb24", "-video_size", f"{width}x{height}",
+                         "-framerate", "30", "-thread_queue_size", "1024", "-i", "-", "-i", src,
+                         "-map", "0:v", "-map", "1:a", *video, "-pix_fmt", "yuv420p",
+                         "-c:a", "aac", "-b:a", "192k", "-shortest", output]
+        return [decode, render, encode]
+    if op == "static":
+        require(params, "image")
+        vf = fit_filter(*frame_size(params)) if params.get("format") else "scale=trunc(iw/2)*2:trunc(ih/2)*2"
+        return [head + ["-loop", "1", "-i", params["image"], "-i", src, "-vf", f"{vf},format=yuv420p",
+                        *x264_args(params, threads), "-tune", "stillimage", "-c:a", "aac", "-b:a", "192k",
+                        "-shortest", output]]
+    if op == "hardsub":
+        require(params, "image", "subs")
+        return [head + ["-loop", "1", "-i", params["image"], "-i", src, "-vf", subs_filter(params["subs"]),
+                        *x264_args(params, threads), "-c:a", "aac", "-b:a", "192k", "-shortest",
+                        "-pix_fmt", "yuv420p", output]]
+    if op == "softsub":
+        require(params, "image", "subs")
+        return [head + ["-loop", "1", "-i", params["image"], "-i", src, "-i", params["subs"],
+                        *x264_args(params, threads), "-c:a", "copy", "-c:s", "mov_text",
+                        "-metadata:s:s:0", f"language={params.get('language', 'eng')}",
+                        "-shortest", "-pix_fmt", "yuv420p", output]]
+    if op == "slideshow":
+        require(params, "audio")
+        pattern = os.path.join(src, f"*.{str(params.get('ext', 'jpg')).lstrip('.')}")
+        cmd = head + ["-framerate", f"1/{params.get('seconds', 5)}", "-pattern_type", "glob", "-i", pattern,
+                      "-i", params["audio"]]
+        if params.get("subs"):
+            cmd += ["-vf", subs_filter(params["subs"])]
+        return [cmd + [*x264_args(params, threads, crf="23"), "-r", "30", "-pix_fmt", "yuv420p",
+                       "-c:a", "aac", "-b:a", "192k", "-shortest", output]]
+    if op == "convert":
+        width, height = frame_size(params, default=FORMATS["tok"])
+        return [head + ["-i", src, "-vf", fit_filter(width, height), *x264_args(params, threads, crf="20"),
+                        "-c:a", "copy", output]]
+    raise JobError(f"unknown operation {op!r}")
+
+
+def source_paths(job):
+    paths = [job["input"]]
+    for key in ("image", "subs", "audio"):
+        if job["params"].get(key):
+            paths.append(job["params"][key])
+    return paths
+
+
+def media_seconds(job):
+    """Length of the job's audio/video in seconds via ffprobe, or None."""
+    src = job["params"]["audio"] if job["operation"] == "slideshow" else job["input"]
+    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", src]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        return float(out.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+# --- resource estimates ---
+
+def estimate_ram_mb(job, threads):
+    """Rough peak RSS of one job: x264 frame buffers + lookahead, plus the viz renderer."""
+    if job.get("ram_mb"):
+        return int(job["ram_mb"])
+    params = job["params"]
+    if job["operation"] in ("static", "hardsub", "softsub") and not params.get("format"):
+        width, height = 1920, 1080
+    else:
+        width, height = frame_size(params, default=FORMATS["tok"] if job["operation"] == "convert" else (1920, 1080))
+    frame_mb = width * height * 1.5 / 2 ** 20
+    ram = 80 + frame_mb * (40 + 6 * threads)
+    if job["operation"] == "viz":
+        # pygame/NumPy frame buffers and the rgb24 pipe
+        ram += 150 + width * height * 16 / 2 ** 20
+    return int(ram)
+
+
+def job_cores(job, threads):
+    return threads + (1 if job["operation"] == "viz" else 0)
+
+
+# --- persisted state ---
+
+class QueueState:
+    def __init__(self, path, jobs):
+        self.path = path
+        self.data = {"jobs": {}, "runs": []}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                self.data = json.load(fh)
+        for job in jobs:
+            entry = self.data["jobs"].setdefault(job["id"], {"status": "pending", "attempts": 0})
+            if entry["status"] == "running":
+                # Interrupted last time
+                entry["status"] = "pending"
+            if entry["status"] == "done" and not os.path.exists(job["output"]):
+                entry["status"] = "pending"
+
+    def job(self, job_id):
+        return self.data["jobs"][job_id]
+
+    def update(self, job_id, **fields):
+        self.data["jobs"][job_id].update(fields)
+        self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.data, fh, indent=2)
+        os.replace(tmp, self.path)
+
+
+def partial_path(output):
+    root, ext = os.path.splitext(output)
+    return f"{root}.partial{ext or '.mp4'}"
+
+
+def log_path(log_dir, job_id):
+    return os.path.join(log_dir, "supertool_queue_" + re.sub(r"[^\w.-]+", "_", job_id)[-80:] + ".log")
+
+
+def run_pipeline(cmds, log_file, procs):
+    """Run commands connected by pipes; stderr of all of them goes to the log. Returns the exit code."""
+    with open(log_file, "w", encoding="utf-8") as log:
+        for cmd in cmds:
+            log.write(shlex.join(cmd) + "\n")
+        log.write("\n")
+        log.flush()
+        prev = None
+        started = []
+        for i, cmd in enumerate(cmds):
+            last = i == len(cmds) - 1
+            proc = subprocess.Popen(cmd, stdin=prev.stdout if prev else subprocess.DEVNULL,
+                                    stdout=log if last else subprocess.PIPE, stderr=log)
+            if prev:
+                # Only the next process should hold the read end
+                prev.stdout.close()
+            started.append(proc)
+            procs.append(proc)
+            prev = proc
+        codes = [proc.wait() for proc in started]
+    return next((code for code in reversed(codes) if code != 0), 0)
+
+
+def fmt_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def print_status(jobs, state):
+    counts = {}
+    for job in jobs:
+        entry = state.job(job["id"])
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        extra = ""
+        if entry.get("seconds"):
+            extra = f" {entry['seconds']:.0f}s"
+            if entry.get("media_seconds"):
+                extra += f" ({entry['media_seconds'] / entry['seconds']:.1f}x realtime)"
+        print(f"{entry['status']:<8} {job['operation']:<9} {job['output']}{extra}")
+    print(", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a manifest of render jobs in parallel, resumably")
+    parser.add_argument("manifest", help="JSON manifest of jobs (see the top of this file)")
+    parser.add_argument("--cores", type=int, default=0, help="CPU cores to use (0 = all)")
+    parser.add_argument("--threads", type=int, default=0, help="ffmpeg threads per job (0 = auto, up to 4)")
+    parser.add_argument("--jobs", type=int, default=0, help="Max jobs at once (0 = as many as cores/RAM allow)")
+    parser.add_argument("--max-ram", type=int, default=0, help="RAM budget in MB (0 = 80%% of available)")
+    parser.add_argument("--state", default=None, help="State file (default: <manifest>.state.json)")
+    parser.add_argument("--log-dir", default=tempfile.gettempdir(), help="Where to write one log per job")
+    parser.add_argument("--retry-failed", action="store_true", help="Run jobs that failed last time again")
+    parser.add_argument("--dry-run", action="store_true", help="Print the commands and resource plan only")
+    parser.add_argument("--status", action="store_true", help="Show saved progress and exit")
+    args = parser.parse_args()
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"Error: {e}\n")
+        sys.exit(1)
+    state = QueueState(args.state or args.manifest + ".state.json", jobs)
+    if args.status:
+        print_status(jobs, state)
+        return
+
+    cores = args.cores or os.cpu_count() or 1
+    threads = plan_threads(cores, args.threads)
+    ram_limit = args.max_ram or int((available_ram_mb() or 0) * 0.8) or None
+    max_jobs = args.jobs or len(jobs) or 1
+
+    todo = []
+    rejected = 0
+    for job in jobs:
+        entry = state.job(job["id"])
+        if entry["status"] == "done" or (entry["status"] == "failed" and not args.retry_failed):
+            continue
+        try:
+            cmds = build_pipeline(job, partial_path(job["output"]), threads)
+            missing = [p for p in source_paths(job) if not os.path.exists(p)]
+            if missing:
+                raise JobError(f"missing {missing[0]}")
+        except JobError as e:
+            rejected += 1
+            print(f"Failed: {job['output']} ({e})")
+            if not args.dry_run:
+                state.update(job["id"], status="failed", error=str(e))
+            continue
+        ram = estimate_ram_mb(job, threads)
+        if ram_limit and ram > ram_limit:
+            print(f"Warning: {job['output']} needs ~{ram} MB, over the {ram_limit} MB budget; it will run alone")
+        todo.append((job, cmds, ram, job_cores(job, threads)))
+
+    print(f"{len(todo)} job(s) to run of {len(jobs)}; {cores} core(s), {threads} ffmpeg thread(s) per job, "
+          f"RAM budget {f'{ram_limit} MB' if ram_limit else 'unlimited'}")
+    if args.dry_run:
+        for job, cmds, ram, need in todo:
+            print(f"\n# {job['id']}  (~{ram} MB, {need} core(s))")
+            print(" | \\\n  ".join(shlex.join(cmd) for cmd in cmds))
+        return
+    if not todo:
+        sys.exit(1 if rejected else 0)
+
+    run = {"started": time.time(), "done": 0, "failed": rejected, "media_seconds": 0.0}
+    state.data["runs"].append(run)
+    state.save()
+    running = {}  # future -> (job, ram, cores, start)
+    procs = {}  # job id -> Popen list, for Ctrl-C
+    used_ram = used_cores = 0
+    finished = 0
+
+    def fits(ram, need):
+        if not running:
+            return True
+        if len(running) >= max_jobs or used_cores + need > cores:
+            return False
+        if ram_limit and used_ram + ram > ram_limit:
+            return False
+        free = available_ram_mb()
+        return free is None or free > ram
+
+    pool = ThreadPoolExecutor(max_workers=min(len(todo), max_jobs, cores))
+    try:
+        while todo or running:
+            # Start everything that fits, in manifest order
+            for item in list(todo):
+                job, cmds, ram, need = item
+                if not fits(ram, need):
+                    continue
+                todo.remove(item)
+                os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+                state.update(job["id"], status="running", attempts=state.job(job["id"])["attempts"] + 1,
+                             started=time.time(), log=log_path(args.log_dir, job["id"]))
+                procs[job["id"]] = []
+                future = pool.submit(run_pipeline, cmds, log_path(args.log_dir, job["id"]), procs[job["id"]])
+                running[future] = (job, ram, need, time.time())
+                used_ram += ram
+                used_cores += need
+                print(f"Started: {job['output']} ({job['operation']}, ~{ram} MB, {need} core(s))")
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                job, ram, need, start = running.pop(future)
+                procs.pop(job["id"], None)
+                used_ram -= ram
+                used_cores -= need
+                finished += 1
+                seconds = time.time() - start
+                code = future.result()
+                tmp = partial_path(job["output"])
+                label = f"[{finished}/{finished + len(running) + len(todo)}]"
+                if code == 0 and os.path.exists(tmp):
+                    os.replace(tmp, job["output"])
+                    media = media_seconds(job)
+                    state.update(job["id"], status="done", seconds=seconds, media_seconds=media,
+                                 finished=time.time(), error=None)
+                    run["done"] += 1
+                    run["media_seconds"] += media or 0.0
+                    speed = f", {media / seconds:.1f}x realtime" if media else ""
+                    print(f"{label} Saved: {job['output']} ({seconds:.0f}s{speed})")
+                else:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    state.update(job["id"], status="failed", seconds=seconds, finished=time.time(),
+                                 error=f"exit code {code}")
+                    run["failed"] += 1
+                    print(f"{label} Failed: {job['output']} (see log: {log_path(args.log_dir, job['id'])})")
+    except KeyboardInterrupt:
+        print("\nStopping; unfinished jobs will resume on the next run...")
+        for proc_list in procs.values():
+            for proc in proc_list:
+                proc.terminate()
+        pool.shutdown(wait=True)
+        for job, _, _, _ in running.values():
+            state.update(job["id"], status="pending")
+            tmp = partial_path(job["output"])
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        sys.exit(130)
+    finally:
+        pool.shutdown(wait=True)
+        run["finished"] = time.time()
+        state.save()
+
+    wall = run["finished"] - run["started"]
+    print(f"\nQueue finished in {fmt_duration(wall)}: {run['done']} done, {run['failed']} failed")
+    if wall > 0 and run["done"]:
+        line = f"Throughput: {run['done'] * 3600 / wall:.1f} jobs/hour"
+        if run["media_seconds"]:
+            line += f", {run['media_seconds'] / 60:.1f} min of media ({run['media_seconds'] / wall:.1f}x realtime overall)"
+        print(line)
+    sys.exit(1 if run["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
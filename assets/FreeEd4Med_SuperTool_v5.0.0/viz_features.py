@@ -0,0 +1,276 @@
+"""Audio features and .vizfeat sidecar files for viz_master.py.
+
+`viz_master.py analyze song.wav -o song.vizfeat` decodes a track once and
+stores per-frame features. `viz_master.py --features song.vizfeat` then
+memory-maps that file instead of reading PCM from stdin, so re-rendering the
+same song in another mode or palette skips all decoding and FFT work and can
+start at any frame.
+
+File layout:
+    [0, HEADER_SIZE)    b"VIZFEAT1" + space-padded JSON header
+    [HEADER_SIZE, ...)  float16 matrix, one row per video frame
+
+The header stores fps, sample_rate, chunk_size, the number of frames and the
+[start, end) column range of every field.
+"""
+import json
+import math
+import subprocess
+
+import numpy as np
+
+from viz_beats import BeatTracker
+
+MAGIC = b"VIZFEAT1"
+HEADER_SIZE = 4096
+STORE_DTYPE = "float16"
+
+# Same 8 bands ardour_fixer.py reports on (Hz, None = Nyquist)
+BAND_EDGES = (0, 60, 125, 250, 500, 2000, 4000, 8000, None)
+BAND_NAMES = ("sub", "bass", "lowmid", "mid", "upmid", "pres", "treble", "air")
+
+_windows = {}
+
+
+def get_fft(audio_data):
+    n = len(audio_data)
+    window = _windows.get(n)
+    if window is None:
+        window = _windows[n] = np.hanning(n)
+    return np.abs(np.fft.rfft(audio_data * window))
+
+
+def read_pcm_chunks(stream, chunk_size):
+    """Yield float mono chunks from a 16-bit little-endian PCM byte stream."""
+    n_bytes = chunk_size * 2
+    while True:
+        raw_data = stream.read(n_bytes)
+        if not raw_data or len(raw_data) < n_bytes:
+            return
+        yield np.frombuffer(raw_data, dtype=np.int16) / 32768.0
+
+
+def decode_pcm(path, sample_rate):
+    """Start ffmpeg decoding `path` to mono s16le PCM; returns the Popen."""
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", str(path),
+        "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-vn", "-"
+    ]
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE)
+
+
+def band_slices(chunk_size, sample_rate):
+    n_bins = chunk_size // 2 + 1
+    hz_per_bin = sample_rate / chunk_size
+    edges = []
+    for hz in BAND_EDGES:
+        if hz is None:
+            edges.append(n_bins)
+        else:
+            edges.append(min(n_bins, int(round(hz / hz_per_bin))))
+    return [(edges[i], max(edges[i] + 1, edges[i + 1])) for i in range(len(BAND_NAMES))]
+
+
+def feature_layout(chunk_size):
+    """Column ranges for every stored field, in row order."""
+    sizes = [
+        ("pcm", chunk_size),
+        ("log_spectrum", chunk_size // 2 + 1),
+        ("bands", len(BAND_NAMES)),
+        ("rms", 1),
+        ("flux", 1),
+        ("onset", 1),
+        ("onset_strength", 1),
+        ("beat", 1),
+        ("beat_phase", 1),
+        ("tempo", 1),
+    ]
+    layout = {}
+    col = 0
+    for name, size in sizes:
+        layout[name] = [col, col + size]
+        col += size
+    return layout, col
+
+
+class AudioFrame:
+    """One video frame of audio: raw samples plus the features derived from them.
+
+    Live renders build these from stdin PCM; --features renders fill the same
+    fields from the mapped file, so visualizers never care which it is.
+    Onset/beat fields come from the shared BeatTracker (see viz_beats.py).
+    """
+
+    def __init__(self, index, samples, fft, bands, rms, flux=0.0, onset=False, onset_strength=0.0,
+                 beat=False, beat_phase=0.0, tempo=120.0):
+        self.index = index
+        self.samples = samples
+        self.fft = fft
+        self.bands = bands
+        self.rms = rms
+        self.flux = flux
+        self.onset = onset
+        self.onset_strength = onset_strength
+        self.beat = beat
+        self.beat_phase = beat_phase
+        self.tempo = tempo
+
+    @property
+    def log_spectrum(self):
+        return np.log1p(self.fft)
+
+    @property
+    def pulse(self):
+        """1.0 on the beat, decaying toward 0 until the next one."""
+        return math.exp(-4.0 * self.beat_phase)
+
+
+class FrameAnalyzer:
+    """Turns consecutive PCM chunks into AudioFrames.
+
+    Each frame costs one FFT; onsets and beats come from one BeatTracker fed
+    with the spectral flux, so every visualizer sees the same events.
+    """
+
+    def __init__(self, chunk_size, sample_rate):
+        self.chunk_size = chunk_size
+        self.sample_rate = sample_rate
+        self.slices = band_slices(chunk_size, sample_rate)
+        self.tracker = BeatTracker(sample_rate / chunk_size)
+        self.prev_log = None
+        self.index = 0
+
+    def process(self, samples):
+        fft = get_fft(samples)
+        log_spec = np.log1p(fft)
+        bands = np.array([fft[a:b].mean() for a, b in self.slices])
+        rms = float(np.sqrt(np.mean(samples * samples)))
+
+        if self.prev_log is None:
+            flux = 0.0
+        else:
+            flux = float(np.maximum(log_spec - self.prev_log, 0).sum())
+        self.prev_log = log_spec
+
+        info = self.tracker.update(flux)
+        frame = AudioFrame(
+            self.index, samples, fft, bands, rms, flux=flux,
+            onset=info.onset, onset_strength=info.onset_strength,
+            beat=info.beat, beat_phase=info.beat_phase, tempo=info.tempo
+        )
+        self.index += 1
+        return frame
+
+
+class FeatureWriter:
+    """Streams AudioFrames to a .vizfeat file; the header is written on close."""
+
+    def __init__(self, path, fps, sample_rate, chunk_size):
+        self.path = path
+        self.fps = fps
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.layout, self.width = feature_layout(chunk_size)
+        self.frames = 0
+        self.fh = open(path, "wb")
+        self.fh.write(b"\0" * HEADER_SIZE)
+
+    def write(self, frame):
+        row = np.empty(self.width, dtype=STORE_DTYPE)
+        values = {
+            "pcm": frame.samples,
+            "log_spectrum": frame.log_spectrum,
+            "bands": frame.bands,
+            "rms": frame.rms,
+            "flux": frame.flux,
+            "onset": float(frame.onset),
+            "onset_strength": frame.onset_strength,
+            "beat": float(frame.beat),
+            "beat_phase": frame.beat_phase,
+            "tempo": frame.tempo,
+        }
+        for name, (start, end) in self.layout.items():
+            row[start:end] = values[name]
+        self.fh.write(row.tobytes())
+        self.frames += 1
+
+    def close(self):
+        header = {
+            "fps": self.fps,
+            "sample_rate": self.sample_rate,
+            "chunk_size": self.chunk_size,
+            "frames": self.frames,
+            "dtype": STORE_DTYPE,
+            "fields": self.layout,
+        }
+        blob = MAGIC + json.dumps(header).encode("utf-8")
+        if len(blob) > HEADER_SIZE:
+            raise ValueError("vizfeat header too large")
+        self.fh.seek(0)
+        self.fh.write(blob.ljust(HEADER_SIZE, b" "))
+        self.fh.close()
+
+
+class FeatureReader:
+    """Memory-mapped view of a .vizfeat file; any frame is one row away."""
+
+    def __init__(self, path, mode="r"):
+        with open(path, "rb") as fh:
+            head = fh.read(HEADER_SIZE)
+        if not head.startswith(MAGIC):
+            raise ValueError(f"{path} is not a .vizfeat file")
+        self.header = json.loads(head[len(MAGIC):].decode("utf-8"))
+        self.fps = self.header["fps"]
+        self.sample_rate = self.header["sample_rate"]
+        self.chunk_size = self.header["chunk_size"]
+        self.fields = {k: tuple(v) for k, v in self.header["fields"].items()}
+        width = max(end for _, end in self.fields.values())
+        shape = (self.header["frames"], width)
+        if shape[0] == 0:
+            # mmap refuses zero-length maps
+            self.data = np.zeros(shape, dtype=self.header["dtype"])
+        else:
+            self.data = np.memmap(path, dtype=self.header["dtype"], mode=mode, offset=HEADER_SIZE, shape=shape)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def column(self, name):
+        start, end = self.fields[name]
+        return self.data[:, start:end]
+
+    def frame(self, index):
+        row = np.asarray(self.data[index], dtype=np.float32)
+
+        def field(name):
+            start, end = self.fields[name]
+            return row[start:end]
+
+        def scalar(name, default=0.0):
+            # Older files may predate a field
+            if name not in self.fields:
+                return default
+            return float(row[self.fields[name][0]])
+
+        return AudioFrame(
+            index, field("pcm"), np.expm1(field("log_spectrum")), field("bands"), scalar("rms"),
+            flux=scalar("flux"), onset=bool(scalar("onset")), onset_strength=scalar("onset_strength"),
+            beat=bool(scalar("beat")), beat_phase=scalar("beat_phase"), tempo=scalar("tempo", 120.0)
+        )
+
+    def frames(self, start=0):
+        for i in range(start, len(self)):
+            yield self.frame(i)
+
+
+def analyze_to_file(pcm_stream, out_path, fps, sample_rate):
+    """Run the frame analyzer over a PCM stream and write a .vizfeat file."""
+    chunk_size = int(sample_rate / fps)
+    analyzer = FrameAnalyzer(chunk_size, sample_rate)
+    writer = FeatureWriter(out_path, fps, sample_rate, chunk_size)
+    try:
+        for samples in read_pcm_chunks(pcm_stream, chunk_size):
+            writer.write(analyzer.process(samples))
+    finally:
+        writer.close()
+    return writer.frames
@@ -0,0 +1,152 @@
+"""Named color palettes for viz_master.py, compiled once into lookup tables.
+
+A palette is a list of gradient stops. It is compiled to a 256-entry RGB
+table (Palette.lut) when it is registered; visualizers then color whole
+arrays of values with one indexing operation:
+
+    colors = get_palette("fire").map(levels)   # levels in 0..1
+    colors = get_palette("rainbow").table(64)  # one color per bar
+
+Palettes with mode "position" (rainbow) are meant to be spread across bars
+or angles with table(n); "intensity" palettes (the default) map a level
+such as bar height through map().
+
+Extra palettes can be loaded from JSON (--palette-file):
+
+    {
+        "sunset": ["#2b1055", "#d53369", "#daae51"],
+        "ocean": {"stops": [[0, "#001f3f"], [0.7, "#0074d9"], [1, [127, 219, 255]]]},
+        "hues": {"stops": ["#ff0000", "#00ff00", "#0000ff", "#ff0000"], "mode": "position"}
+    }
+
+A plain list of colors is spread evenly from 0 to 1. Colors are "#rrggbb"
+strings or [r, g, b] lists.
+"""
+import json
+
+import numpy as np
+
+LUT_SIZE = 256
+MODES = ("intensity", "position")
+
+BUILTIN_PALETTES = {
+    # Hue wheel, same colors as HSLA (hue, 100%, 50%)
+    "rainbow": {
+        "stops": [(255, 0, 0), (255, 255, 0), (0, 255, 0), (0, 255, 255), (0, 0, 255), (255, 0, 255), (255, 0, 0)],
+        "mode": "position",
+    },
+    "fire": {"stops": [(255, 0, 0), (255, 255, 0)]},
+    "ice": {"stops": [(0, 0, 255), (0, 255, 255)]},
+    "matrix": {"stops": [(0, 255, 0), (0, 255, 255)]},
+    "neon": {"stops": [(255, 0, 255), (0, 255, 255), (255, 255, 0)]},
+    # Heat ramp used by the fire mode
+    "flame": {"stops": [(0, 0, 0), (255, 0, 0), (255, 255, 0), (255, 255, 255), (255, 255, 255)]},
+    # Single-color palettes
+    "white": {"stops": [(255, 255, 255)]},
+    "cyan": {"stops": [(0, 255, 255)]},
+    "magenta": {"stops": [(255, 0, 255)]},
+    "green": {"stops": [(0, 255, 0)]},
+    "red": {"stops": [(255, 0, 0)]},
+}
+
+
+def parse_color(value):
+    """'#rrggbb' / 'rrggbb' or an [r, g, b] sequence -> (r, g, b) ints."""
+    if isinstance(value, str):
+        text = value.lstrip("#")
+        if len(text) != 6:
+            raise ValueError(f"bad color {value!r}, expected #rrggbb")
+        return tuple(int(text[i:i + 2], 16) for i in (0, 2, 4))
+    rgb = tuple(int(v) for v in value)
+    if len(rgb) != 3 or not all(0 <= v <= 255 for v in rgb):
+        raise ValueError(f"bad color {value!r}, expected [r, g, b] in 0..255")
+    return rgb
+
+
+def parse_stops(stops):
+    """Stops as colors (spread evenly) or [position, color] pairs -> sorted (positions, colors)."""
+    if not stops:
+        raise ValueError("palette needs at least one color")
+    pairs = []
+    for i, stop in enumerate(stops):
+        if isinstance(stop, (list, tuple)) and len(stop) == 2 and not isinstance(stop[1], (int, float)):
+            pos, color = float(stop[0]), stop[1]
+        else:
+            pos, color = (i / (len(stops) - 1) if len(stops) > 1 else 0.0), stop
+        pairs.append((min(1.0, max(0.0, pos)), parse_color(color)))
+    pairs.sort(key=lambda p: p[0])
+    positions = np.array([p for p, _ in pairs])
+    colors = np.array([c for _, c in pairs], dtype=np.float64)
+    return positions, colors
+
+
+class Palette:
+    def __init__(self, name, stops, mode="intensity"):
+        if mode not in MODES:
+            raise ValueError(f"palette {name!r}: mode must be one of {', '.join(MODES)}")
+        self.name = name
+        self.mode = mode
+        self.positions, self.stop_colors = parse_stops(stops)
+        self.colors = [tuple(int(v) for v in c) for c in self.stop_colors]
+        self.lut = self._sample(np.linspace(0.0, 1.0, LUT_SIZE))
+        self._tables = {}
+
+    @property
+    def by_position(self):
+        return self.mode == "position"
+
+    def _sample(self, t):
+        channels = [np.interp(t, self.positions, self.stop_colors[:, ch]) for ch in range(3)]
+        return np.rint(np.stack(channels, axis=-1)).astype(np.uint8)
+
+    def map(self, values):
+        """Colors for levels in 0..1 (any shape) -> uint8 array of shape values.shape + (3,)."""
+        idx = (np.clip(values, 0.0, 1.0) * (LUT_SIZE - 1)).astype(np.intp)
+        return self.lut[idx]
+
+    def table(self, n):
+        """n colors spread over the palette (cyclic for position palettes); cached per n."""
+        table = self._tables.get(n)
+        if table is None:
+            if self.by_position:
+                t = np.arange(n) / n
+            else:
+                t = np.linspace(0.0, 1.0, n)
+            table = self._tables[n] = self._sample(t)
+        return table
+
+
+_registry = {name: Palette(name, spec["stops"], spec.get("mode", "intensity")) for name, spec in BUILTIN_PALETTES.items()}
+
+
+def palette_names():
+    return sorted(_registry)
+
+
+def get_palette(name, default="white"):
+    """Registered palette by name, falling back to `default` for unknown names."""
+    return _registry.get(name) or _registry[default]
+
+
+def has_palette(name):
+    return name in _registry
+
+
+def load_palette_file(path):
+    """Register every palette in a JSON file; returns the names loaded."""
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected an object of name -> palette")
+    loaded = []
+    for name, spec in data.items():
+        if isinstance(spec, dict):
+            stops, mode = spec.get("stops"), spec.get("mode", "intensity")
+        else:
+            stops, mode = spec, "intensity"
+        try:
+            _registry[name] = Palette(name, stops, mode)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path}: palette {name!r}: {e}")
+        loaded.append(name)
+    return loaded
@@ -0,0 +1,382 @@
+"""Drawing backends for viz_master.py (--backend pygame|numpy).
+
+Visualizers draw through a canvas using batched primitives: one call draws N
+rects, N lines or N circles from arrays, so per-shape geometry and colors are
+computed with NumPy instead of Python loops.
+
+- PygameCanvas hands each primitive to pygame.draw (the original look and the
+  default; fastest for a few large shapes and long thick polylines).
+- NumpyCanvas writes into an interleaved uint8 RGB array. Opaque lines and
+  circles are rasterized like pygame.draw (aliased, later shapes on top) as
+  plain vectorized stores; alpha and additive circles and additive lines are
+  blended by coverage. There is no per-shape Python call, so it pulls ahead
+  when a frame has thousands of primitives (terrain, particles, bars).
+"""
+import math
+
+import numpy as np
+import pygame
+
+BACKENDS = ("pygame", "numpy")
+
+# Samples handled per step by NumpyCanvas. Keeps its temporaries (8 bytes
+# per sample) under the C allocator's mmap threshold, so they are recycled
+# instead of being mapped and page-faulted in again for every primitive batch.
+CHUNK = 8192
+
+
+def _per_item(values, n, width):
+    """Broadcast one color/value or a sequence of them to shape (n, width)."""
+    arr = np.asarray(values, dtype=np.float32).reshape(-1, width)
+    return np.broadcast_to(arr, (n, width))
+
+
+def _rows(values, n, width, dtype=int):
+    """Like _per_item, as plain Python lists (pygame.draw is much faster with those)."""
+    return _per_item(values, n, width).astype(dtype).tolist()
+
+
+def _alphas(alpha, n):
+    if alpha is None:
+        return np.ones(n, dtype=np.float32)
+    return np.broadcast_to(np.asarray(alpha, dtype=np.float32) / 255.0, (n,))
+
+
+def _palette(colors, n):
+    """uint8 colors as a (3, n) table, or a plain (3,) color when all n share one."""
+    colors = _per_item(colors, n, 3)
+    if n and colors.strides[0] == 0:
+        return colors[0].astype(np.uint8)
+    return colors.astype(np.uint8).T
+
+
+def _runs(counts, per_chunk):
+    """Yield (item, step) arrays enumerating counts[i] steps of every item i in order,
+    about per_chunk steps at a time (whole items only)."""
+    ends_at = np.cumsum(counts)
+    first, n = 0, len(counts)
+    while first < n:
+        last = max(first + 1, int(np.searchsorted(ends_at, ends_at[first] - counts[first] + per_chunk, side="right")))
+        steps = counts[first:last]
+        total = int(steps.sum())
+        if total:
+            item = np.repeat(np.arange(first, last), steps)
+            yield item, np.arange(total) - np.repeat(np.cumsum(steps) - steps, steps)
+        first = last
+
+
+class PygameCanvas:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.surface = pygame.Surface((width, height))
+        self._small = None
+
+    def fill(self, color):
+        self.surface.fill(color)
+
+    def rects(self, rects, colors):
+        rects = np.asarray(rects, dtype=float).reshape(-1, 4)
+        for r, c in zip(rects.tolist(), _rows(colors, len(rects), 3)):
+            pygame.draw.rect(self.surface, c, r)
+
+    def spans(self, xs, tops, bottoms, colors):
+        """Vertical 1px spans: column xs[i] filled from tops[i] to bottoms[i] inclusive."""
+        xs = np.asarray(xs).astype(int).tolist()
+        n = len(xs)
+        tops = np.broadcast_to(np.asarray(tops), (n,)).astype(int).tolist()
+        bottoms = np.broadcast_to(np.asarray(bottoms), (n,)).astype(int).tolist()
+        for x, y0, y1, c in zip(xs, tops, bottoms, _rows(colors, n, 3)):
+            pygame.draw.line(self.surface, c, (x, y0), (x, y1))
+
+    def lines(self, starts, ends, colors, width=1, additive=False):
+        starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        colors = _rows(colors, len(starts), 3)
+        target = self.surface
+        if additive:
+            target = pygame.Surface((self.width, self.height))
+        for p0, p1, c in zip(starts.tolist(), ends.tolist(), colors):
+            pygame.draw.line(target, c, p0, p1, width)
+        if additive:
+            self.surface.blit(target, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+
+    def polyline(self, points, color, width=1):
+        points = np.asarray(points)
+        if len(points) > 1:
+            pygame.draw.lines(self.surface, color, False, points.tolist(), width)
+
+    def circles(self, centers, radii, colors, alpha=None, width=0, additive=False):
+        centers = np.asarray(centers, dtype=float).reshape(-1, 2).astype(int).tolist()
+        n = len(centers)
+        radii = np.broadcast_to(np.asarray(radii, dtype=float), (n,)).astype(int).tolist()
+        colors = _rows(colors, n, 3)
+        if alpha is None and not additive:
+            for center, r, c in zip(centers, radii, colors):
+                pygame.draw.circle(self.surface, c, center, r, width)
+            return
+
+        alphas = np.broadcast_to(np.asarray(255 if alpha is None else alpha), (n,)).astype(int).tolist()
+        flags = pygame.BLEND_RGB_ADD if additive else 0
+        for (x, y), r, c, a in zip(centers, radii, colors, alphas):
+            if r <= 0:
+                continue
+            s = pygame.Surface((r * 2, r * 2), pygame.SRCALPHA)
+            pygame.draw.circle(s, (*c, a), (r, r), r, width)
+            self.surface.blit(s, (x - r, y - r), special_flags=flags)
+
+    def blit(self, surface, pos):
+        self.surface.blit(surface, pos)
+
+    def blit_array(self, rgb):
+        """Nearest-neighbour scale an (h, w, 3) uint8 image over the whole canvas."""
+        h, w = rgb.shape[:2]
+        if self._small is None or self._small.get_size() != (w, h):
+            self._small = pygame.Surface((w, h))
+        pygame.surfarray.blit_array(self._small, rgb.swapaxes(0, 1))
+        pygame.transform.scale(self._small, (self.width, self.height), self.surface)
+
+    def tobytes(self):
+        return pygame.image.tostring(self.surface, "RGB")
+
+
+class NumpyCanvas:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        # Interleaved uint8 RGB, the layout ffmpeg reads, so tobytes() is a plain copy
+        self.fb = np.zeros((height, width, 3), dtype=np.uint8)
+        self._pixels = self.fb.reshape(-1, 3)
+        # Strided per-channel views: gathers/scatters on these are far cheaper than on 3-byte rows
+        self._planes = [self._pixels[:, ch] for ch in range(3)]
+        self._row = np.empty((width, 3), dtype=np.uint8)
+        # Frame-sized scratch for finding samples that share a pixel; stale
+        # entries are harmless because every use writes the entries it reads
+        self._slot = np.zeros(width * height, dtype=np.intp)
+        self._stamps = {}
+        self._scale_index = {}
+
+    def fill(self, color):
+        # Copying whole rows is much faster than broadcasting a 3-value color
+        self._row[:] = np.asarray(color, dtype=np.uint8)
+        self.fb[:] = self._row
+
+    def rects(self, rects, colors):
+        rects = np.asarray(rects, dtype=float).reshape(-1, 4)
+        colors = _per_item(colors, len(rects), 3).astype(np.uint8)
+        for (x, y, w, h), c in zip(rects.tolist(), colors):
+            x0, y0 = max(0, int(x)), max(0, int(y))
+            x1, y1 = min(self.width, int(x + w)), min(self.height, int(y + h))
+            if x1 > x0 and y1 > y0:
+                self.fb[y0:y1, x0:x1] = c
+
+    def spans(self, xs, tops, bottoms, colors):
+        """Vertical 1px spans: column xs[i] filled from tops[i] to bottoms[i] inclusive."""
+        xs = np.asarray(xs).astype(np.intp)
+        n = len(xs)
+        tops = np.broadcast_to(np.asarray(tops), (n,))
+        bottoms = np.broadcast_to(np.asarray(bottoms), (n,))
+        ok = (xs >= 0) & (xs < self.width)
+        y0 = np.clip(np.minimum(tops, bottoms)[ok], 0, self.height - 1).astype(np.intp)
+        y1 = np.clip(np.maximum(tops, bottoms)[ok], -1, self.height - 1).astype(np.intp)
+        counts = np.maximum(y1 - y0 + 1, 0)
+        owner = np.repeat(np.flatnonzero(ok), counts)
+        rows = np.repeat(y0 - (np.cumsum(counts) - counts), counts) + np.arange(len(owner))
+        self._paint(rows * self.width + xs[owner], _palette(colors, n), owner)
+
+    def _paint(self, pix, table, owner):
+        """Opaque shapes: store color table[:, owner] (see _palette) at pix; later samples
+        overwrite earlier ones, as with pygame.draw."""
+        shared = table.ndim == 1
+        for ch, plane in enumerate(self._planes):
+            plane[pix] = table[ch] if shared else table[ch][owner]
+
+    def _composite(self, pix, cov, table, owner, additive):
+        """Blend (or add) color table[:, owner] at pix with 0..1 coverage cov as alpha.
+        Callers pass at most about CHUNK samples."""
+        # Samples sharing a pixel (overlapping circles) are layered in drawing order
+        # without sorting or np.add.at: a frame-sized slot map finds the last sample of
+        # every pixel (NumPy keeps the last of repeated writes), the earlier ones are
+        # composited first, then one pass over everything with their coverage zeroed,
+        # so each pixel's final write is its last sample blended on top.
+        slot = self._slot
+        index = np.arange(len(pix), dtype=np.intp)
+        slot[pix] = index
+        last = slot[pix] == index
+        if not last.all():
+            earlier = ~last
+            self._composite(pix[earlier], cov[earlier], table, owner[earlier], additive)
+            cov = cov * last
+        for ch, plane in enumerate(self._planes):
+            # +0.5 rounds the result when the float is stored back as uint8
+            base = plane[pix] + np.float32(0.5)
+            c = table[ch][owner]
+            if not additive:
+                c -= base
+            c *= cov
+            c += base
+            plane[pix] = np.minimum(c, 255) if additive else c
+
+    def lines(self, starts, ends, colors, width=1, additive=False):
+        # Whole-pixel endpoints, as pygame.draw.line uses
+        p0 = np.asarray(starts, dtype=np.float32).reshape(-1, 2).astype(np.intp)
+        p1 = np.asarray(ends, dtype=np.float32).reshape(-1, 2).astype(np.intp)
+        if len(p0) == 0:
+            return
+        colors = _per_item(colors, len(p0), 3)
+        table = colors.T if additive else _palette(colors, len(p0))
+        for pix, owner in self._scan_lines(p0, p1, max(1, int(width))):
+            if additive:
+                pix, owner = pix.ravel(), owner.ravel()
+                self._composite(pix, np.ones(len(pix), dtype=np.float32), table, owner, True)
+            else:
+                self._paint(pix, table, owner)
+
+    def _scan_lines(self, p0, p1, width):
+        """Yield (pix, owner) batches in drawing order, like pygame.draw.line: each line
+        steps one pixel at a time along its major axis (a) and covers `width` pixels
+        across it (b) per step."""
+        # Lines closer to horizontal step along x, the rest along y
+        steep = np.abs(p1[:, 1] - p0[:, 1]) > np.abs(p1[:, 0] - p0[:, 0])
+        a0, b0 = np.where(steep, p0[:, 1], p0[:, 0]), np.where(steep, p0[:, 0], p0[:, 1])
+        a1, b1 = np.where(steep, p1[:, 1], p1[:, 0]), np.where(steep, p1[:, 0], p1[:, 1])
+        flip = a1 < a0
+        a0, a1 = np.where(flip, a1, a0), np.where(flip, a0, a1)
+        b0, b1 = np.where(flip, b1, b0), np.where(flip, b0, b1)
+        slope = ((b1 - b0) / np.maximum(a1 - a0, 1)).astype(np.float32)
+        # First pixel across the line: b rounded, minus the part of the width above it
+        intercept = (b0 - a0 * slope - np.float32((width - 1) // 2 - 0.5)).astype(np.float32)
+        a_size = np.where(steep, self.height, self.width)
+        b_size = np.where(steep, self.width, self.height)
+        stride_a = np.where(steep, self.width, 1)
+        stride_b = np.where(steep, 1, self.width)
+
+        # Steps: the line's extent, cut to the frame on a and to where the line is on screen on b
+        lo = np.maximum(a0, 0)
+        hi = np.minimum(a1, a_size - 1)
+        flat = slope == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t0 = a0 + (-width - 1 - b0) / slope
+            t1 = a0 + (b_size + width - b0) / slope
+        lo = np.where(flat, lo, np.maximum(lo, np.floor(np.minimum(t0, t1)))).astype(np.intp)
+        hi = np.where(flat, hi, np.minimum(hi, np.ceil(np.maximum(t0, t1)))).astype(np.intp)
+        hi = np.where(flat & ((b0 < -width) | (b0 >= b_size + width)), lo - 1, hi)
+        counts = np.maximum(hi - lo + 1, 0)
+
+        across = np.arange(width)
+        for line, step in _runs(counts, max(1, CHUNK // width)):
+            a = lo[line] + step
+            b = np.floor(intercept[line] + a.astype(np.float32) * slope[line]).astype(np.intp)
+            # (step, across) layout keeps every batch in drawing order
+            pix = (a * stride_a[line] + b * stride_b[line])[:, None] + across * stride_b[line][:, None]
+            owner = np.broadcast_to(line[:, None], pix.shape)
+            if ((b >= 0) & (b <= b_size[line] - width)).all():
+                yield pix, owner
+            else:
+                k = b[:, None] + across
+                keep = (k >= 0) & (k < b_size[line][:, None])
+                yield pix[keep], owner[keep]
+
+    def polyline(self, points, color, width=1):
+        points = np.asarray(points, dtype=np.float32)
+        if len(points) > 1:
+            self.lines(points[:-1], points[1:], color, width)
+
+    def _stamp(self, radius, width, hard):
+        """Pixel offsets of a circle (or ring) and their coverage. Hard stamps match
+        pygame.draw.circle (centred on a pixel corner, fully on or off), soft ones are
+        anti-aliased around a pixel centre."""
+        key = (radius, width, hard)
+        stamp = self._stamps.get(key)
+        if stamp is None:
+            size = int(math.ceil(radius + 1))
+            oy, ox = np.mgrid[-size:size + 1, -size:size + 1]
+            if hard:
+                dist = np.hypot(ox + 0.5, oy + 0.5)
+                outer = radius - 0.3
+                cov = (dist <= outer) & ((dist > outer - width) if width else True)
+            elif width:
+                dist = np.hypot(ox, oy)
+                cov = np.clip(width / 2.0 + 0.5 - np.abs(dist - (radius - width / 2.0)), 0, 1)
+            else:
+                cov = np.clip(radius + 0.5 - np.hypot(ox, oy), 0, 1)
+            nz = cov > 0
+            stamp = self._stamps[key] = (size, ox[nz], oy[nz], cov[nz].astype(np.float32))
+        return stamp
+
+    def circles(self, centers, radii, colors, alpha=None, width=0, additive=False):
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 2)
+        n = len(centers)
+        if n == 0:
+            return
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float32), (n,))
+        colors = _per_item(colors, n, 3)
+        opaque = alpha is None and not additive
+        # Only glows are anti-aliased; other circles keep pygame's look
+        hard = not additive
+        # Radii snap to half pixels so similar circles share one stamp
+        keys, which = np.unique(np.round(radii * 2) / 2, return_inverse=True)
+        # Hard circles use whole-pixel centres like pygame, soft ones the nearest pixel
+        snap = np.floor if hard else np.rint
+        cx = snap(centers[:, 0]).astype(np.intp)
+        cy = snap(centers[:, 1]).astype(np.intp)
+
+        # This call's stamps back to back; each circle reads its own slice, so
+        # pixels come out in drawing order without sorting
+        stamps = [self._stamp(float(key), width, hard) for key in keys]
+        ox, oy, cov = (np.concatenate([stamp[i] for stamp in stamps]) for i in (1, 2, 3))
+        lengths = np.array([len(stamp[3]) for stamp in stamps])
+        start = (np.cumsum(lengths) - lengths)[which]
+        counts = np.where(keys > 0, lengths, 0)[which]
+        size = np.array([stamp[0] for stamp in stamps])[which]
+        clipped = (cx < size) | (cx >= self.width - size) | (cy < size) | (cy >= self.height - size)
+
+        table = _palette(colors, n) if opaque else colors.T
+        alphas = _alphas(alpha, n)
+        for owner, step in _runs(counts, CHUNK):
+            idx = start[owner] + step
+            px = cx[owner] + ox[idx]
+            py = cy[owner] + oy[idx]
+            if clipped[owner[0]:owner[-1] + 1].any():
+                keep = (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+                px, py, owner, idx = px[keep], py[keep], owner[keep], idx[keep]
+            pix = py * self.width + px
+            if opaque:
+                self._paint(pix, table, owner)
+            else:
+                self._composite(pix, alphas[owner] * cov[idx], table, owner, additive)
+
+    def blit(self, surface, pos):
+        x, y = int(pos[0]), int(pos[1])
+        w, h = surface.get_size()
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + w), min(self.height, y + h)
+        if x1 <= x0 or y1 <= y0:
+            return
+        src = pygame.surfarray.pixels3d(surface)[x0 - x:x1 - x, y0 - y:y1 - y].transpose(1, 0, 2)
+        dst = self.fb[y0:y1, x0:x1]
+        if surface.get_flags() & pygame.SRCALPHA:
+            a = pygame.surfarray.pixels_alpha(surface)[x0 - x:x1 - x, y0 - y:y1 - y].T[..., None] / np.float32(255)
+            base = dst.astype(np.float32)
+            dst[:] = base + (src - base) * a + 0.5
+        else:
+            dst[:] = src
+
+    def blit_array(self, rgb):
+        """Nearest-neighbour scale an (h, w, 3) uint8 image over the whole canvas."""
+        key = rgb.shape[:2]
+        index = self._scale_index.get(key)
+        if index is None:
+            rows = np.arange(self.height) * key[0] // self.height
+            cols = np.arange(self.width) * key[1] // self.width
+            index = self._scale_index[key] = (rows[:, None], cols[None, :])
+        self.fb[:] = rgb[index]
+
+    def tobytes(self):
+        return self.fb.tobytes()
+
+
+def make_canvas(backend, width, height):
+    if backend == "numpy":
+        return NumpyCanvas(width, height)
+    return PygameCanvas(width, height)
@@ -106,33 +106,60 @@ document.addEventListener('DOMContentLoaded', function () {
       Array.from(el.children).forEach(ch => { if (ch.tagName.toLowerCase() !== 'h3') body.appendChild(ch); });
       el.appendChild(body);
     }
+  });
 
-    // build multiple candidate slugs to increase chance of matching available assets
+  // build multiple candidate slugs to increase chance of matching available assets
+  function slugCandidates(title){
     const titleCore = title.split(':')[0].split('(')[0].split('—')[0].split('/')[0].trim();
-    const slugCandidates = [termToSlug(title), termToSlug(titleCore)];
+    const slugs = [termToSlug(title), termToSlug(titleCore)];
     // also add last word e.g. 'Brickwall limiter' -> 'limiter'
     const last = titleCore.split(' ').slice(-1)[0];
-    if (last && last.length > 2) slugCandidates.push(termToSlug(last));
+    if (last && last.length > 2) slugs.push(termToSlug(last));
     // prefer shorter slugs first (e.g., 'compressor')
-    slugCandidates.sort((a,b)=>a.length - b.length);
-    // try to find a matching image by testing candidate files
-    let imgSrc = null;
-    for (const s of slugCandidates){
-      const candidate = 'assets/glossary_images/' + s + '.svg';
-      // we'll use <img> onerror to remove missing images; but attempt shorter names first
-      imgSrc = candidate; break; // set candidate, onerror will clean up if missing
-    }
+    return slugs.sort((a,b)=>a.length - b.length);
+  }
+
+  function addTermArt(el, title, haveSprite){
+    const slugs = slugCandidates(title);
     const imgWrap = document.createElement('div');
     imgWrap.className = 'term-art';
-    const img = document.createElement('img');
-    img.src = imgSrc;
-    // hide the tile if the asset isn't present (onerror)
-    img.onerror = function(){ imgWrap.remove(); };
-    img.alt = title + ' — image';
-    imgWrap.appendChild(img);
+    // With the sprite loaded, use the first candidate that has a symbol (no request per term)
+    const symbol = haveSprite ? slugs.find(s => document.getElementById('icon-' + s)) : null;
+    if (symbol) {
+      const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+      svg.setAttribute('viewBox', '0 0 120 120');
+      svg.setAttribute('role', 'img');
+      svg.setAttribute('aria-label', title + ' — image');
+      const use = document.createElementNS('http://www.w3.org/2000/svg', 'use');
+      use.setAttribute('href', '#icon-' + symbol);
+      svg.appendChild(use);
+      imgWrap.appendChild(svg);
+    } else {
+      // we'll use <img> onerror to remove missing images; but attempt shorter names first
+      const img = document.createElement('img');
+      img.src = 'assets/glossary_images/' + slugs[0] + '.svg';
+      // hide the tile if the asset isn't present (onerror)
+      img.onerror = function(){ imgWrap.remove(); };
+      img.alt = title + ' — image';
+      imgWrap.appendChild(img);
+    }
     // insert at start of the entry
     el.insertBefore(imgWrap, el.firstChild);
-  });
+  }
+
+  // All icons come in one request from the sprite sheet (written by tools/build_glossary.py);
+  // if it is missing (or the page is opened from file://) fall back to one image per term.
+  fetch('assets/glossary-sprite.svg')
+    .then(r => r.ok ? r.text() : Promise.reject(new Error('no sprite')))
+    .then(text => {
+      const holder = document.createElement('div');
+      holder.setAttribute('aria-hidden', 'true');
+      holder.innerHTML = text;
+      document.body.appendChild(holder);
+      return true;
+    })
+    .catch(() => false)
+    .then(haveSprite => entries.forEach(({el, title}) => { if (title) addTermArt(el, title, haveSprite); }));
 
   const alphaDiv = document.getElementById('glossary-alpha');
   // Create letter sections and collapsible containers
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Build every glossary output from `glossary.html` in one run.
+
+Copyright (c) 2025 FreeEd4Med
+
+This tool is released under the MIT License. See /LICENSE at the repository root.
+
+Parses `glossary.html` once (streaming, see export_glossary_text.py) and
+produces:
+
+- assets/glossary.txt           plain-text export
+- assets/glossary_images/*.svg  one icon per term (gen_glossary_svgs.py)
+- assets/glossary-sprite.svg    all icons as <symbol>s in one file (loaded by glossary.js)
+- assets/glossary.pdf           PDF of the text export (make_pdfs.py)
+
+Each output is skipped when its inputs are unchanged. Content hashes of the
+inputs (the HTML, the term and icon template, the script that renders the
+output) and of the written files are kept in assets/.glossary-build.json
+(the PDF shares
+assets/.pdf-build.json with `make_pdfs.py --manifest`). Icons that were
+drawn by hand (a file that differs from what the generator would write and
+was not written by this build) are never overwritten.
+
+Usage: python3 tools/build_glossary.py [--force] [--no-sprite]
+"""
+import argparse, hashlib, os, sys, time
+
+from build_state import file_sha, fresh, load_state, save_state, sha, write_file
+from export_glossary_text import GLOSS_HTML, OUT_TXT, format_text, parse_glossary
+from gen_glossary_svgs import OUT_DIR, SPRITE, TEMPLATE_HASH, build_sprite, icon_terms, render_icon, slugify, write_icons
+from make_pdfs import build_pdfs, load_jobs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+OUT_PDF = os.path.join(ROOT, 'assets', 'glossary.pdf')  # listed in tools/pdfs.json
+MANIFEST = os.path.join(ROOT, 'assets', '.glossary-build.json')
+MANIFEST_VERSION = 1
+
+
+def load_manifest(path=MANIFEST):
+    return load_state(path, MANIFEST_VERSION, ('outputs', 'icons'))
+
+def save_manifest(data, path=MANIFEST):
+    save_state(data, path)
+
+def rel(path):
+    return os.path.relpath(path, ROOT)
+
+
+class Build:
+    def __init__(self, manifest, force=False):
+        self.manifest = manifest
+        self.force = force
+        self.source = file_sha(GLOSS_HTML)
+        self._items = None
+
+    def items(self):
+        # Parsed on first use only, so an up-to-date build never reads the HTML
+        if self._items is None:
+            self._items = parse_glossary(GLOSS_HTML)
+        return self._items
+
+    def text(self):
+        key = sha(self.source, file_sha(os.path.join(TOOLS, 'export_glossary_text.py')))
+        outputs = self.manifest['outputs']
+        if not self.force and fresh(outputs.get('text'), key, OUT_TXT):
+            return 'up to date'
+        outputs['text'] = {'input': key, 'output': write_file(OUT_TXT, format_text(self.items()))}
+        return 'written'
+
+    def icons(self):
+        key = sha(self.source, TEMPLATE_HASH)
+        known = self.manifest['icons']
+        # Same inputs as last time and every recorded icon still on disk: nothing to do
+        if (not self.force and self.manifest.get('icons_input') == key
+                and all(os.path.exists(os.path.join(OUT_DIR, slug + '.svg')) for slug in known)):
+            return 'up to date'
+        kept = custom = 0
+        slugs = set()
+        jobs = []
+        for term in icon_terms(self.items()):
+            slug = slugify(term)
+            if slug in slugs:
+                continue  # two spellings of one term share a file; the first one wins
+            slugs.add(slug)
+            path = os.path.join(OUT_DIR, slug + '.svg')
+            entry = known.get(slug)
+            term_key = sha(term, TEMPLATE_HASH)
+            if entry and entry.get('custom'):
+                if os.path.exists(path):
+                    custom += 1
+                    continue
+                entry = None  # hand-made icon was deleted: generate one
+            if entry and entry.get('input') == term_key and os.path.exists(path) and not self.force:
+                kept += 1
+                continue
+            svg = render_icon(term, slug)
+            current = file_sha(path)
+            if current is not None and current != (entry or {}).get('output'):
+                if current == hashlib.sha256(svg.encode('utf-8')).hexdigest():
+                    known[slug] = {'input': term_key, 'output': current}  # generated earlier, adopt it
+                    kept += 1
+                else:
+                    known[slug] = {'custom': True}
+                    custom += 1
+                continue
+            jobs.append((slug, term_key, path, svg))
+        hashes = write_icons([(path, svg) for _, _, path, svg in jobs])
+        for (slug, term_key, _, _), digest in zip(jobs, hashes):
+            known[slug] = {'input': term_key, 'output': digest}
+        self.manifest['icons_input'] = key
+        return '%d written, %d unchanged, %d hand-made kept' % (len(jobs), kept, custom)
+
+    def sprite(self):
+        # Keyed on the content of every icon file, so hand-made icons added or edited also refresh it
+        names = sorted(n for n in os.listdir(OUT_DIR) if n.endswith('.svg'))
+        key = sha(file_sha(os.path.join(TOOLS, 'gen_glossary_svgs.py')), *('%s:%s' % (n, file_sha(os.path.join(OUT_DIR, n))) for n in names))
+        outputs = self.manifest['outputs']
+        if not self.force and fresh(outputs.get('sprite'), key, SPRITE):
+            return 'up to date'
+        count = build_sprite(OUT_DIR, SPRITE)
+        outputs['sprite'] = {'input': key, 'output': file_sha(SPRITE)}
+        return '%d icons' % count
+
+    def pdf(self):
+        # Same job definition and state file as `make_pdfs.py --manifest`, so either tool can skip it
+        try:
+            jobs = [j for j in load_jobs() if j['output'] == rel(OUT_PDF)]
+        except (OSError, ValueError):
+            jobs = []
+        jobs = jobs or [{'source': rel(OUT_TXT), 'output': rel(OUT_PDF), 'title': os.path.basename(OUT_PDF),
+                         'compress': False}]
+        built, skipped, failed = build_pdfs(jobs, workers=1, force=self.force, log=lambda msg: None)
+        return 'failed' if failed else 'written' if built else 'up to date'
+
+def main():
+    parser = argparse.ArgumentParser(description='Build glossary.txt, term icons and glossary.pdf from glossary.html')
+    parser.add_argument('--force', action='store_true', help='Rebuild everything (hand-made icons are still kept)')
+    parser.add_argument('--no-sprite', dest='sprite', action='store_false', help='Skip the icon sprite sheet used by glossary.js')
+    args = parser.parse_args()
+    if not os.path.exists(GLOSS_HTML):
+        print('glossary.html not found at', GLOSS_HTML, file=sys.stderr); sys.exit(2)
+
+    manifest = load_manifest()
+    build = Build(manifest, force=args.force)
+    steps = [('text', build.text, OUT_TXT), ('icons', build.icons, OUT_DIR)]
+    if args.sprite:
+        steps.append(('sprite', build.sprite, SPRITE))
+    steps.append(('pdf', build.pdf, OUT_PDF))
+    for name, step, target in steps:
+        start = time.perf_counter()
+        status = step()
+        print('%-6s %-28s %s (%.0f ms)' % (name, rel(target), status, (time.perf_counter() - start) * 1000))
+    save_manifest(manifest)
+
+if __name__ == '__main__':
+    main()
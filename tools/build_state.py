@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Content-hash bookkeeping shared by the site build tools.
+
+Copyright (c) 2025 FreeEd4Med
+
+This tool is released under the MIT License. See /LICENSE at the repository root.
+
+A state file maps each output to the hash of the inputs it was built from
+and the hash of what was written, so a tool can skip outputs whose inputs
+are unchanged and notice outputs that were edited or deleted since.
+"""
+import hashlib, json, os
+
+
+def sha(*parts):
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+def file_sha(path):
+    """sha256 of a file's content, or None if it doesn't exist."""
+    h = hashlib.sha256()
+    try:
+        with open(path, 'rb') as fh:
+            for block in iter(lambda: fh.read(1 << 16), b''):
+                h.update(block)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+def write_file(path, data):
+    """Write text or bytes and return the content hash."""
+    raw = data.encode('utf-8') if isinstance(data, str) else data
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(raw)
+    return hashlib.sha256(raw).hexdigest()
+
+def fresh(entry, key, path):
+    """True if `path` was built from inputs hashing to `key` and hasn't been touched since."""
+    return bool(entry) and entry.get('input') == key and file_sha(path) == entry.get('output')
+
+def load_state(path, version, sections=('outputs',)):
+    empty = {'version': version, **{s: {} for s in sections}}
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return empty
+    if data.get('version') != version:
+        return empty
+    for s in sections:
+        data.setdefault(s, {})
+    return data
+
+def save_state(data, path):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, indent=1, sort_keys=True)
+    os.replace(tmp, path)
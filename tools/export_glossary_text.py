@@ -5,63 +5,156 @@ Copyright (c) 2025 FreeEd4Med
 
 This tool is released under the MIT License. See /LICENSE at the repository root.
 
-This script extracts the <main> section of `glossary.html`, converts headings
-and definition lists to plain text and writes to assets/glossary.txt for
-PDF conversion with `make_pdfs.py`.
+This script reads the <main> section of `glossary.html` with a streaming
+HTML parser, turns headings, article entries and definition lists into a
+term list, and writes it as plain text to assets/glossary.txt for PDF
+conversion with `make_pdfs.py`. `build_glossary.py` runs this together with
+the icon and PDF steps.
 """
-import re, html, sys, os
+import sys, os, re
+from html.parser import HTMLParser
 
-ROOT = os.path.dirname(os.path.dirname(__file__))
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 GLOSS_HTML = os.path.join(ROOT, 'glossary.html')
 OUT_TXT = os.path.join(ROOT, 'assets', 'glossary.txt')
+TITLE = 'FreeEd4Med — Glossary (mixing, mastering, clinical audio)'
+
+# Block elements whose text becomes one item; inline tags (strong, a, em) only add text
+CAPTURE = {'h2', 'h3', 'dt', 'dd', 'p'}
+SKIP = {'script', 'style'}
+
+
+class GlossaryParser(HTMLParser):
+    """Collects glossary items from <main> in document order, one pass, no backtracking.
+
+    Items are tuples:
+      ('section', title)          <h2>
+      ('group', title)            <h3> of an article that holds a definition list
+      ('term', term, definition)  <dt>/<dd> pairs, or an article's <h3> + <p>
+      ('para', text)              any other paragraph (notes, orphaned definitions)
+
+    The page is hand-edited and not always balanced, so the parser only tracks
+    what it needs (inside <main>, current capture, pending <h3>/<dt>) instead
+    of building a tree.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items = []
+        self.in_main = False
+        self.skip = 0
+        self.tag = None        # element being captured
+        self.buf = []
+        self.heading = None    # article <h3> waiting to see whether a <p> or a <dl> follows
+        self.term = None       # <dt> waiting for its <dd>
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'main':
+            self.in_main = True
+        elif tag in SKIP:
+            self.skip += 1
+        elif not self.in_main or self.skip:
+            return
+        elif tag in CAPTURE:
+            if self.tag:
+                self._flush()  # unclosed <p>/<dd>
+            self.tag, self.buf = tag, []
+        elif tag == 'article':
+            self._close_article()
+        elif tag == 'br' and self.tag:
+            self.buf.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag == 'main':
+            if self.tag:
+                self._flush()
+            self._close_article()
+            self.in_main = False
+        elif tag in SKIP:
+            self.skip = max(0, self.skip - 1)
+        elif tag == self.tag:
+            self._flush()
+        elif tag in ('article', 'section'):
+            if self.tag:
+                self._flush()
+            self._close_article()
+
+    def handle_data(self, data):
+        if self.tag and not self.skip:
+            self.buf.append(data)
+
+    def _flush(self):
+        tag, text = self.tag, ' '.join(''.join(self.buf).split())
+        self.tag, self.buf = None, []
+        if not text:
+            return
+        if tag == 'h2':
+            self._close_article()
+            self.items.append(('section', text))
+        elif tag == 'h3':
+            self._close_article()
+            self.heading = text
+        elif tag == 'dt':
+            if self.heading:
+                self.items.append(('group', self.heading))
+                self.heading = None
+            if self.term:
+                self.items.append(('term', self.term, ''))
+            self.term = text
+        elif tag == 'dd' and self.term:
+            self.items.append(('term', self.term, text))
+            self.term = None
+        elif self.heading:  # first <p> (or stray <dd>) after an article heading
+            self.items.append(('term', self.heading, text))
+            self.heading = None
+        else:
+            self.items.append(('para', text))
+
+    def _close_article(self):
+        if self.term:
+            self.items.append(('term', self.term, ''))
+            self.term = None
+        if self.heading:
+            self.items.append(('group', self.heading))
+            self.heading = None
+
+
+def parse_glossary(path=GLOSS_HTML, chunk_size=64 * 1024):
+    """Glossary items from an HTML file, fed to the parser in chunks."""
+    parser = GlossaryParser()
+    with open(path, 'r', encoding='utf-8') as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    parser.close()
+    return parser.items
+
+
+def format_text(items):
+    out = [TITLE, '=' * len(TITLE), '']
+    for item in items:
+        kind = item[0]
+        if kind == 'section':
+            out += ['', '== %s ==' % item[1], '']
+        elif kind == 'group':
+            out += ['', '-- %s --' % item[1], '']
+        elif kind == 'term':
+            out.append(item[1] + ':')
+            if item[2]:
+                out.append('  ' + item[2])
+            out.append('')
+        else:
+            out += [item[1], '']
+    text = '\n'.join(out)
+    return re.sub(r'\n{3,}', '\n\n', text).strip() + '\n'
 
-def extract_main(htmltext):
-    m = re.search(r"<main[^>]*>(.*?)</main>", htmltext, re.S|re.I)
-    return m.group(1) if m else htmltext
-
-def strip_tags(s):
-    # collapse tags to newlines for block elements
-    s = re.sub(r'<(h[12-6]|p|div|section|article|li|dt|dd|br)[^>]*>', '\n', s, flags=re.I)
-    # remove remaining tags
-    s = re.sub(r'<[^>]+>', '', s)
-    s = html.unescape(s)
-    # normalize spaces
-    s = re.sub(r'\s+',' ', s)
-    s = s.strip()
-    return s
-
-def format_text(main_html):
-    # Replace dt/dd pairs into a clear format
-    # Make sure newlines are preserved for readability.
-    # Convert headings h2/h3 into labelled sections
-    text = main_html
-    # Mark h2 and h3
-    text = re.sub(r'<h2[^>]*>(.*?)</h2>', r'\n\n== \1 ==\n\n', text, flags=re.I|re.S)
-    text = re.sub(r'<h3[^>]*>(.*?)</h3>', r'\n\n-- \1 --\n', text, flags=re.I|re.S)
-    # convert dt/dd to lines
-    text = re.sub(r'<dt[^>]*>(.*?)</dt>\s*<dd[^>]*>(.*?)</dd>', r'\n\1:\n  \2\n', text, flags=re.I|re.S)
-    # also handle the flattened format where glossary items are article.entry
-    # entries (created by the client-side transform) — convert <article class="entry"><h3>Term</h3><p>Definition</p></article>
-    text = re.sub(r'<article[^>]*class=["\']?entry["\']?[^>]*>.*?<h3[^>]*>(.*?)</h3>.*?<p[^>]*>(.*?)</p>.*?</article>',
-                  r'\n\1:\n  \2\n', text, flags=re.I|re.S)
-
-    # remove any leftover html tags
-    out = strip_tags(text)
-    # tidy up multiple newlines
-    out = re.sub(r'\n\s+','\n', out)
-    out = re.sub(r'\n{3,}', '\n\n', out)
-    return out
 
 def main():
     if not os.path.exists(GLOSS_HTML):
         print('glossary.html not found at', GLOSS_HTML, file=sys.stderr); sys.exit(2)
-    with open(GLOSS_HTML, 'r', encoding='utf-8') as fh:
-        htmlsrc = fh.read()
-    main_html = extract_main(htmlsrc)
-    text = format_text(main_html)
-    # prepend header
-    title = 'FreeEd4Med — Glossary (mixing, mastering, clinical audio)'
-    out = title + '\n' + ('='*len(title)) + '\n\n' + text + '\n'
+    out = format_text(parse_glossary(GLOSS_HTML))
     os.makedirs(os.path.dirname(OUT_TXT), exist_ok=True)
     with open(OUT_TXT, 'w', encoding='utf-8') as fh:
         fh.write(out)
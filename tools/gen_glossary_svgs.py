@@ -3,15 +3,24 @@
 
 Reads `glossary.html` and finds terms in <article class="entry"> <h3> or <dt> tags.
 Creates a minimal, consistent SVG for each missing term under
-`assets/glossary_images/<slug>.svg`.
+`assets/glossary_images/<slug>.svg`, and with --sprite also a single sprite
+sheet (`assets/glossary-sprite.svg`, one <symbol id="icon-<slug>"> per icon)
+that glossary.js loads instead of one image request per term.
 
 This script is intentionally simple and safe (text-only SVGs with gradients).
+`build_glossary.py` uses the same template and only regenerates icons whose
+term or template (TEMPLATE_HASH) changed.
 """
-import re, os, html, hashlib
+import argparse, re, os, html, hashlib
+from concurrent.futures import ThreadPoolExecutor
+from string import Formatter
 
-ROOT = os.path.dirname(os.path.dirname(__file__))
+from export_glossary_text import parse_glossary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 GLOSSARY = os.path.join(ROOT, 'glossary.html')
 OUT_DIR = os.path.join(ROOT, 'assets', 'glossary_images')
+SPRITE = os.path.join(ROOT, 'assets', 'glossary-sprite.svg')
 
 palette = [
     ("7a2ff5", "ff5c9c"),
@@ -23,49 +32,7 @@ palette = [
     ("00d4ff", "6f42c1"),
 ]
 
-def slugify(s: str) -> str:
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9]+", '-', s)
-    s = re.sub(r"(^-|-$)", '', s)
-    return s[:60]
-
-if not os.path.exists(GLOSSARY):
-    print('glossary.html not found at', GLOSSARY); raise SystemExit(2)
-
-with open(GLOSSARY, 'r', encoding='utf-8') as fh:
-    src = fh.read()
-
-# extract <article class="entry"> <h3>Title</h3>
-titles = re.findall(r'<article[^>]*class=["\']entry["\'][^>]*>.*?<h3[^>]*>(.*?)</h3>', src, flags=re.I|re.S)
-# extract dt entries
-dt_titles = re.findall(r'<dt[^>]*>(.*?)</dt>', src, flags=re.I|re.S)
-
-all_titles = []
-for t in titles + dt_titles:
-    clean = html.unescape(re.sub(r'<[^>]+>', '', t)).strip()
-    if clean:
-        all_titles.append(clean)
-
-# Deduplicate preserving order
-seen = set(); terms = []
-for t in all_titles:
-    key = t.strip().lower()
-    if key not in seen:
-        seen.add(key); terms.append(t.strip())
-
-os.makedirs(OUT_DIR, exist_ok=True)
-created = []
-for t in terms:
-    s = slugify(t)
-    out = os.path.join(OUT_DIR, s + '.svg')
-    if os.path.exists(out):
-        continue
-    # choose palette by hash
-    idx = int(hashlib.sha1(s.encode('utf-8')).hexdigest(), 16) % len(palette)
-    a,b = palette[idx]
-    title_text = (t if len(t) <= 22 else t[:19] + '...')
-
-    svg = f'''<svg xmlns="http://www.w3.org/2000/svg" width="120" height="120" viewBox="0 0 120 120">
+ICON_TEMPLATE = '''<svg xmlns="http://www.w3.org/2000/svg" width="120" height="120" viewBox="0 0 120 120">
   <defs>
     <linearGradient id="g" x1="0" x2="1">
       <stop offset="0" stop-color="#{a}"/>
@@ -75,23 +42,119 @@ for t in terms:
   <rect width="120" height="120" rx="14" fill="url(#g)" opacity="0.12"/>
   <g transform="translate(12,18)" fill="#fff" opacity="0.92">
     <rect x="4" y="30" width="92" height="46" rx="8" fill="#0d0d12" opacity="0.6" />
-    <text x="50%" y="66" font-size="10" font-family="Arial,Helvetica,sans-serif" text-anchor="middle" fill="#ffffff">{html.escape(title_text)}</text>
+    <text x="50%" y="66" font-size="10" font-family="Arial,Helvetica,sans-serif" text-anchor="middle" fill="#ffffff">{label}</text>
   </g>
 </svg>'''
-    with open(out, 'w', encoding='utf-8') as fh:
-        fh.write(svg)
-    created.append((t, s))
-
-print('Found terms:', len(terms))
-print('Created icons:', len(created))
-for t,s in created[:20]:
-    print('-', t, '->', s + '.svg')
-
-if not created:
-    print('No new files created (all icons exist).')
-
-# exit status
-if created:
-    raise SystemExit(0)
-else:
-    raise SystemExit(0)
+
+# The template split into (literal, field) pairs once; rendering is a join.
+# Any change to the template or palette changes TEMPLATE_HASH, which marks every generated icon stale.
+_PARTS = [(literal, field) for literal, field, _, _ in Formatter().parse(ICON_TEMPLATE)]
+TEMPLATE_HASH = hashlib.sha256((ICON_TEMPLATE + repr(palette)).encode('utf-8')).hexdigest()[:16]
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+def slugify(s: str) -> str:
+    return _NON_ALNUM.sub('-', s.lower()).strip('-')[:60]
+
+def icon_terms(items):
+    """Article headings and <dt> terms from the parsed glossary, deduplicated in order."""
+    seen = set(); terms = []
+    for item in items:
+        if item[0] not in ('term', 'group'):
+            continue
+        t = item[1].strip()
+        key = t.lower()
+        if t and key not in seen:
+            seen.add(key); terms.append(t)
+    return terms
+
+def render_icon(t, s):
+    # choose palette by hash (sha1 of the slug, as the existing icons were made)
+    idx = int(hashlib.sha1(s.encode('utf-8')).hexdigest(), 16) % len(palette)
+    a,b = palette[idx]
+    title_text = (t if len(t) <= 22 else t[:19] + '...')
+    values = {'a': a, 'b': b, 'label': html.escape(title_text)}
+    return ''.join(literal + (values[field] if field else '') for literal, field in _PARTS)
+
+def _write(job):
+    path, svg = job
+    raw = svg.encode('utf-8')
+    with open(path, 'wb') as fh:
+        fh.write(raw)
+    return hashlib.sha256(raw).hexdigest()
+
+def write_icons(jobs, workers=8):
+    """Write [(path, svg)] concurrently -> content hashes in job order."""
+    if not jobs:
+        return []
+    os.makedirs(os.path.dirname(jobs[0][0]), exist_ok=True)
+    if len(jobs) == 1:
+        return [_write(jobs[0])]
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(_write, jobs))
+
+_SVG_OPEN = re.compile(r'<svg\b([^>]*)>', re.I)
+_VIEWBOX = re.compile(r'viewBox="([^"]+)"')
+_ID_ATTR = re.compile(r'\bid="([^"]+)"')
+
+def sprite_symbol(slug, svg):
+    """One icon file -> <symbol id="icon-slug">; its internal ids get the slug as prefix so icons can share a page."""
+    m = _SVG_OPEN.search(svg)
+    end = svg.rfind('</svg>')
+    if not m or end < m.end():
+        return None
+    box = _VIEWBOX.search(m.group(1))
+    body = svg[m.end():end].strip()
+    for old in set(_ID_ATTR.findall(body)):
+        new = '%s-%s' % (slug, old)
+        body = body.replace('id="%s"' % old, 'id="%s"' % new).replace('#%s)' % old, '#%s)' % new) \
+                   .replace('href="#%s"' % old, 'href="#%s"' % new)
+    return '<symbol id="icon-%s" viewBox="%s">%s</symbol>' % (slug, box.group(1) if box else '0 0 120 120', body)
+
+def build_sprite(icon_dir=OUT_DIR, dest=SPRITE):
+    """Collect every icon in icon_dir (generated and hand-made) into one sprite sheet; returns the icon count."""
+    names = sorted(n for n in os.listdir(icon_dir) if n.endswith('.svg'))
+    symbols = []
+    for name in names:
+        with open(os.path.join(icon_dir, name), 'r', encoding='utf-8') as fh:
+            symbol = sprite_symbol(name[:-4], fh.read())
+        if symbol:
+            symbols.append(symbol)
+    with open(dest, 'w', encoding='utf-8') as fh:
+        # Zero-size rather than display:none: browsers skip gradients defined inside undisplayed SVGs
+        fh.write('<svg xmlns="http://www.w3.org/2000/svg" width="0" height="0" style="position:absolute">\n')
+        fh.write('\n'.join(symbols))
+        fh.write('\n</svg>\n')
+    return len(symbols)
+
+def main():
+    parser = argparse.ArgumentParser(description='Create SVG icons for glossary terms that have none yet')
+    parser.add_argument('--sprite', action='store_true', help='Also write the sprite sheet ' + os.path.relpath(SPRITE, ROOT))
+    args = parser.parse_args()
+    if not os.path.exists(GLOSSARY):
+        print('glossary.html not found at', GLOSSARY); raise SystemExit(2)
+
+    terms = icon_terms(parse_glossary(GLOSSARY))
+    jobs = []; created = []; planned = set()
+    for t in terms:
+        s = slugify(t)
+        out = os.path.join(OUT_DIR, s + '.svg')
+        if os.path.exists(out) or s in planned:
+            continue
+        planned.add(s)
+        jobs.append((out, render_icon(t, s)))
+        created.append((t, s))
+    write_icons(jobs)
+
+    print('Found terms:', len(terms))
+    print('Created icons:', len(created))
+    for t,s in created[:20]:
+        print('-', t, '->', s + '.svg')
+
+    if not created:
+        print('No new files created (all icons exist).')
+    if args.sprite:
+        print('Sprite:', build_sprite(), 'icons ->', SPRITE)
+
+if __name__ == '__main__':
+    main()
@@ -1,117 +1,320 @@
 #!/usr/bin/env python3
-"""Simple single-page PDF generator for small text files.
+"""Paginated text-to-PDF generator for the site's textual assets.
 
 Copyright (c) 2025 FreeEd4Med
 
 This tool is released under the MIT License. See /LICENSE at the repository root.
 
-This is a tiny helper to create readable PDF downloads for short textual assets.
-It uses the standard PDF Type1 font Helvetica (no embedding) and writes lines top-down.
-Not a full featured renderer, but good for short plain text documents (checklist, guides).
+This is a small helper to create readable PDF downloads for textual assets
+(glossary, checklists, guides, the research library). It uses the standard
+PDF Type1 font Helvetica (no embedding, WinAnsi encoding), wraps lines to the
+page width using Helvetica's character widths, starts new pages as needed
+and numbers them.
+
+The PDF is written to the file as it goes: each page's content stream is
+flushed when the page is full and only the object offsets (for the xref
+table) are kept, so memory use does not grow with the document.
+
+Usage: make_pdfs.py input.txt output.pdf [--compress]
+       make_pdfs.py --manifest [tools/pdfs.json] [--jobs N] [--force]
+
+With --manifest every document listed in the manifest is converted in one
+process (in parallel worker processes), and documents whose source has not
+changed since the last build are skipped (hashes in assets/.pdf-build.json).
 """
-import sys, os
-
-def escape_paren(s):
-    return s.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
-
-def create_pdf_from_text(text: str, dest: str, title: str = 'Document'):
-    # Normalize to ASCII-ish (replace common unicode dashes and ellipses)
-    replacements = {
-        '\u2014': '-', '\u2013': '-', '\u2018': "'", '\u2019': "'",
-        '\u201c': '"', '\u201d': '"', '\u2026': '...'
-    }
-    for k,v in replacements.items():
-        text = text.replace(k, v)
-
-    lines = text.splitlines()
-    # PDF objects
-    objects = []
-
-    # Header
-    # We'll create objects: 1 Catalog, 2 Pages, 3 Page, 4 Font, 5 Content stream
-
-    # Content stream: set font and draw lines
-    content_lines = []
-    content_lines.append('BT')
-    content_lines.append('/F1 12 Tf')
-    # Start at 760 and decrement by 14 per line
-    y = 760
-    x = 50
-    for line in lines:
-        # trim long lines
-        safe = escape_paren(line)
-        content_lines.append(f'{x} {y} Td ({safe}) Tj')
-        content_lines.append('0 -14 Td')
-        y -= 14
-    content_lines.append('ET')
-    content = '\n'.join(content_lines).encode('latin-1', errors='replace')
-
-    # Create simple PDF
-    # Build objects
-    objs = []
-    objs.append(('1 0 obj', b'<< /Type /Catalog /Pages 2 0 R >>'))
-    objs.append(('2 0 obj', b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>'))
-    page_dict = b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>'
-    objs.append(('3 0 obj', page_dict))
-    font_dict = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
-    objs.append(('4 0 obj', font_dict))
-
-    # content stream object
-    stream = b'stream\n' + content + b'\nendstream'
-    objs.append(('5 0 obj', b'<< /Length ' + str(len(content)).encode('ascii') + b' >>\n' + stream))
-
-    # now write PDF with cross ref
-    pdf_lines = []
-    pdf_lines.append(b'%PDF-1.4')
-    xref_positions = []
-    pos = 0
-    for hdr, body in objs:
-        xref_positions.append(pos)
-        hdr_b = hdr.encode('ascii') if isinstance(hdr, str) else hdr
-        block = (hdr_b + b'\n' + body + b'\nendobj\n')
-        pdf_lines.append(block)
-        pos += len(block)
-
-    # assemble body
-    pdf_content = b'\n'.join(pdf_lines)
-
-    # compute offsets
-    offsets = []
-    cur = len(b'%PDF-1.4\n')
-    for hdr, body in objs:
-        offsets.append(cur)
-        hdr_b = hdr.encode('ascii') if isinstance(hdr, str) else hdr
-        block = (hdr_b + b'\n' + body + b'\nendobj\n')
-        cur += len(block)
-
-    xref_start = cur
-    # xref table
-    xref = []
-    xref.append(b'xref')
-    xref.append(b'0 %d' % (len(objs)+1))
-    xref.append(b'0000000000 65535 f ')  # object 0
-    for off in offsets:
-        xref.append(b'%010d 00000 n ' % off)
-
-    # trailer
-    trailer = b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % ((len(objs)+1), xref_start)
-
-    out = b'%PDF-1.4\n' + b''.join([(hdr.encode('ascii') if isinstance(hdr, str) else hdr) + b'\n' + body + b'\nendobj\n' for hdr, body in objs]) + b''.join(xref) + b'\n' + trailer
-
-    # Write file
-    with open(dest, 'wb') as f:
-        f.write(out)
+import argparse, json, sys, os, time, zlib
+from concurrent.futures import ProcessPoolExecutor
 
-if __name__ == '__main__':
-    # expecting pairs: input -> output
-    # default behaviors when called with no args
-    if len(sys.argv) == 3:
-        src, dest = sys.argv[1:3]
-        if not os.path.exists(src):
-            print('Source not found', src); sys.exit(2)
-        with open(src, 'r', encoding='utf-8') as fh:
-            txt = fh.read()
-        create_pdf_from_text(txt, dest, title=os.path.basename(dest))
-        print('Wrote', dest)
+from build_state import file_sha, fresh, load_state, save_state, sha
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_MANIFEST = os.path.join(ROOT, 'tools', 'pdfs.json')
+STATE = os.path.join(ROOT, 'assets', '.pdf-build.json')
+STATE_VERSION = 1
+
+PAGE_W, PAGE_H = 612, 792  # US Letter, points
+MARGIN = 54
+FONT_SIZE = 11
+LEADING = 14
+
+# Helvetica advance widths (1/1000 em) for WinAnsi codes 32..126, from the standard AFM
+_ASCII_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,   # space .. /
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,   # 0 .. ?
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,  # @ .. O
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,   # P .. _
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,   # ` .. o
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,        # p .. ~
+]
+WIDTHS = [556] * 256  # accented letters and other WinAnsi symbols: close enough to an average glyph
+WIDTHS[32:127] = _ASCII_WIDTHS
+for code, width in {0x85: 1000, 0x91: 222, 0x92: 222, 0x93: 333, 0x94: 333, 0x95: 350, 0x96: 556,
+                    0x97: 1000, 0xA0: 278, 0xB0: 400, 0xB1: 584, 0xB7: 278, 0xD7: 584}.items():
+    WIDTHS[code] = width
+
+# Characters outside WinAnsi that show up in the site's texts
+REPLACEMENTS = str.maketrans({
+    '\u2011': '-', '\u2010': '-', '\u2212': '-', '\u2248': '~', '\u2192': '->', '\u2190': '<-',
+    '\u2264': '<=', '\u2265': '>=', '\u202f': ' ', '\u2009': ' ', '\u200b': '', '\t': '    ',
+})
+
+
+def encode(text):
+    """Text -> WinAnsi bytes (cp1252 covers it: dashes, curly quotes, ellipsis...)."""
+    return text.translate(REPLACEMENTS).encode('cp1252', errors='replace')
+
+def escape_paren(b):
+    return b.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+def text_width(b, size=FONT_SIZE):
+    return sum(WIDTHS[c] for c in b) * size / 1000.0
+
+def wrap(b, max_width, size=FONT_SIZE):
+    """Split one encoded line into lines no wider than max_width; wrapped lines keep the indent."""
+    if text_width(b, size) <= max_width:
+        return [b]
+    indent = b[:len(b) - len(b.lstrip(b' '))]
+    limit = max_width * 1000.0 / size
+    lines, cur, cur_w = [], b'', 0
+    space = WIDTHS[32]
+    for word in b.split(b' '):
+        if not word:
+            continue
+        w = sum(WIDTHS[c] for c in word)
+        if cur and cur_w + space + w <= limit:
+            cur, cur_w = cur + b' ' + word, cur_w + space + w
+            continue
+        if cur:
+            lines.append(cur)
+        cur = indent + word
+        cur_w = sum(WIDTHS[c] for c in cur)
+        while cur_w > limit:  # a single word wider than the line: break it
+            cut, acc = 0, 0
+            for i, c in enumerate(cur):
+                if acc + WIDTHS[c] > limit:
+                    cut = max(i, 1)
+                    break
+                acc += WIDTHS[c]
+            lines.append(cur[:cut])
+            cur = indent + cur[cut:]
+            cur_w = sum(WIDTHS[c] for c in cur)
+    if cur:
+        lines.append(cur)
+    return lines
+
+
+class PdfWriter:
+    """Streams a multi-page text PDF to `dest`.
+
+    Objects 1-3 (catalog, page tree, font) are reserved up front; every page
+    references the same font object. Pages are written as they fill up and
+    the page tree, info dictionary and xref table are written on close().
+    """
+
+    CATALOG, PAGES, FONT = 1, 2, 3
+
+    def __init__(self, dest, title='Document', compress=False, font_size=FONT_SIZE, leading=LEADING):
+        self.fh = open(dest, 'wb')
+        self.title = title
+        self.compress = compress
+        self.font_size, self.leading = font_size, leading
+        self.offsets = {}
+        self.next_id = 4
+        self.kids = []
+        self.pos = 0
+        self.page = []
+        self.y = None
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._object(self.FONT, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+    def _write(self, data):
+        self.fh.write(data)
+        self.pos += len(data)
+
+    def _object(self, num, body):
+        self.offsets[num] = self.pos
+        self._write(b'%d 0 obj\n' % num + body + b'\nendobj\n')
+
+    def _new_id(self):
+        num = self.next_id
+        self.next_id += 1
+        return num
+
+    def write_text(self, text):
+        for line in text.splitlines():
+            self.write_line(line)
+
+    def write_line(self, line):
+        width = PAGE_W - 2 * MARGIN
+        for part in wrap(encode(line.rstrip('\r\n')), width, self.font_size):
+            if self.y is None or self.y < MARGIN + self.leading:
+                self._flush_page()
+                self.y = PAGE_H - MARGIN - self.font_size
+            if part.strip():
+                self.page.append(b'1 0 0 1 %d %.1f Tm (%s) Tj' % (MARGIN, self.y, escape_paren(part)))
+            self.y -= self.leading
+
+    def _flush_page(self):
+        if self.y is None:
+            return  # nothing started yet
+        number = encode(str(len(self.kids) + 1))
+        footer = b'/F1 9 Tf 1 0 0 1 %.1f %d Tm (%s) Tj' % ((PAGE_W - text_width(number, 9)) / 2, MARGIN // 2, number)
+        content = b'BT\n/F1 %d Tf\n' % self.font_size + b'\n'.join(self.page) + b'\n' + footer + b'\nET'
+        if self.compress:
+            content = zlib.compress(content, 6)
+            head = b'<< /Length %d /Filter /FlateDecode >>' % len(content)
+        else:
+            head = b'<< /Length %d >>' % len(content)
+        content_id, page_id = self._new_id(), self._new_id()
+        self._object(content_id, head + b'\nstream\n' + content + b'\nendstream')
+        self._object(page_id, b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+                              b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+                     % (self.PAGES, PAGE_W, PAGE_H, self.FONT, content_id))
+        self.kids.append(page_id)
+        self.page = []
+
+    def close(self):
+        if self.y is None:
+            self.y = PAGE_H - MARGIN  # empty document: still write one blank page
+        self._flush_page()
+        kids = b' '.join(b'%d 0 R' % k for k in self.kids)
+        self._object(self.PAGES, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.kids)))
+        self._object(self.CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % self.PAGES)
+        info = self._new_id()
+        self._object(info, b'<< /Title (%s) /Producer (FreeEd4Med make_pdfs.py) >>' % escape_paren(encode(self.title)))
+        xref_start = self.pos
+        count = self.next_id
+        self._write(b'xref\n0 %d\n0000000000 65535 f \n' % count)
+        for num in range(1, count):
+            self._write(b'%010d 00000 n \n' % self.offsets[num])
+        self._write(b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                    % (count, self.CATALOG, info, xref_start))
+        self.fh.close()
+        return len(self.kids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.fh.close()
+
+
+def create_pdf_from_text(text: str, dest: str, title: str = 'Document', compress: bool = False):
+    with PdfWriter(dest, title=title, compress=compress) as pdf:
+        pdf.write_text(text)
+
+def create_pdf_from_file(src: str, dest: str, title: str = 'Document', compress: bool = False):
+    """Like create_pdf_from_text, reading the source line by line; returns the page count.
+
+    The PDF goes to `dest + '.tmp'` and replaces `dest` only when complete, so a
+    missing or unreadable source leaves the existing file untouched.
+    """
+    tmp = dest + '.tmp'
+    try:
+        with open(src, 'r', encoding='utf-8') as fh, PdfWriter(tmp, title=title, compress=compress) as pdf:
+            for line in fh:
+                pdf.write_line(line)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, dest)
+    return len(pdf.kids)
+
+def load_jobs(path=PDF_MANIFEST):
+    """Documents listed in a JSON manifest: {"compress": bool, "documents": [{"source", "output", "title"?, "compress"?}]}.
+
+    Paths are relative to the repository root.
+    """
+    with open(path, 'r', encoding='utf-8') as fh:
+        data = json.load(fh)
+    jobs = []
+    for doc in data.get('documents', []):
+        if 'source' not in doc or 'output' not in doc:
+            raise ValueError('%s: every document needs "source" and "output"' % path)
+        jobs.append({'source': doc['source'], 'output': doc['output'],
+                     'title': doc.get('title') or os.path.basename(doc['output']),
+                     'compress': bool(doc.get('compress', data.get('compress', False)))})
+    return jobs
+
+def job_key(job, tool_hash):
+    return sha(file_sha(os.path.join(ROOT, job['source'])), tool_hash, job['title'], job['compress'])
+
+def pdf_job(job):
+    """Worker: build one document -> (output, pages, seconds, error)."""
+    start = time.perf_counter()
+    try:
+        dest = os.path.join(ROOT, job['output'])
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        pages = create_pdf_from_file(os.path.join(ROOT, job['source']), dest, job['title'], job['compress'])
+        return job['output'], pages, time.perf_counter() - start, None
+    except (OSError, UnicodeDecodeError) as e:
+        return job['output'], 0, time.perf_counter() - start, str(e)
+
+def build_pdfs(jobs, workers=None, force=False, state_path=STATE, log=print):
+    """Rebuild the PDFs whose source (or this script, or the job options) changed.
+
+    Stale documents are converted in parallel worker processes; returns
+    (built, skipped, failed) counts. Hashes are kept in `state_path`.
+    """
+    state = load_state(state_path, STATE_VERSION)
+    tool = file_sha(os.path.abspath(__file__))
+    stale = []
+    skipped = 0
+    for job in jobs:
+        key = job_key(job, tool)
+        if not force and fresh(state['outputs'].get(job['output']), key, os.path.join(ROOT, job['output'])):
+            skipped += 1
+            log('  up to date  %s' % job['output'])
+        else:
+            stale.append((job, key))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(stale) or 1))
+    if workers == 1:
+        results = [pdf_job(job) for job, _ in stale]
     else:
-        print('Usage: make_pdfs.py input.txt output.pdf')
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(pdf_job, [job for job, _ in stale]))
+    failed = 0
+    for (job, key), (output, pages, seconds, error) in zip(stale, results):
+        if error:
+            failed += 1
+            state['outputs'].pop(output, None)
+            log('  FAILED      %s: %s' % (output, error))
+            continue
+        state['outputs'][output] = {'input': key, 'output': file_sha(os.path.join(ROOT, output))}
+        log('  built       %s (%d pages, %.2fs)' % (output, pages, seconds))
+    save_state(state, state_path)
+    return len(stale) - failed, skipped, failed
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert text files to paginated PDFs')
+    parser.add_argument('files', nargs='*', metavar='input.txt output.pdf', help='One source/destination pair')
+    parser.add_argument('--compress', action='store_true', help='Flate-compress page content')
+    parser.add_argument('--manifest', nargs='?', const=PDF_MANIFEST,
+                        help='Build every document in a JSON manifest (default: tools/pdfs.json)')
+    parser.add_argument('--jobs', type=int, help='Worker processes for --manifest (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='With --manifest: rebuild even unchanged documents')
+    args = parser.parse_args()
+
+    if args.manifest:
+        try:
+            jobs = load_jobs(args.manifest)
+        except (OSError, ValueError) as e:
+            print('Cannot read manifest:', e, file=sys.stderr); sys.exit(2)
+        start = time.perf_counter()
+        built, skipped, failed = build_pdfs(jobs, workers=args.jobs, force=args.force)
+        print('%d built, %d up to date, %d failed in %.2fs' % (built, skipped, failed, time.perf_counter() - start))
+        sys.exit(1 if failed else 0)
+    if len(args.files) != 2:
+        parser.print_usage(); sys.exit(2)
+    src, dest = args.files
+    if not os.path.exists(src):
+        print('Source not found', src); sys.exit(2)
+    pages = create_pdf_from_file(src, dest, title=os.path.basename(dest), compress=args.compress)
+    print('Wrote', dest, '(%d pages)' % pages)
+
+if __name__ == '__main__':
+    main()